@@ -56,6 +56,7 @@ from porepy.numerics.interface_laws.elliptic_interface_laws import (
 
 from porepy.numerics.interface_laws.cell_dof_face_dof_map import CellDofFaceDofMap
 from porepy.numerics.mixed_dim.assembler import Assembler
+from porepy.numerics.mixed_dim.discretization_cache import DiscretizationCache
 
 import porepy.numerics
 
@@ -88,6 +89,7 @@ from porepy.grids.mortar_grid import MortarGrid, BoundaryMortar
 # Fractures
 from porepy.fracs.fractures import Fracture, EllipticFracture, FractureNetwork3d
 from porepy.fracs.fractures_2d import FractureNetwork2d
+from porepy.fracs.mesh_cache import MeshCache
 
 # Parameters
 from porepy.params.bc import (
@@ -125,6 +127,7 @@ from porepy.geometry import (
 from porepy.fracs import utils as frac_utils
 from porepy.fracs import meshing, fracture_importer, mortars
 from porepy.grids import structured, simplex, coarsening, partition, refinement
+from porepy.grids import grid_io
 from porepy.numerics.fv import fvutils
 from porepy.utils import error, grid_utils
 from porepy.utils.tangential_normal_projection import TangentialNormalProjection
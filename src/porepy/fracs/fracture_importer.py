@@ -322,7 +322,14 @@ def dfm_from_gmsh(file_name, dim, network=None, **kwargs):
         gmsh_opts = kwargs.get("gmsh_opts", {})
         gmsh_verbose = kwargs.get("gmsh_verbose", verbose)
         gmsh_opts["-v"] = gmsh_verbose
-        gmsh_status = gmsh_interface.run_gmsh(in_file, out_file, dims=dim, **gmsh_opts)
+        gmsh_status = gmsh_interface.run_gmsh(
+            in_file,
+            out_file,
+            dims=dim,
+            timeout=kwargs.get("gmsh_timeout", None),
+            raise_on_error=True,
+            **gmsh_opts
+        )
         if verbose:
             print("Gmsh finished with status " + str(gmsh_status))
 
@@ -672,7 +672,15 @@ class FractureNetwork3d(object):
             f.set_index(0)
         self._fractures.append(f)
 
-    def mesh(self, mesh_args, subdomains=None, dfn=False, file_name=None, **kwargs):
+    def mesh(
+        self,
+        mesh_args,
+        subdomains=None,
+        dfn=False,
+        file_name=None,
+        cache=None,
+        **kwargs
+    ):
         """ Mesh the fracture network, and generate a mixed-dimensional grid.
 
         The mesh itself is generated by Gmsh.
@@ -690,11 +698,37 @@ class FractureNetwork3d(object):
             file_name (str, optional): Name of file used to communicate with gmsh.
                 defaults to gmsh_frac_file. The gmsh configuration file will be
                 file_name.geo, while the mesh is dumped to file_name.msh.
+            cache (pp.MeshCache, optional): If provided, the mesh is loaded from
+                the cache if the network and arguments are unchanged since the
+                mesh was stored. In this case, the network itself is not
+                processed (intersections etc. are not computed).
+            **kwargs: Passed on to the construction of the GridBucket. The
+                keyword gmsh_timeout sets a time limit (in seconds) for gmsh.
 
         Returns:
             GridBucket: Mixed-dimensional mesh.
 
-        """
+        Raises:
+            GmshError if gmsh failed or exceeded the time limit.
+
+        """
+        if cache is not None:
+            # The key is computed from the network before it is modified below.
+            return cache.mesh(
+                lambda: self.mesh(mesh_args, subdomains, dfn, file_name, **kwargs),
+                type(self).__name__,
+                [f.p for f in self._fractures],
+                [f.index for f in self._fractures],
+                self.domain,
+                self.tol,
+                self.bounding_box_imposed,
+                self.auxiliary_points_added,
+                mesh_args,
+                subdomains,
+                dfn,
+                kwargs,
+            )
+
         # The implementation in this function is fairly straightforward, all
         # technical difficulties are hidden in other functions.
         if not dfn and not self.bounding_box_imposed:
@@ -729,7 +763,13 @@ class FractureNetwork3d(object):
         # generate grid
         in_3d = not dfn
         self.to_gmsh(in_file, in_3d=in_3d)
-        gmsh_status = gmsh_interface.run_gmsh(in_file, out_file, dims=3)
+        gmsh_status = gmsh_interface.run_gmsh(
+            in_file,
+            out_file,
+            dims=3,
+            timeout=kwargs.get("gmsh_timeout", None),
+            raise_on_error=True,
+        )
         logger.info("Gmsh completed with status " + str(gmsh_status))
 
         if dfn:
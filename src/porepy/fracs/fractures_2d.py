@@ -149,21 +149,58 @@ class FractureNetwork2d(object):
 
         return FractureNetwork2d(p, e, domain, self.tol)
 
-    def mesh(self, mesh_args, tol=None, do_snap=True, constraints=None, **kwargs):
+    def mesh(
+        self, mesh_args, tol=None, do_snap=True, constraints=None, cache=None, **kwargs
+    ):
+        """ Mesh the fracture network, and generate a mixed-dimensional grid.
 
+        The mesh itself is generated by Gmsh.
+
+        Parameters:
+            mesh_args (dict): Arguments passed on to the mesh generation, see
+                pp.fracs.simplex.triangle_grid().
+            tol (double, optional): Geometric tolerance. Defaults to self.tol.
+            do_snap (boolean, optional): If True (default), points are snapped
+                before meshing.
+            constraints (optional): Lines that partition the domain into
+                subdomains.
+            cache (pp.MeshCache, optional): If provided, the mesh is loaded from
+                the cache if the network and arguments are unchanged since the
+                mesh was stored.
+            **kwargs: Passed on to the construction of the GridBucket.
+
+        Returns:
+            GridBucket: Mixed-dimensional mesh.
+
+        """
         if tol is None:
             tol = self.tol
 
-        p = self.pts
-        e = self.edges
-
-        if do_snap and p is not None and p.size > 0:
-            p, _ = pp.frac_utils.snap_fracture_set_2d(p, e, snap_tol=tol)
-        grid_list = pp.fracs.simplex.triangle_grid(
-            p, e[:2], self.domain, tol=tol, subdomains=constraints, **mesh_args
+        def create():
+            p = self.pts
+            e = self.edges
+
+            if do_snap and p is not None and p.size > 0:
+                p, _ = pp.frac_utils.snap_fracture_set_2d(p, e, snap_tol=tol)
+            grid_list = pp.fracs.simplex.triangle_grid(
+                p, e[:2], self.domain, tol=tol, subdomains=constraints, **mesh_args
+            )
+            return pp.meshing.grid_list_to_grid_bucket(grid_list, **kwargs)
+
+        if cache is None:
+            return create()
+        return cache.mesh(
+            create,
+            type(self).__name__,
+            self.pts,
+            self.edges,
+            self.domain,
+            tol,
+            do_snap,
+            constraints,
+            mesh_args,
+            kwargs,
         )
-        gb = pp.meshing.grid_list_to_grid_bucket(grid_list, **kwargs)
-        return gb
 
     def _decompose_domain(self, domain, nx, ny=None):
         x0 = domain["xmin"]
@@ -0,0 +1,121 @@
+"""
+The module contains the MeshCache class, which stores mixed-dimensional meshes
+on disk, so that fracture networks with an unchanged geometry need not be
+meshed again.
+
+The cache is keyed by a hash of the meshing input: the fracture geometry,
+domain, tolerances and mesh arguments. A typical usage is
+
+    cache = pp.MeshCache("mesh_cache")
+    gb = network.mesh(mesh_args, cache=cache)
+
+A second run with the same network and arguments will then load the GridBucket
+from the folder, instead of calling gmsh.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+
+import porepy as pp
+from porepy.utils.hashing import hash_object, UnhashableError
+
+
+class MeshCache:
+    """ Persistent on-disk cache of mixed-dimensional meshes.
+
+    Each mesh is stored by pp.grid_io, in a subfolder named by the hash of the
+    meshing input. Pickled objects are neither stored nor loaded, thus meshes
+    in a shared folder cannot execute code on loading. If the input contains
+    objects that cannot be hashed (say, functions), the mesh is created without
+    the cache; similarly, a mesh with data that has no array representation is
+    not stored.
+
+    Attributes:
+        folder (str): Location of the stored meshes.
+        num_hits (int): Number of meshes loaded from the cache.
+        num_misses (int): Number of meshes that were created.
+
+    """
+
+    def __init__(self, folder):
+        """
+        Parameters:
+            folder (str): Folder used for storage. Created if it does not exist.
+
+        """
+        self.folder = folder
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self.num_hits = 0
+        self.num_misses = 0
+
+    def __repr__(self):
+        s = "Mesh cache in folder " + self.folder + "\n"
+        s += str(self.num_hits) + " hits, " + str(self.num_misses) + " misses\n"
+        return s
+
+    def key(self, *args):
+        """ Compute the hash identifying a mesh.
+
+        Parameters:
+            *args: Meshing input. Numpy arrays, numbers, strings, and lists and
+                dictionaries of these.
+
+        Returns:
+            str: Hexadecimal hash of the input. None if the input cannot be
+                hashed.
+
+        """
+        h = hashlib.sha1()
+        try:
+            hash_object(h, list(args))
+        except UnhashableError:
+            return None
+        return h.hexdigest()
+
+    def mesh(self, create, *args):
+        """ Create a mesh, or load it from the cache.
+
+        Parameters:
+            create (callable): Function without arguments that creates the
+                mesh. Called on a cache miss.
+            *args: Meshing input, used to compute the key, see key().
+
+        Returns:
+            GridBucket: The mesh.
+
+        """
+        key = self.key(*args)
+        if key is None:
+            return create()
+
+        mesh_folder = os.path.join(self.folder, key)
+        if os.path.exists(mesh_folder):
+            gb = pp.grid_io.load(mesh_folder, mmap_mode=None, allow_pickle=False)
+            self.num_hits += 1
+            return gb
+
+        gb = create()
+        self.num_misses += 1
+
+        # Write to a temporary folder, and move it into place, so that
+        # concurrent runs never see a partially written mesh.
+        tmp_folder = tempfile.mkdtemp(dir=self.folder)
+        try:
+            pp.grid_io.save(gb, tmp_folder, compress=True, allow_pickle=False)
+            os.replace(tmp_folder, mesh_folder)
+        except (ValueError, OSError):
+            # The mesh cannot be stored without pickle, or another run has
+            # stored the same mesh in the meantime.
+            shutil.rmtree(tmp_folder, ignore_errors=True)
+        return gb
+
+    def clear(self):
+        """ Delete all stored meshes in the cache folder.
+        """
+        for f in os.listdir(self.folder):
+            path = os.path.join(self.folder, f)
+            if os.path.isfile(os.path.join(path, "manifest.json")):
+                shutil.rmtree(path)
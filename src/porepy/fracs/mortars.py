@@ -319,22 +319,19 @@ def match_grids_2d(new_g, old_g, tol):
     if not (np.allclose(n, n_old) or np.allclose(n, -n_old)):
         raise ValueError("The new and old grid must lie in the same plane")
 
-    # Calculate intersection
+    # Calculate intersection. The common areas are returned as a sparse matrix,
+    # with rows and columns corresponding to cells in the new and old grid.
     isect = pp.intersections.triangulations(
-        proj_pts(new_g.nodes, cc, n), proj_pts(old_g.nodes, cc, n), cn_new_g, cn_old_g
-    )
-
-    num = len(isect)
-    new_g_ind = np.zeros(num, dtype=np.int)
-    old_g_ind = np.zeros(num, dtype=np.int)
-    weights = np.zeros(num)
-
-    for ind, i in enumerate(isect):
-        new_g_ind[ind] = i[0]
-        old_g_ind[ind] = i[1]
-        weights[ind] = i[2]
-
-    weights /= old_g.cell_volumes[old_g_ind]
+        proj_pts(new_g.nodes, cc, n),
+        proj_pts(old_g.nodes, cc, n),
+        cn_new_g,
+        cn_old_g,
+        return_matrix=True,
+    ).tocoo()
+
+    new_g_ind = isect.row.astype(np.int)
+    old_g_ind = isect.col.astype(np.int)
+    weights = isect.data / old_g.cell_volumes[old_g_ind]
     return weights, new_g_ind, old_g_ind
 
 
@@ -339,7 +339,11 @@ def update_nodes(
         g.num_nodes - num_delete_nodes + this_in_combined[node_map_1d_2d]
     )
 
-    g.face_nodes.indices = node_adjustment[g.face_nodes.indices]
+    # Assign a new face-node matrix, so that derived connectivity of the grid is
+    # recomputed.
+    face_nodes = g.face_nodes.copy()
+    face_nodes.indices = node_adjustment[face_nodes.indices]
+    g.face_nodes = face_nodes
 
     # Update node coordinates and global indices for 2d mesh
     g.nodes = np.hstack((g.nodes, new_grid_1d.nodes))
@@ -2,9 +2,7 @@
 Module for creating simplex grids with fractures.
 """
 import time
-import sys
 import numpy as np
-import meshio
 import logging
 
 import porepy as pp
@@ -49,20 +47,7 @@ def triangle_grid_embedded(network, f_name, **kwargs):
 
     out_file = _run_gmsh(f_name, in_3d=False, **kwargs)
 
-    # The interface of meshio changed between versions 1 and 2. We make no
-    # assumption on which version is installed here.
-    if int(meshio.__version__[0]) < 2:
-        pts, cells, _, cell_info, phys_names = meshio.gmsh_io.read(out_file)
-        # Invert phys_names dictionary to map from physical tags to corresponding
-        # physical names
-        phys_names = {v[0]: k for k, v in phys_names.items()}
-    else:
-        mesh = meshio.read(out_file)
-
-        pts = mesh.points
-        cells = mesh.cells
-        cell_info = mesh.cell_data
-        phys_names = {v[0]: k for k, v in mesh.field_data.items()}
+    pts, cells, cell_info, phys_names = gmsh_interface.read_gmsh(out_file)
 
     g_2d = mesh_2_grid.create_2d_grids(
         pts,
@@ -109,14 +94,17 @@ def _run_gmsh(file_name, **kwargs):
     gmsh_opts = kwargs.get("gmsh_opts", {})
     gmsh_verbose = kwargs.get("gmsh_verbose", verbose)
     gmsh_opts["-v"] = gmsh_verbose
-    gmsh_status = gmsh_interface.run_gmsh(in_file, out_file, dims=3, **gmsh_opts)
+    gmsh_interface.run_gmsh(
+        in_file,
+        out_file,
+        dims=3,
+        timeout=kwargs.get("gmsh_timeout", None),
+        raise_on_error=True,
+        **gmsh_opts
+    )
 
     if verbose > 0:
-        if gmsh_status == 0:
-            logger.info("Gmsh processed file successfully")
-        else:
-            logger.error("Gmsh failed with status " + str(gmsh_status))
-            sys.exit()
+        logger.info("Gmsh processed file successfully")
     return out_file
 
 
@@ -282,20 +270,7 @@ def triangle_grid_from_gmsh(file_name, **kwargs):
         file_name = file_name[:-4]
     out_file = file_name + ".msh"
 
-    # The interface of meshio changed between versions 1 and 2. We make no
-    # assumption on which version is installed here.
-    if int(meshio.__version__[0]) < 2:
-        pts, cells, _, cell_info, phys_names = meshio.gmsh_io.read(out_file)
-        # Invert phys_names dictionary to map from physical tags to corresponding
-        # physical names
-        phys_names = {v[0]: k for k, v in phys_names.items()}
-    else:
-        mesh = meshio.read(out_file)
-
-        pts = mesh.points
-        cells = mesh.cells
-        cell_info = mesh.cell_data
-        phys_names = {v[0]: k for k, v in mesh.field_data.items()}
+    pts, cells, cell_info, phys_names = gmsh_interface.read_gmsh(out_file)
 
     # Constants used in the gmsh.geo-file
     const = constants.GmshConstants()
@@ -348,20 +323,7 @@ def tetrahedral_grid_from_gmsh(network, file_name, **kwargs):
         file_name = file_name[:-4]
     file_name = file_name + ".msh"
 
-    # The interface of meshio changed between versions 1 and 2. We make no
-    # assumption on which version is installed here.
-    if int(meshio.__version__[0]) < 2:
-        pts, cells, _, cell_info, phys_names = meshio.gmsh_io.read(file_name)
-        # Invert phys_names dictionary to map from physical tags to corresponding
-        # physical names
-        phys_names = {v[0]: k for k, v in phys_names.items()}
-    else:
-        mesh = meshio.read(file_name)
-
-        pts = mesh.points
-        cells = mesh.cells
-        cell_info = mesh.cell_data
-        phys_names = {v[0]: k for k, v in mesh.field_data.items()}
+    pts, cells, cell_info, phys_names = gmsh_interface.read_gmsh(file_name)
 
     # Call upon helper functions to create grids in various dimensions.
     # The constructors require somewhat different information, reflecting the
@@ -93,6 +93,8 @@ def split_fractures(bucket, **kwargs):
 
     [g.cell_faces.eliminate_zeros() for g, _ in bucket]
     [g.update_boundary_node_tag() for g, _ in bucket]
+    # The topology has been modified in place, clear derived connectivity
+    [g.invalidate_connectivity() for g, _ in bucket]
     return bucket
 
 
@@ -135,6 +137,8 @@ def split_faces(gh, face_cells):
             right = np.arange(gh.num_faces - face_id.size, gh.num_faces)
             gh.frac_pairs = np.hstack((gh.frac_pairs, np.vstack((left, right))))
 
+    # The cell-face map has been modified in place
+    gh.invalidate_connectivity()
     return face_cells
 
 
@@ -479,6 +483,7 @@ def duplicate_nodes(g, nodes, offset):
     # Transform back to csc format and fix node ordering.
     g.face_nodes = g.face_nodes.tocsc()
     g.face_nodes.indices = g.face_nodes.indices[iv]  # For fast row operation
+    g.invalidate_connectivity()
 
     return node_count
 
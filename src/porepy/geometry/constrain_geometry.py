@@ -427,6 +427,39 @@ def snap_points_to_segments(p_edges, edges, tol, p_to_snap=None):
     pn = p_to_snap.copy()
 
     nl = edges.shape[1]
+    if nl == 0:
+        return pn
+
+    # Spatial pre-filter: Only points within the bounding box of a segment,
+    # extended by the tolerance, can be snapped to the segment. Identify the
+    # candidates by a sweep over the boxes of the segments and the points.
+    # The boxes are slightly enlarged to be on the safe side.
+    margin = 1.01 * tol
+    p_start = p_edges[:, edges[0]]
+    p_end = p_edges[:, edges[1]]
+    box_min = np.hstack((np.minimum(p_start, p_end) - margin, p_to_snap))
+    box_max = np.hstack((np.maximum(p_start, p_end) + margin, p_to_snap))
+    pairs = pp.intersections._identify_overlapping_boxes(box_min, box_max)
+    # Keep pairs of segments and points; by the sorting of the pairs, the
+    # segments are in the first row.
+    pairs = pairs[:, np.logical_and(pairs[0] < nl, pairs[1] >= nl)]
+    candidates = pairs[1] - nl
+    # Pairs are sorted by segment, then point.
+    offsets = np.searchsorted(pairs[0], np.arange(nl + 1))
+
+    def in_box(ind, p_start, p_end):
+        # Points among ind that are within the extended box of a segment
+        p = pn[:, ind]
+        inside = np.logical_and(
+            np.all(p >= np.minimum(p_start, p_end) - margin, axis=0),
+            np.all(p <= np.maximum(p_start, p_end) + margin, axis=0),
+        )
+        return ind[inside]
+
+    # The candidates are identified from the original coordinates. Points that
+    # have been moved by the snapping are checked separately.
+    moved = np.zeros(pn.shape[1], dtype=np.bool)
+
     for ei in range(nl):
 
         # Find start and endpoint of this segment.
@@ -439,10 +472,24 @@ def snap_points_to_segments(p_edges, edges, tol, p_to_snap=None):
         else:
             p_start = p_edges[:, edges[0, ei]].reshape((-1, 1))
             p_end = p_edges[:, edges[1, ei]].reshape((-1, 1))
-        d_segment, cp = pp.distances.points_segments(pn, p_start, p_end)
+
+        if mod_edges and (moved[edges[0, ei]] or moved[edges[1, ei]]):
+            # The segment itself has been moved, check all points
+            ind = in_box(np.arange(pn.shape[1]), p_start, p_end)
+        else:
+            ind = np.union1d(
+                candidates[offsets[ei] : offsets[ei + 1]],
+                in_box(np.where(moved)[0], p_start, p_end),
+            )
+        if ind.size == 0:
+            continue
+
+        d_segment, cp = pp.distances.points_segments(pn[:, ind], p_start, p_end)
         hit = np.argwhere(d_segment[:, 0] < tol)
-        for i in hit:
+        for loc_i in hit:
+            i = ind[loc_i]
             if mod_edges and (i == edges[0, ei] or i == edges[1, ei]):
                 continue
-            pn[:, i] = cp[i, 0, :].reshape((-1, 1))
+            pn[:, i] = cp[loc_i, 0, :].reshape((-1, 1))
+            moved[i] = True
     return pn
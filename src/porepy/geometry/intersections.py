@@ -6,19 +6,14 @@ Module with functions for computing intersections between geometric objects.
 import numpy as np
 import logging
 
-import shapely.geometry as shapely_geometry
-import shapely.speedups as shapely_speedups
+import scipy.sparse as sps
 
 import porepy as pp
+from porepy.utils import mcolon
 
 # Module level logger
 logger = logging.getLogger(__name__)
 
-try:
-    shapely_speedups.enable()
-except AttributeError:
-    pass
-
 
 def segments_2d(start_1, end_1, start_2, end_2, tol=1e-8):
     """
@@ -401,14 +396,22 @@ def polygons_3d(polys, tol=1e-8):
     # Obtain bounding boxes for the polygons
     x_min, x_max, y_min, y_max, z_min, z_max = _axis_aligned_bounding_box_3d(polys)
 
-    # Identify overlapping bounding boxes: First, use a fast method to find
-    # overlapping rectangles in the xy-plane.
-    pairs_xy = _identify_overlapping_rectangles(x_min, x_max, y_min, y_max)
-    # Next, find overlapping intervals in the z-directien
-    pairs_z = _identify_overlapping_intervals(z_min, z_max)
+    # Identify overlapping bounding boxes
+    pairs = _identify_overlapping_boxes(
+        np.vstack((x_min, y_min, z_min)), np.vstack((x_max, y_max, z_max))
+    )
+
+    # Normal vectors of the polygons, used in the filtering of the candidate pairs
+    # below, and in the computation of the intersections.
+    # Only polygons that are part of a candidate pair are considered.
+    normals = np.zeros((3, len(polys)))
+    for pi in np.unique(pairs).astype(np.int):
+        normals[:, pi] = pp.map_geometry.compute_normal(polys[pi])
 
-    # Finally, do the intersection
-    pairs = _intersect_pairs(pairs_xy, pairs_z)
+    # Remove pairs where one polygon lies on one side of the plane of the other
+    # polygon. This is the first test in the loop over pairs below, done here
+    # for all pairs at once.
+    pairs = pairs[:, np.logical_not(_separated_by_plane(polys, normals, pairs))]
 
     # Various utility functions
     def center(p):
@@ -509,7 +512,7 @@ def polygons_3d(polys, tol=1e-8):
 
         # Center point and normal vector of the main fracture
         main_center = center(polys[main])
-        main_normal = pp.map_geometry.compute_normal(polys[main]).reshape((-1, 1))
+        main_normal = normals[:, main].reshape((-1, 1))
 
         # Create an expanded version of the main points, so that the start
         # and end points are the same. Thus the segments can be formed by
@@ -526,7 +529,7 @@ def polygons_3d(polys, tol=1e-8):
             other_p_expanded = polys[o][:, ind_other_cyclic]
 
             # Normal vector and cetner of the other polygon
-            other_normal = pp.map_geometry.compute_normal(polys[o]).reshape((-1, 1))
+            other_normal = normals[:, o].reshape((-1, 1))
             other_center = center(polys[o])
 
             # Point a vector from the main center to the vertexes of the
@@ -1050,17 +1053,17 @@ def polygons_3d(polys, tol=1e-8):
     return new_pt, isect_pt, is_bound_isect, polygon_pairs, segment_vertex_intersection
 
 
-def triangulations(p_1, p_2, t_1, t_2):
+def triangulations(p_1, p_2, t_1, t_2, tol=1e-10, return_matrix=False):
     """ Compute intersection of two triangle tessalation of a surface.
 
     The function will identify partly overlapping triangles between t_1 and
     t_2, and compute their common area. If parts of domain 1 or 2 is covered by
     one tessalation only, this will simply be ignored by the function.
 
-    Implementation note: The function relies on the intersection algorithm in
-    shapely.geometry.Polygon. It may be possible to extend the functionality
-    to other cell shapes. This would require more general data structures, but
-    should not be too much of an effort.
+    Implementation note: Candidate pairs of triangles are found by a search for
+    overlapping bounding boxes. The common area of all candidate pairs is then
+    computed at once by clipping the triangles of the first tessalation with
+    those of the second (Sutherland-Hodgman's algorithm).
 
     Parameters:
         p_1 (np.array, 2 x n_p1): Points in first tessalation.
@@ -1069,71 +1072,158 @@ def triangulations(p_1, p_2, t_1, t_2):
             to indices in p_1.
         t_2 (np.array, 3 x n_tri_1): Triangles in second tessalation, referring
             to indices in p_2.
+        tol (double, optional): Overlaps with an area less than tol times the
+            area of the smallest of the two triangles are considered caused by
+            rounding errors (e.g. triangles sharing an edge), and are ignored.
+            Defaults to 1e-10.
+        return_matrix (boolean, optional): If True, the overlaps are returned
+            as a sparse matrix. Defaults to False.
 
     Returns:
         list of tuples: Each representing an overlap. The tuple contains index
             of the overlapping triangles in the first and second tessalation,
-            and their common area.
+            and their common area. The list is sorted on the index of the first,
+            then the second tessalation.
+        sps.csr_matrix, n_tri_1 x n_tri_2: Only if return_matrix is True, in
+            which case it replaces the list. Common area of the triangles of the
+            first and second tessalation.
 
     """
     n_1 = t_1.shape[1]
     n_2 = t_2.shape[1]
-    t_1 = t_1.T
-    t_2 = t_2.T
 
-    # Find x and y coordinates of the triangles of first tessalation
-    x_1 = p_1[0, t_1]
-    y_1 = p_1[1, t_1]
-    # Same with second tessalation
-    x_2 = p_2[0, t_2]
-    y_2 = p_2[1, t_2]
+    # Coordinates of the triangles, with dimensions n_tri x 3 x 2
+    tri_1 = np.transpose(p_1[:2, t_1], (2, 1, 0)).astype(np.float)
+    tri_2 = np.transpose(p_2[:2, t_2], (2, 1, 0)).astype(np.float)
 
-    intersections = []
+    # Find candidates for overlap from the bounding boxes of the triangles. The
+    # boxes of the two tessalations are searched together, pairs within one of
+    # the tessalations are filtered away afterwards.
+    min_coord = np.hstack((tri_1.min(axis=1).T, tri_2.min(axis=1).T))
+    max_coord = np.hstack((tri_1.max(axis=1).T, tri_2.max(axis=1).T))
+    pairs = _identify_overlapping_boxes(min_coord, max_coord)
+    pairs = pairs[:, np.logical_and(pairs[0] < n_1, pairs[1] >= n_1)]
+    ind_1 = pairs[0]
+    ind_2 = pairs[1] - n_1
 
-    # Bounding box of each triangle for first and second tessalation
-    min_x_1 = np.min(x_1, axis=1)
-    max_x_1 = np.max(x_1, axis=1)
-    min_y_1 = np.min(y_1, axis=1)
-    max_y_1 = np.max(y_1, axis=1)
-
-    min_x_2 = np.min(x_2, axis=1)
-    max_x_2 = np.max(x_2, axis=1)
-    min_y_2 = np.min(y_2, axis=1)
-    max_y_2 = np.max(y_2, axis=1)
-
-    # Represent the second tessalation using a Polygon from the shapely package
-    poly_2 = [
-        shapely_geometry.Polygon(
-            [(x_2[j, 0], y_2[j, 0]), (x_2[j, 1], y_2[j, 1]), (x_2[j, 2], y_2[j, 2])]
-        )
-        for j in range(n_2)
-    ]
-
-    # Loop over all triangles in first tessalation, look for overlapping
-    # members in second tessalation
-    for i in range(n_1):
-        # Polygon representation of the first triangle.
-        poly_1 = shapely_geometry.Polygon(
-            [(x_1[i, 0], y_1[i, 0]), (x_1[i, 1], y_1[i, 1]), (x_1[i, 2], y_1[i, 2])]
+    # Compute the common area of the candidates
+    area = _triangle_overlap_area(tri_1[ind_1], tri_2[ind_2])
+
+    # Filter away overlaps caused by rounding errors
+    area_1 = np.abs(_polygon_area(tri_1, 3 * np.ones(n_1, dtype=np.int)))
+    area_2 = np.abs(_polygon_area(tri_2, 3 * np.ones(n_2, dtype=np.int)))
+    keep = area > tol * np.minimum(area_1[ind_1], area_2[ind_2])
+    ind_1 = ind_1[keep]
+    ind_2 = ind_2[keep]
+    area = area[keep]
+
+    if return_matrix:
+        return sps.csr_matrix((area, (ind_1, ind_2)), shape=(n_1, n_2))
+    return list(zip(ind_1, ind_2, area))
+
+
+def _triangle_overlap_area(tri_1, tri_2):
+    """ Compute the common area of pairs of triangles.
+
+    The area is computed by clipping the first triangle of each pair with the
+    half planes defined by the edges of the second triangle, using
+    Sutherland-Hodgman's algorithm. All pairs are treated at once.
+
+    Parameters:
+        tri_1 (np.array, num_pairs x 3 x 2): Coordinates of the first triangles.
+        tri_2 (np.array, num_pairs x 3 x 2): Coordinates of the second triangles.
+
+    Returns:
+        np.array, num_pairs: Common area of the pairs of triangles.
+
+    """
+    num_pairs = tri_1.shape[0]
+    rows = np.arange(num_pairs)
+
+    # Orient the clipping triangles counter-clockwise, so that the interior is to
+    # the left of all edges.
+    tri_2 = tri_2.copy()
+    clockwise = _polygon_area(tri_2, 3 * np.ones(num_pairs, dtype=np.int)) < 0
+    tri_2[clockwise] = tri_2[clockwise][:, ::-1]
+
+    # The clipped polygons. Clipping a convex polygon with a half plane adds at
+    # most one vertex, thus the clipped polygons have at most six vertices.
+    max_vertices = 6
+    poly = np.zeros((num_pairs, max_vertices, 2))
+    poly[:, :3] = tri_1
+    num_vertices = 3 * np.ones(num_pairs, dtype=np.int)
+
+    for edge in range(3):
+        start = tri_2[:, edge]
+        direction = tri_2[:, (edge + 1) % 3] - start
+
+        def distance(pt):
+            # Distance (up to scaling) from the edge, positive inside
+            return direction[:, 0] * (pt[:, 1] - start[:, 1]) - direction[:, 1] * (
+                pt[:, 0] - start[:, 0]
+            )
+
+        clipped = np.zeros_like(poly)
+        num_clipped = np.zeros(num_pairs, dtype=np.int)
+
+        # Loop over the edges of the polygons, which go from vertex i to vertex
+        # i + 1, with wrap-around at the last vertex of each polygon.
+        for i in range(max_vertices - 1):
+            active = i < num_vertices
+            if not np.any(active):
+                break
+            next_vertex = np.where(i + 1 < num_vertices, i + 1, 0)
+            pt_i = poly[:, i]
+            pt_next = poly[rows, next_vertex]
+            dist_i = distance(pt_i)
+            dist_next = distance(pt_next)
+            inside_i = dist_i >= 0
+            inside_next = dist_next >= 0
+
+            # Keep vertices inside the half plane
+            keep = np.logical_and(active, inside_i)
+            clipped[rows[keep], num_clipped[keep]] = pt_i[keep]
+            num_clipped[keep] += 1
+
+            # Add the crossing with the clipping edge
+            cross = np.logical_and(active, inside_i != inside_next)
+            t = dist_i[cross] / (dist_i[cross] - dist_next[cross])
+            clipped[rows[cross], num_clipped[cross]] = pt_i[cross] + t[
+                :, np.newaxis
+            ] * (pt_next[cross] - pt_i[cross])
+            num_clipped[cross] += 1
+
+        poly = clipped
+        num_vertices = num_clipped
+
+    return np.abs(_polygon_area(poly, num_vertices))
+
+
+def _polygon_area(poly, num_vertices):
+    """ Signed area of polygons, positive for counter-clockwise polygons.
+
+    Parameters:
+        poly (np.array, num_polygons x max_num_vertices x 2): Coordinates of the
+            polygon vertices.
+        num_vertices (np.array, num_polygons): Number of vertices of each polygon.
+            Polygons with less than three vertices have zero area.
+
+    Returns:
+        np.array, num_polygons: Signed area of the polygons.
+
+    """
+    num_polygons, max_vertices, _ = poly.shape
+    rows = np.arange(num_polygons)
+    area = np.zeros(num_polygons)
+    for i in range(max_vertices):
+        active = i < num_vertices
+        next_vertex = np.where(i + 1 < num_vertices, i + 1, 0)
+        pt_i = poly[:, i]
+        pt_next = poly[rows, next_vertex]
+        area += np.where(
+            active, pt_i[:, 0] * pt_next[:, 1] - pt_next[:, 0] * pt_i[:, 1], 0
         )
-        # Find triangles in the second tessalation that are outside the
-        # bounding box of this triangle.
-        right = np.squeeze(np.where(min_x_2 > max_x_1[i]))
-        left = np.squeeze(np.where(max_x_2 < min_x_1[i]))
-        above = np.squeeze(np.where(min_y_2 > max_y_1[i]))
-        below = np.squeeze(np.where(max_y_2 < min_y_1[i]))
-
-        # Candidates for intersection are only elements not outside
-        outside = np.unique(np.hstack((right, left, above, below)))
-        candidates = np.setdiff1d(np.arange(n_2), outside, assume_unique=True)
-
-        # Loop over remaining candidates, call upon shapely to find
-        # intersection
-        for j in candidates:
-            isect = poly_1.intersection(poly_2[j])
-            if isinstance(isect, shapely_geometry.Polygon):
-                intersections.append((i, j, isect.area))
-    return intersections
+    return 0.5 * area
 
 
 def line_tesselation(p1, p2, l1, l2):
@@ -1209,193 +1299,241 @@ def split_intersecting_segments_2d(p, e, tol=1e-4):
     """
     # Find the bounding box
     x_min, x_max, y_min, y_max = _axis_aligned_bounding_box_2d(p, e)
-    # Identify fractures with overlapping bounding boxes
+    # Identify fractures with overlapping bounding boxes. The pairs are sorted
+    # lexicographically, with the lowest index in the first row.
     pairs = _identify_overlapping_rectangles(x_min, x_max, y_min, y_max)
 
-    # Identify all fractures that are the first (by index) of a potentially
-    # crossing pair. A better way to group the fractures may be feasible,
-    # but this has not been investigated.
-    start_inds = np.unique(pairs[0])
-
     num_lines = e.shape[1]
 
-    # Data structure for storage of intersection points. For each fracture,
-    # we have an array that will contain the index of the intersections.
-    isect_pt = np.empty(num_lines, dtype=np.object)
-    for i in range(isect_pt.size):
-        isect_pt[i] = np.empty(0, dtype=np.int)
-
-    # Array of new points, found in the intersection of old ones.
-    new_pts = []
-    # The new points will be appended to the old ones, thus their index
-    # must be adjusted.
-    new_ind = p.shape[1]
-
-    # Loop through all candidate pairs of intersecting fractures, check if
-    # they do intersect. If so, store the point, and for each crossing fracture
-    # take note of the index of the cross point.
-    for _, line_ind in enumerate(start_inds):
-        # First fracture in the candidate pair
-        main = line_ind
-        # Find all other fractures that is in a pair with the main as the first one.
-        hit = np.where(pairs[0] == main)
-        # Sort the other points; this makes debugging simpler if nothing else.
-        other = np.sort(pairs[1, hit][0])
-
-        # We will first do a coarse sorting, to rule out fractures that are clearly
-        # not intersecting, and then do a finer search for an intersection below.
-
-        # Utility function to pull out one or several points from an array based
-        # on index
-        def pt(p, ind):
-            a = p[:, ind]
-            if ind.size == 1:
-                return a.reshape((-1, 1))
-            else:
-                return a
-
-        # Obtain start and endpoint of the main and other fractures
-        start_main = pt(p, e[0, main])
-        end_main = pt(p, e[1, main])
-        start_other = pt(p, e[0, other])
-        end_other = pt(p, e[1, other])
-
-        # Utility function to normalize the fracture length
-        def normalize(v):
-            nrm = np.sqrt(np.sum(v ** 2, axis=0))
-
-            # If the norm of the vector is essentially zero, do not normalize the vector
-            hit = nrm < tol
-            nrm[hit] = 1
-            return v / nrm
-
-        def dist(a, b):
-            return np.sqrt(np.sum((a - b) ** 2))
-
-        # Vectors along the main fracture, and from the start of the main
-        # to the start and end of the other fractures. All normalized.
-        # If the other edges share start or endpoint with the main one, normalization
-        # of the distance vector will make the vector nans. In this case, we
-        # use another point along the other line, this works equally well for the
-        # coarse identification (based on cross products).
-        # If the segments are overlapping, there will still be issues with nans,
-        # but these are dealt with below.
-        main_vec = normalize(end_main - start_main)
-        if dist(start_other, start_main) > 1e-4:
-            main_other_start = normalize(start_other - start_main)
-        else:
-            main_other_start = normalize(0.5 * (start_other + end_other) - start_main)
-        if dist(end_other, start_main) > 1e-4:
-            main_other_end = normalize(end_other - start_main)
-        else:
-            # Values 0.3 and 0.7 are quite random here.
-            main_other_end = normalize(0.3 * start_other + 0.7 * end_other - start_main)
+    # Compute the intersections of all candidate pairs in one go.
+    # The first fracture in each pair is referred to as the main one.
+    pair_ind, isect = _intersect_segment_pairs_2d(
+        p[:, e[0, pairs[0]]],
+        p[:, e[1, pairs[0]]],
+        p[:, e[0, pairs[1]]],
+        p[:, e[1, pairs[1]]],
+        tol,
+    )
 
-        # Modified signum function: The value is 0 if it is very close to zero.
-        def mod_sign(v, tol):
-            sgn = np.sign(v)
-            sgn[np.abs(v) < tol] = 0
-            return sgn
+    # If we have found no intersection points, we can safely return the incoming
+    # points and edges.
+    if pair_ind.size == 0:
+        return p, e
 
-        # Take the cross product between the vector along the main line, and the
-        # vectors to the start and end of the other lines, respectively.
-        start_cross = mod_sign(
-            main_vec[0] * main_other_start[1] - main_vec[1] * main_other_start[0], tol
+    # If intersection points are found, the intersecting lines must be split into
+    # shorter segments.
+    num_new = pair_ind.size
+    new_ind = p.shape[1] + np.arange(num_new)
+
+    # The full set of points, both original and newly found intersection points
+    all_pt = np.hstack((p, isect))
+    # Remove duplicates in the point set.
+    # NOTE: The tolerance used here is a bit sensitive, if set too loose, this
+    # may merge non-intersecting fractures.
+    unique_all_pt, _, ib = pp.utils.setmembership.unique_columns_tol(all_pt, tol)
+    num_unique = unique_all_pt.shape[1]
+
+    # For each line, collect the points along it: The original endpoints, and
+    # the intersection points found for both lines in the pair. The points are
+    # mapped to the unique point set.
+    line_of_pt = np.hstack(
+        (np.arange(num_lines), np.arange(num_lines), pairs[:, pair_ind].ravel())
+    )
+    pt_on_line = ib[np.hstack((e[0], e[1], new_ind, new_ind))]
+
+    # Uniquify the points on each line
+    _, first = np.unique(line_of_pt * num_unique + pt_on_line, return_index=True)
+    line_of_pt = line_of_pt[first]
+    pt_on_line = pt_on_line[first]
+
+    # Measure the distance of the points from the start of their line, that
+    # is, the point of the original edge, e[0], which is known to be at an end
+    # of the edge. This is used to sort the points along each line.
+    loc_start = unique_all_pt[:, ib[e[0, line_of_pt]]]
+    dist = np.sum((unique_all_pt[:, pt_on_line] - loc_start) ** 2, axis=0)
+    order = np.lexsort((dist, line_of_pt))
+    line_of_pt = line_of_pt[order]
+    pt_on_line = pt_on_line[order]
+
+    # Consecutive points along the same line form the new segments. All new
+    # segments share the tags of the old one.
+    same_line = np.where(line_of_pt[:-1] == line_of_pt[1:])[0]
+    new_edge = np.vstack(
+        (
+            pt_on_line[same_line],
+            pt_on_line[same_line + 1],
+            e[2:, line_of_pt[same_line]],
         )
-        end_cross = mod_sign(
-            main_vec[0] * main_other_end[1] - main_vec[1] * main_other_end[0], tol
+    )
+
+    # Finally, uniquify edges. This operation is necessary for overlapping edges.
+    # Operate on sorted point indices per edge
+    new_edge[:2] = np.sort(new_edge[:2], axis=0)
+    # Uniquify.
+    _, edge_map, _ = pp.utils.setmembership.unique_columns_tol(
+        new_edge[:2].astype(np.int), tol
+    )
+    new_edge = new_edge[:, edge_map]
+
+    return unique_all_pt, new_edge.astype(np.int)
+
+
+def _intersect_segment_pairs_2d(start_1, end_1, start_2, end_2, tol=1e-4):
+    """ Compute the intersections of pairs of line segments in 2d.
+
+    This is a vectorized version of segments_2d, preceded by a coarse test
+    that rules out segments that clearly do not intersect. It is used by
+    split_intersecting_segments_2d to treat all candidate pairs at once.
+
+    Parameters:
+        start_1 (np.ndarray, 2 x num_pairs): Start points of the first
+            segment in each pair.
+        end_1 (np.ndarray, 2 x num_pairs): End points of the first segments.
+        start_2 (np.ndarray, 2 x num_pairs): Start points of the second
+            segment in each pair.
+        end_2 (np.ndarray, 2 x num_pairs): End points of the second segments.
+        tol (double, optional): Geometric tolerance. Defaults to 1e-4.
+
+    Returns:
+        np.ndarray (num_isect): Index of the pair of each intersection point.
+            Pairs that overlap along a segment are represented twice, with the
+            endpoints of the overlap, the first closest to start_1.
+        np.ndarray (2 x num_isect): Coordinates of the intersection points.
+
+    Raises:
+        ValueError if the start and endpoints of a line are the same.
+
+    """
+    start_1 = np.asarray(start_1, dtype=np.float).reshape((2, -1))
+    end_1 = np.asarray(end_1, dtype=np.float).reshape((2, -1))
+    start_2 = np.asarray(start_2, dtype=np.float).reshape((2, -1))
+    end_2 = np.asarray(end_2, dtype=np.float).reshape((2, -1))
+
+    def normalize(v):
+        nrm = np.sqrt(np.sum(v ** 2, axis=0))
+        # If the norm of the vector is essentially zero, do not normalize the vector
+        nrm[nrm < tol] = 1
+        return v / nrm
+
+    # Modified signum function: The value is 0 if it is very close to zero.
+    def mod_sign(v):
+        sgn = np.sign(v)
+        sgn[np.abs(v) < tol] = 0
+        return sgn
+
+    # Coarse test: If the start and endpoint of the second segment are clearly
+    # on the same side of the first one, these are not crossing.
+    # Vectors along the first segment, and from its start to the start and end
+    # of the second segment, all normalized. If the segments share start or
+    # endpoint, the distance vector is replaced by a vector to another point
+    # along the second segment, this works equally well for the test.
+    # Values 0.5, 0.3 and 0.7 are quite random here.
+    main_vec = normalize(end_1 - start_1)
+    to_start = start_2 - start_1
+    to_end = end_2 - start_1
+    close = np.sqrt(np.sum(to_start ** 2, axis=0)) <= 1e-4
+    to_start[:, close] = 0.5 * (start_2[:, close] + end_2[:, close]) - start_1[:, close]
+    close = np.sqrt(np.sum(to_end ** 2, axis=0)) <= 1e-4
+    to_end[:, close] = (
+        0.3 * start_2[:, close] + 0.7 * end_2[:, close] - start_1[:, close]
+    )
+    to_start = normalize(to_start)
+    to_end = normalize(to_end)
+
+    start_cross = mod_sign(main_vec[0] * to_start[1] - main_vec[1] * to_start[0])
+    end_cross = mod_sign(main_vec[0] * to_end[1] - main_vec[1] * to_end[0])
+    # For completely overlapping segments, the normalization may leave the
+    # vectors nan, then run the intersection finder.
+    relevant = np.where(
+        np.logical_or(
+            start_cross * end_cross < 1, np.any(np.isnan(to_start + to_end), axis=0)
         )
+    )[0]
 
-        # If the start and endpoint of the other fracture are clearly on the
-        # same side of the main one, these are not crossing.
-        # For completely ovrelapping edges, the normalization will leave the
-        # vectors nan. There may be better ways of dealing with this, but we simply
-        # run the intersection finder in this case.
-        relevant = np.where(
-            np.logical_or(
-                (start_cross * end_cross < 1),
-                np.any(np.isnan(main_other_start + main_other_end), axis=0),
-            )
-        )[0]
+    start_1 = start_1[:, relevant]
+    start_2 = start_2[:, relevant]
+    # Vectors along first and second line
+    d_1 = end_1[:, relevant] - start_1
+    d_2 = end_2[:, relevant] - start_2
+    length_1 = np.sqrt(np.sum(d_1 * d_1, axis=0))
+    length_2 = np.sqrt(np.sum(d_2 * d_2, axis=0))
+    # Vector between the start points
+    d_s = start_2 - start_1
 
-        # Loop over all relevant (possibly crossing) fractures, look closer
-        # for an intersection.
-        for ri in relevant:
-            ipt = segments_2d(
-                start_main, end_main, pt(start_other, ri), pt(end_other, ri), tol
+    # An intersection point is characterized by
+    #   start_1 + d_1 * t_1 = start_2 + d_2 * t_2
+    # Check for solvability of the system (e.g. parallel lines) by the
+    # determinant of the matrix, relative to the length of the segments.
+    discr = -d_1[0] * d_2[1] + d_1[1] * d_2[0]
+    parallel = np.abs(discr) < tol * length_1 * length_2
+
+    # Non-parallel segments: Solve the linear system using Cramer's rule. The
+    # intersection lies on both segments if both t_1 and t_2 are on the unit
+    # interval, allowing for some approximations.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_1 = (-d_s[0] * d_2[1] + d_s[1] * d_2[0]) / discr
+        t_2 = (d_1[0] * d_s[1] - d_1[1] * d_s[0]) / discr
+    crossing = np.where(
+        np.logical_and.reduce(
+            (
+                np.logical_not(parallel),
+                t_1 >= -tol,
+                t_1 <= 1 + tol,
+                t_2 >= -tol,
+                t_2 <= 1 + tol,
             )
-            # Add the intersection point, if any.
-            # If two intersection points are found, that is the edges are overlapping
-            # both points are added.
-            if ipt is not None:
-                num_isect = ipt.shape[1]
-                # Add indices of the new points to the main and other edge
-                isect_pt[main] = np.append(
-                    isect_pt[main], new_ind + np.arange(num_isect)
-                )
-                isect_pt[other[ri]] = np.append(
-                    isect_pt[other[ri]], new_ind + np.arange(num_isect)
-                )
-                new_ind += num_isect
-
-                # Add the one or two intertion points
-                if num_isect == 1:
-                    new_pts.append(ipt.squeeze())
-                else:
-                    # It turned out the transport was needed to get the code to work
-                    new_pts.append(ipt.squeeze().T)
+        )
+    )[0]
 
-    # If we have found no intersection points, we can safely return the incoming
-    # points and edges.
-    if len(new_pts) == 0:
-        return p, e
-    # If intersection points are found, the intersecting lines must be split into
-    # shorter segments.
-    else:
-        # The full set of points, both original and newly found intersection points
-        all_pt = np.hstack((p, np.vstack([i for i in new_pts]).T))
-        # Remove duplicates in the point set.
-        # NOTE: The tolerance used here is a bit sensitive, if set too loose, this
-        # may merge non-intersecting fractures.
-        unique_all_pt, _, ib = pp.utils.setmembership.unique_columns_tol(all_pt, tol)
-        # Data structure for storing the split edges.
-        new_edge = np.empty((e.shape[0], 0))
-
-        # Loop over all lines, split it into non-overlapping segments.
-        for ei in range(num_lines):
-            # Find indices of all points involved in this fracture.
-            # Map them to the unique point set, and uniquify
-            inds = np.unique(ib[np.hstack((e[:2, ei], isect_pt[ei]))])
-            num_branches = inds.size - 1
-            # Get the coordinates themselves.
-            loc_pts = pt(unique_all_pt, inds)
-            # Specifically get the start point: Pick one of the points of the
-            # original edge, e[0, ei], which is known to be at an end of the edge.
-            # map to the unique indices
-            loc_start = pt(unique_all_pt, ib[e[0, ei]])
-            # Measure the distance of the points from the start. This can be used
-            # to sort the points along the line
-            dist = np.sum((loc_pts - loc_start) ** 2, axis=0)
-            order = np.argsort(dist)
-            new_inds = inds[order]
-            # All new segments share the tags of the old one.
-            loc_tags = e[2:, ei].reshape((-1, 1)) * np.ones(num_branches)
-            # Define the new segments, in terms of the unique points
-            loc_edge = np.vstack((new_inds[:-1], new_inds[1:], loc_tags))
-
-            # Add to the global list of segments
-            new_edge = np.hstack((new_edge, loc_edge))
-
-        # Finally, uniquify edges. This operation is necessary for overlapping edges.
-        # Operate on sorted point indices per edge
-        new_edge[:2] = np.sort(new_edge[:2], axis=0)
-        # Uniquify.
-        _, edge_map, _ = pp.utils.setmembership.unique_columns_tol(
-            new_edge[:2].astype(np.int), tol
+    # Parallel segments only intersect if they are also colinear
+    start_cross_line = d_s[0] * d_1[1] - d_s[1] * d_1[0]
+    colinear = np.where(
+        np.logical_and(
+            parallel, np.abs(start_cross_line) < tol * np.maximum(length_1, length_2),
         )
-        new_edge = new_edge[:, edge_map]
+    )[0]
+
+    # Write the first segment on the form start_1 + t * d_1, find the parameter
+    # values needed for equality with start_2 and end_2. Use the coordinate
+    # axis along which the first segment is not degenerate.
+    d_1_col = d_1[:, colinear]
+    use_x = np.abs(d_1_col[0]) > tol * length_1[colinear]
+    use_y = np.logical_and(
+        np.logical_not(use_x), np.abs(d_1_col[1]) > tol * length_2[colinear]
+    )
+    if np.any(np.logical_not(np.logical_or(use_x, use_y))):
+        logger.error("Found what must be a point-edge")
+        raise ValueError("Start and endpoint of line should be different")
+    axis = np.where(use_x, 0, 1)
+    col_ind = np.arange(colinear.size)
+    denom = d_1_col[axis, col_ind]
+    t_start_2 = d_s[axis, colinear] / denom
+    t_end_2 = (d_s + d_2)[axis, colinear] / denom
+
+    # Find the parameter values of the overlap, if any
+    overlap = np.logical_not(
+        np.logical_or(
+            np.logical_and(t_start_2 < 0, t_end_2 < 0),
+            np.logical_and(t_start_2 > 1, t_end_2 > 1),
+        )
+    )
+    t_min = np.maximum(np.minimum(t_start_2, t_end_2), 0)[overlap]
+    t_max = np.minimum(np.maximum(t_start_2, t_end_2), 1)[overlap]
+    colinear = colinear[overlap]
+    # If the overlap is very short, the segments share a single point
+    segment = t_max - t_min >= tol
 
-        return unique_all_pt, new_edge.astype(np.int)
+    # Collect the intersections. Pairs that overlap along a segment
+    # contribute both endpoints of the overlap.
+    ind = np.hstack((crossing, colinear, colinear[segment]))
+    t = np.hstack((t_1[crossing], t_min, t_max[segment]))
+    # Sort by the pair, and for overlapping segments, the start point first
+    order = np.argsort(ind, kind="stable")
+    ind = ind[order]
+    t = t[order]
+    isect = start_1[:, ind] + d_1[:, ind] * t
+
+    return relevant[ind], isect
 
 
 def _axis_aligned_bounding_box_2d(p, e):
@@ -1453,22 +1591,18 @@ def _axis_aligned_bounding_box_3d(polys):
 
     polys = list(polys)
 
-    num_poly = len(polys)
+    if len(polys) == 0:
+        return tuple(np.empty(0) for _ in range(6))
 
-    x_min = np.empty(num_poly)
-    x_max = np.empty_like(x_min)
-    y_min = np.empty_like(x_min)
-    y_max = np.empty_like(x_min)
-    z_min = np.empty_like(x_min)
-    z_max = np.empty_like(x_min)
+    # Treat all polygons at once, by a reduction over the segments of the
+    # concatenated vertexes
+    pts = np.hstack(polys)
+    offsets = np.hstack((0, np.cumsum([p.shape[1] for p in polys])[:-1]))
+    p_min = np.minimum.reduceat(pts, offsets, axis=1)
+    p_max = np.maximum.reduceat(pts, offsets, axis=1)
 
-    for ind, p in enumerate(polys):
-        x_min[ind] = np.min(p[0])
-        x_max[ind] = np.max(p[0])
-        y_min[ind] = np.min(p[1])
-        y_max[ind] = np.max(p[1])
-        z_min[ind] = np.min(p[2])
-        z_max[ind] = np.max(p[2])
+    x_min, y_min, z_min = p_min
+    x_max, y_max, z_max = p_max
 
     return x_min, x_max, y_min, y_max, z_min, z_max
 
@@ -1489,62 +1623,9 @@ def _identify_overlapping_intervals(left, right):
             are sorted so that the lowest index is in the first column.
 
     """
-    # There can be no overlaps if there is less than two intervals
-    if left.size < 2:
-        return np.empty((2, 0))
-
-    # Sort the coordinates
-    sort_ind_left = np.argsort(left)
-    sort_ind_right = np.argsort(right)
-
-    # pointers to the next start and end point of an interval
-    next_right = 0
-    next_left = 0
-
-    # List of pairs we have found
-    pairs = []
-    # List of intervals we are currently in. All intervals will join and leave this set.
-    active = []
-
-    num_lines = left.size
-
-    # Loop through the line, add and remove intervals as we come across them.
-    while True:
-        # Check if the next start (left) point is before the next endpoint,
-        # But only if there are more left points available.
-        # Less or equal is critical here, or else cases where a point interval
-        # is combined with the start of another interval may not be discovered.
-        if (
-            next_left < num_lines
-            and left[sort_ind_left[next_left]] <= right[sort_ind_right[next_right]]
-        ):
-            # We have started a new interval. This will be paired with
-            # all active intervals
-            for a in active:
-                pairs.append([a, sort_ind_left[next_left]])
-            # Also join the new intervals to the active set.
-            active.append(sort_ind_left[next_left])
-            # Increase the index
-            next_left += 1
-        else:
-            # We have reached the end of the interval - remove it from the
-            # active ones.
-            active.remove(sort_ind_right[next_right])
-            next_right += 1
-            # Check if we have come to the end
-            if next_right == num_lines:
-                break
-
-    if len(pairs) == 0:
-        return np.empty((2, 0))
-    else:
-        pairs = np.asarray(pairs).T
-        # First sort the pairs themselves
-        pairs.sort(axis=0)
-        # Next, sort the columns so that the first row is non-decreasing
-        sort_ind = np.argsort(pairs[0])
-        pairs = pairs[:, sort_ind]
-        return pairs
+    return _identify_overlapping_boxes(
+        np.atleast_2d(left).astype(np.float), np.atleast_2d(right).astype(np.float)
+    )
 
 
 def _identify_overlapping_rectangles(xmin, xmax, ymin, ymax, tol=1e-8):
@@ -1569,68 +1650,141 @@ def _identify_overlapping_rectangles(xmin, xmax, ymin, ymax, tol=1e-8):
             are sorted so that the lowest index is in the first column.
 
     """
-    # There can be no overlaps if there is less than two rectangles
-    if xmin.size < 2:
-        return np.empty((2, 0))
+    return _identify_overlapping_boxes(np.vstack((xmin, ymin)), np.vstack((xmax, ymax)))
+
+
+def _identify_overlapping_boxes(min_coord, max_coord, max_candidates=int(1e6)):
+    """ Based on a set of minimum and maximum coordinates of axis-aligned boxes,
+    identify pairs of overlapping boxes.
+
+    The boxes are sorted along the first axis, so that the boxes overlapping
+    along that axis with a given box form a contiguous range of the sorted
+    boxes (a sweep and prune algorithm). The overlap in the other directions is
+    then checked for all candidates at once. The candidates are processed in
+    chunks, to limit the memory consumption.
+
+    Parameters:
+        min_coord (np.array, nd x num_boxes): Minimum coordinates of the boxes.
+        max_coord (np.array, nd x num_boxes): Maximum coordinates of the boxes.
+            For all items, min_coord <= max_coord (but equality is allowed).
+            Boxes that touch are considered overlapping.
+        max_candidates (int, optional): Maximum number of candidate pairs
+            processed at once.
 
-    # Sort the coordinates
-    sort_ind_min = np.argsort(xmin)
-    sort_ind_max = np.argsort(xmax)
+    Returns:
+        np.array, 2 x num_overlaps: Each column contains a pair of overlapping
+            boxes, refering to their placement in min_coord and max_coord. The
+            pairs are sorted so that the lowest index is in the first row, and
+            the columns are sorted according to the first, then the second row.
 
-    # pointers to the next start and end point of an interval
-    next_min = 0
-    next_max = 0
+    """
+    num_boxes = min_coord.shape[1]
+    # There can be no overlaps if there is less than two boxes
+    if num_boxes < 2:
+        return np.empty((2, 0), dtype=np.int)
+
+    # Sort the boxes along the first axis
+    sort_ind = np.argsort(min_coord[0], kind="stable")
+    sorted_min = min_coord[0, sort_ind]
+
+    # For each box in the sorted order, the candidates for overlap are the
+    # subsequent boxes that start before the end of this box.
+    first_cand = np.arange(1, num_boxes + 1)
+    end_cand = np.searchsorted(sorted_min, max_coord[0, sort_ind], side="right")
+    num_cand = np.maximum(end_cand - first_cand, 0)
+
+    # Split the boxes into chunks with a limited number of candidates
+    cum_cand = np.cumsum(num_cand)
+    breaks = np.searchsorted(
+        cum_cand, np.arange(max_candidates, cum_cand[-1], max_candidates)
+    )
+    breaks = np.unique(np.hstack((0, breaks + 1, num_boxes)).clip(max=num_boxes))
 
-    # List of pairs we have found
     pairs = []
-    # List of intervals we are currently in. All intervals will join and leave this set.
-    active = []
-
-    num_lines = xmax.size
-
-    # Pass along the x-axis, identify the start and end of rectangles as we go.
-    # The idea is then for each new interval to check which of the active intervals
-    # also have overlap along the y-axis. These will be identified as pairs.
-    while True:
-        # Check if the next start (xmin) point is before the next endpoint,
-        # but only if there are more left points available.
-        # Less or equal is critical here, or else cases where a point interval
-        # is combined with the start of another interval may not be discovered.
-        if (
-            next_min < num_lines
-            and xmin[sort_ind_min[next_min]] <= xmax[sort_ind_max[next_max]]
-        ):
-            # Find active rectangles where the y-interval is also overlapping
-            between = np.where(
+    for lo, hi in zip(breaks[:-1], breaks[1:]):
+        first = sort_ind[np.repeat(np.arange(lo, hi), num_cand[lo:hi])]
+        second = sort_ind[mcolon.mcolon(first_cand[lo:hi], end_cand[lo:hi])]
+
+        # Check for overlap along the remaining axes
+        overlap = np.ones(first.size, dtype=np.bool)
+        for dim in range(1, min_coord.shape[0]):
+            overlap = np.logical_and(
+                overlap,
                 np.logical_and(
-                    ymax[sort_ind_min[next_min]] >= ymin[active],
-                    ymin[sort_ind_min[next_min]] <= ymax[active],
-                )
-            )[0]
-            # For all identified overlaps, add the new pairs
-            for a in between:
-                pairs.append([active[a], sort_ind_min[next_min]])
-            # Add this to the active rectangles, and increase the index
-            active.append(sort_ind_min[next_min])
-            next_min += 1
-        else:
-            # We are leaving a rectangle.
-            active.remove(sort_ind_max[next_max])
-            next_max += 1
-            # Check if we have come to the end
-            if next_max == num_lines:
-                break
+                    min_coord[dim, first] <= max_coord[dim, second],
+                    min_coord[dim, second] <= max_coord[dim, first],
+                ),
+            )
+        pairs.append(np.vstack((first[overlap], second[overlap])))
 
-    if len(pairs) == 0:
-        return np.empty((2, 0))
-    else:
-        pairs = np.asarray(pairs).T
-        # First sort the pairs themselves
-        pairs.sort(axis=0)
-        # Next, sort the columns so that the first row is non-decreasing
-        sort_ind = np.argsort(pairs[0])
-        pairs = pairs[:, sort_ind]
-        return pairs
+    pairs = np.hstack(pairs)
+    if pairs.size == 0:
+        return np.empty((2, 0), dtype=np.int)
+
+    # First sort the pairs themselves, next sort the columns
+    pairs.sort(axis=0)
+    return pairs[:, np.lexsort((pairs[1], pairs[0]))]
+
+
+def _separated_by_plane(polys, normals, pairs, tol=1e-8, point_tol=1e-4):
+    """ For pairs of polygons, check if one of the polygons lies on one side of
+    the plane of the other polygon, so that the polygons cannot intersect.
+
+    The test is the same as in the loop over pairs in polygons_3d(), but done
+    for all pairs at once: Vectors from the first vertex of one polygon to the
+    vertexes of the other polygon are normalized, and the sign of their dot
+    product with the normal vector is computed. If the first vertex is close to
+    a vertex of the other polygon, the pair is not classified as separated.
+
+    Parameters:
+        polys (list of np.ndarray, 3 x n_pt): The polygons.
+        normals (np.ndarray, 3 x num_polys): Normal vectors of the polygons.
+        pairs (np.ndarray, 2 x num_pairs): Indices of polygon pairs.
+        tol (double, optional): Tolerance for the sign of the dot products.
+        point_tol (double, optional): Tolerance for coinciding vertexes.
+
+    Returns:
+        np.ndarray of boolean, size num_pairs: True if the polygons of a pair are
+            known not to intersect.
+
+    """
+    num_pairs = pairs.shape[1]
+    separated = np.zeros(num_pairs, dtype=np.bool)
+    if num_pairs == 0:
+        return separated
+
+    pts = np.hstack(polys)
+    num_pts = np.array([p.shape[1] for p in polys])
+    offsets = np.hstack((0, np.cumsum(num_pts)[:-1]))
+
+    def one_side(main, other):
+        # For each pair, the vertexes of the other polygon relative to the plane
+        # of the main polygon.
+        pair_ind = np.repeat(np.arange(main.size), num_pts[other])
+        vert = mcolon.mcolon(offsets[other], offsets[other] + num_pts[other])
+        vec = pts[:, vert] - pts[:, offsets[main[pair_ind]]]
+        dist = np.sqrt(np.sum(vec ** 2, axis=0))
+        # Segments of the vertexes for each pair
+        seg = np.hstack((0, np.cumsum(num_pts[other])[:-1]))
+        far = np.minimum.reduceat(dist, seg) > point_tol
+
+        vec = vec / np.sqrt(np.sum(vec ** 2, axis=0))
+        dot = np.sum(normals[:, main[pair_ind]] * vec, axis=0)
+        sgn = np.sign(dot)
+        sgn[np.abs(dot) < tol] = 0
+        all_pos = np.minimum.reduceat(sgn, seg) > 0
+        all_neg = np.maximum.reduceat(sgn, seg) < 0
+        return np.logical_and(far, np.logical_or(all_pos, all_neg))
+
+    # Process the pairs in chunks to limit the memory consumption
+    chunk = 100000
+    for lo in range(0, num_pairs, chunk):
+        main = pairs[0, lo : lo + chunk].astype(np.int)
+        other = pairs[1, lo : lo + chunk].astype(np.int)
+        separated[lo : lo + chunk] = np.logical_or(
+            one_side(main, other), one_side(other, main)
+        )
+    return separated
 
 
 def _intersect_pairs(p1, p2):
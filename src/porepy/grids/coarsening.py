@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import heapq
 import numpy as np
 import scipy.sparse as sps
 import scipy.stats as stats
@@ -8,7 +9,7 @@ import porepy as pp
 from porepy.grids import grid, grid_bucket
 
 
-from porepy.utils import matrix_compression, mcolon, accumarray, setmembership
+from porepy.utils import matrix_compression, mcolon, setmembership
 from porepy.utils import half_space, tags
 
 
@@ -515,113 +516,127 @@ def create_partition(A, seeds=None, **kwargs):
         return np.zeros(1)
     Nc = A.shape[0]
 
-    # For each node, which other nodes are strongly connected to it
-    ST = sps.lil_matrix((Nc, Nc), dtype=np.bool)
-
-    # In the first instance, all cells are strongly connected to each other
-    At = A.T
-
-    for i in np.arange(Nc):
-        loc = slice(At.indptr[i], At.indptr[i + 1])
-        ci, vals = At.indices[loc], At.data[loc]
-        neg = vals < 0.0
-        nvals = vals[neg]
-        nci = ci[neg]
-        minId = np.argmin(nvals)
-        ind = -nvals >= epsilon * np.abs(nvals[minId])
-        ST[nci[ind], i] = True
+    # The row (or column, if A is csc) of each matrix element. The transpose of
+    # A shares the arrays of A, and the loops below are formulated in terms of
+    # the matrix entries.
+    row_ind = np.repeat(np.arange(Nc), np.diff(A.indptr))
+
+    # For each node, which other nodes are strongly connected to it. An entry
+    # is strong if it is negative, and its magnitude is at least epsilon times
+    # the largest magnitude of the negative entries in the row.
+    neg = A.data < 0.0
+    min_val = np.zeros(Nc)
+    np.minimum.at(min_val, row_ind[neg], A.data[neg])
+    strong = np.logical_and(neg, -A.data >= epsilon * np.abs(min_val[row_ind]))
+    ST = sps.csr_matrix(
+        (np.ones(np.sum(strong), dtype=np.bool), (A.indices[strong], row_ind[strong])),
+        shape=(Nc, Nc),
+    )
 
-    # Temporary field, will store connections of depth 1
+    # Connections of increasing depth are found by products of the connection
+    # matrix
     for _ in np.arange(2, cdepth + 1):
-        STold = ST.copy()
-        for j in np.arange(Nc):
-            rowj = np.array(STold.rows[j])
-            if rowj.size == 0:
-                continue
-            row = np.hstack([STold.rows[r] for r in rowj])
-            ST[j, np.concatenate((rowj, row))] = True
-
-    del STold
+        ST = ST + ST * ST
 
     ST.setdiag(False)
-    lmbda = np.array([len(s) for s in ST.rows])
+    ST.eliminate_zeros()
+    ST.sort_indices()
+    lmbda = np.diff(ST.indptr)
 
     # Define coarse nodes
-    candidate = np.ones(Nc, dtype=np.bool)
-    is_fine = np.zeros(Nc, dtype=np.bool)
+    # cells that are not important for any other cells are on the fine scale.
+    is_fine = lmbda == 0
+    candidate = np.logical_not(is_fine)
     is_coarse = np.zeros(Nc, dtype=np.bool)
+    num_candidates = np.sum(candidate)
 
-    # cells that are not important for any other cells are on the fine scale.
-    for row_id, row in enumerate(ST.rows):
-        if not row:
-            is_fine[row_id] = True
-            candidate[row_id] = False
+    # The candidate with the largest lmbda (lowest index for ties) is found by
+    # a heap. Entries which are outdated, since lmbda has changed or the cell
+    # is no longer a candidate, are skipped when found on top of the heap.
+    heap = [(-lmbda[i], i) for i in np.where(candidate)[0]]
+    heapq.heapify(heap)
 
-    ST = ST.tocsr()
     it = 0
-    while np.any(candidate):
-        i = np.argmax(lmbda)
+    while num_candidates > 0:
+        neg_lmbda, i = heapq.heappop(heap)
+        if not candidate[i] or lmbda[i] != -neg_lmbda:
+            continue
+
         is_coarse[i] = True
         j = ST.indices[ST.indptr[i] : ST.indptr[i + 1]]
         jf = j[candidate[j]]
         is_fine[jf] = True
         candidate[np.r_[i, jf]] = False
-        loop = ST.indices[mcolon.mcolon(ST.indptr[jf], ST.indptr[jf + 1])]
-        for row in np.unique(loop):
-            s = ST.indices[ST.indptr[row] : ST.indptr[row + 1]]
-            lmbda[row] = s[candidate[s]].size + 2 * s[is_fine[s]].size
-        lmbda[np.logical_not(candidate)] = -1
+        num_candidates -= 1 + jf.size
+
+        # Update lmbda for the cells connected to the new fine cells
+        loop = np.unique(ST.indices[mcolon.mcolon(ST.indptr[jf], ST.indptr[jf + 1])])
+        loop = loop[candidate[loop]]
+        num_conn = ST.indptr[loop + 1] - ST.indptr[loop]
+        s = ST.indices[mcolon.mcolon(ST.indptr[loop], ST.indptr[loop + 1])]
+        weight = candidate[s] + 2 * is_fine[s]
+        lmbda[loop] = np.bincount(
+            np.repeat(np.arange(loop.size), num_conn),
+            weights=weight,
+            minlength=loop.size,
+        ).astype(lmbda.dtype)
+        for row in loop:
+            heapq.heappush(heap, (-lmbda[row], row))
         it = it + 1
 
         # Something went wrong during aggregation
         assert it <= Nc
 
-    del lmbda, ST
+    del lmbda, ST, heap
 
     if seeds is not None:
         is_coarse[seeds] = True
         is_fine[seeds] = False
 
-    # If two neighbors are coarse, eliminate one of them without touching the
-    # seeds
+    # Connections between cells, each cell is represented by a segment of the
+    # arrays c2c_rows, c2c_cols.
     c2c = np.abs(A) > 0
     c2c_rows, _, _ = sps.find(c2c)
+    c2c_cols = np.repeat(np.arange(Nc), np.diff(c2c.indptr))
+    not_diag = c2c_rows != c2c_cols
+    c2c_rows, c2c_cols = c2c_rows[not_diag], c2c_cols[not_diag]
 
-    pairs = np.empty((0, 2), dtype=np.int)
-    for idx, it in enumerate(np.where(is_coarse)[0]):
-        loc = slice(c2c.indptr[it], c2c.indptr[it + 1])
-        ind = np.setdiff1d(c2c_rows[loc], it)
-        cind = ind[is_coarse[ind]]
-        new_pair = np.stack((np.repeat(it, cind.size), cind), axis=-1)
-        pairs = np.append(pairs, new_pair, axis=0)
+    # If two neighbors are coarse, eliminate one of them without touching the
+    # seeds
+    is_pair = np.logical_and(is_coarse[c2c_cols], is_coarse[c2c_rows])
+    pairs = np.sort(np.vstack((c2c_cols[is_pair], c2c_rows[is_pair])), axis=0)
 
     # Remove one of the neighbors cells
     if pairs.size:
-        pairs = setmembership.unique_rows(np.sort(pairs, axis=1))[0]
-        for ij in pairs:
-            A_val = np.array(A[ij, ij]).ravel()
-            ids = ij[np.argsort(A_val)]
-            ids = np.setdiff1d(ids, seeds, assume_unique=True)
-            if ids.size:
-                is_coarse[ids[0]] = False
-                is_fine[ids[0]] = True
+        pairs = setmembership.unique_columns_tol(pairs)[0].astype(np.int)
+        # Remove the cell with the lowest diagonal value, the first one if equal
+        diag = A.diagonal()
+        swap = diag[pairs[1]] < diag[pairs[0]]
+        first = np.where(swap, pairs[1], pairs[0])
+        second = np.where(swap, pairs[0], pairs[1])
+        if seeds is not None:
+            first_seed = np.in1d(first, seeds)
+            second_seed = np.in1d(second, seeds)
+            remove = np.where(first_seed, second, first)
+            remove = remove[np.logical_not(np.logical_and(first_seed, second_seed))]
+        else:
+            remove = first
+        is_coarse[remove] = False
+        is_fine[remove] = True
 
     coarse = np.where(is_coarse)[0]
 
-    # Primal grid
     NC = coarse.size
-    primal = sps.lil_matrix((NC, Nc), dtype=np.bool)
-    primal[np.arange(NC), coarse[np.arange(NC)]] = True
 
-    connection = sps.lil_matrix((Nc, Nc), dtype=np.double)
-    for it in np.arange(Nc):
-        n = np.setdiff1d(c2c_rows[c2c.indptr[it] : c2c.indptr[it + 1]], it)
-        loc = slice(A.indptr[it], A.indptr[it + 1])
-        A_idx, A_row = A.indices[loc], A.data[loc]
-        mask = A_idx != it
-        connection[it, n] = np.abs(A_row[mask] / A_row[np.logical_not(mask)])
-
-    connection = connection.tocsr()
+    # Strength of the connections, relative to the diagonal of A
+    A_rows = np.repeat(np.arange(Nc), np.diff(A.indptr))
+    mask = A.indices != A_rows
+    diag = np.zeros(Nc)
+    diag[A_rows[np.logical_not(mask)]] = A.data[np.logical_not(mask)]
+    connection = sps.csr_matrix(
+        (np.abs(A.data[mask] / diag[A_rows[mask]]), (c2c_cols, c2c_rows)),
+        shape=(Nc, Nc),
+    )
 
     candidates_rep = np.ediff1d(connection.indptr)
     candidates_idx = np.repeat(is_coarse, candidates_rep)
@@ -636,50 +651,106 @@ def create_partition(A, seeds=None, **kwargs):
     connection_idx = mcolon.mcolon(
         connection.indptr[coarse], connection.indptr[coarse + 1]
     )
-    vals = sps.csr_matrix(
-        accumarray.accum(candidates, connection.data[connection_idx], size=[Nc, NC])
-    )
+    vals = sps.coo_matrix(
+        (connection.data[connection_idx], (candidates[:, 0], candidates[:, 1])),
+        shape=(Nc, NC),
+    ).tocsr()
+    vals.eliminate_zeros()
     del candidates_rep, candidates_idx, connection_idx
 
-    it = NC
-    not_found = np.logical_not(is_coarse)
-    # Process the strongest connection globally
-    while np.any(not_found):
-
-        np.argmax(vals.data)
-        vals.argmax(axis=0)
-        mcind = np.atleast_1d(np.squeeze(np.asarray(vals.argmax(axis=0))))
-        mcval = -np.inf * np.ones(mcind.size)
-        for c, r in enumerate(mcind):
-            loc = slice(vals.indptr[r], vals.indptr[r + 1])
-            vals_idx, vals_data = vals.indices[loc], vals.data[loc]
-            mask = vals_idx == c
-            if vals_idx.size == 0 or not np.any(mask):
-                continue
-            mcval[c] = vals_data[mask]
+    # The connection strengths are stored in CSR-like arrays, where each row
+    # has room for its initial entries, and for one entry per neighbor that
+    # can be assigned to an aggregate. The strongest (positive) connection is
+    # found by a heap, ordered by strength, then by coarse and fine index, as
+    # in a search for the maximum value of vals. A heap entry refers to the
+    # position of its value in the arrays, and is outdated if the value has
+    # since changed.
+    row_length = np.diff(vals.indptr)
+    capacity = row_length + np.bincount(connection.indices, minlength=Nc)
+    row_start = np.hstack((0, np.cumsum(capacity)[:-1]))
+    slot_row = np.repeat(np.arange(Nc), capacity)
+    slot_col = -np.ones(slot_row.size, dtype=np.int)
+    slot_val = np.zeros(slot_row.size)
+    pos = mcolon.mcolon(row_start, row_start + row_length)
+    slot_col[pos] = vals.indices
+    slot_val[pos] = vals.data
+    del vals
 
-        mi = np.argmax(mcval)
-        nadd = mcind[mi]
+    not_found = np.logical_not(is_coarse)
+    # The coarse cells are already aggregated, disregard their connections
+    slot_val[is_coarse[slot_row]] = 0
+    pos = pos[slot_val[pos] > 0]
+    heap = list(
+        zip(
+            (-slot_val[pos]).tolist(),
+            slot_col[pos].tolist(),
+            slot_row[pos].tolist(),
+            pos.tolist(),
+        )
+    )
+    heapq.heapify(heap)
+    del slot_row, pos
 
-        primal[mi, nadd] = True
-        it = it + 1
-        if it > Nc + 5:
-            break
+    partition = -np.ones(Nc, dtype=np.int)
+    partition[coarse] = np.arange(NC)
+    # First cell that may not be found, used when no positive connections are
+    # left
+    first_not_found = 0
 
+    num_not_found = np.sum(not_found)
+    # Process the strongest connection globally
+    while num_not_found > 0:
+        while heap and slot_val[heap[0][3]] != -heap[0][0]:
+            heapq.heappop(heap)
+
+        if heap:
+            neg_val, mi, nadd, _ = heap[0]
+            max_val = -neg_val
+        else:
+            # No positive connections are left, thus the remaining cells are
+            # not connected to any aggregate. Take the first remaining cell, and
+            # assign it to the aggregate of its strongest stored connection,
+            # which comes from an assigned neighbor, or to the first aggregate.
+            while not not_found[first_not_found]:
+                first_not_found += 1
+            nadd = first_not_found
+            loc = slice(row_start[nadd], row_start[nadd] + row_length[nadd])
+            if row_length[nadd] > 0:
+                best = np.lexsort((slot_col[loc], -slot_val[loc]))[0]
+                mi, max_val = int(slot_col[loc][best]), slot_val[loc][best]
+            else:
+                mi, max_val = 0, 0.0
+
+        partition[nadd] = mi
         not_found[nadd] = False
-        vals.data[vals.indptr[nadd] : vals.indptr[nadd + 1]] = 0
+        num_not_found -= 1
+        slot_val[row_start[nadd] : row_start[nadd] + row_length[nadd]] = 0
 
+        # Strengthen the connections to the aggregate of the neighbors that are
+        # not yet found
         loc = slice(connection.indptr[nadd], connection.indptr[nadd + 1])
         nc = connection.indices[loc]
         af = not_found[nc]
-        nc = nc[af]
-        nv = mcval[mi] * connection[nadd, :]
-        nv = nv.data[af]
-        if len(nc) > 0:
-            vals += sps.csr_matrix((nv, (nc, np.repeat(mi, len(nc)))), shape=(Nc, NC))
-
-    coarse, fine = primal.tocsr().nonzero()
-    return coarse[np.argsort(fine)]
+        nv = max_val * connection.data[loc][af]
+
+        # Add to the entry in column mi of each row, or append it. The rows are
+        # short, and are searched one by one.
+        for r, v in zip(nc[af].tolist(), nv.tolist()):
+            start = row_start[r]
+            end = start + row_length[r]
+            hit = (slot_col[start:end] == mi).nonzero()[0]
+            if hit.size > 0:
+                p = start + hit[0]
+            else:
+                p = end
+                slot_col[p] = mi
+                row_length[r] += 1
+            val = slot_val[p] + v
+            slot_val[p] = val
+            if val > 0:
+                heapq.heappush(heap, (-val, mi, r, p))
+
+    return partition
 
 
 # ------------------------------------------------------------------------------#
@@ -1,7 +1,12 @@
 # Methods to work directly with the gmsh format
 
+import concurrent.futures
+import logging
 import numpy as np
 import os
+import subprocess
+
+import meshio
 
 # meshio has changed the name of the module taking care of gmsh import.
 # Ensure compatibility with both versions with a try-except
@@ -14,6 +19,26 @@ except:
 from porepy.utils import sort_points, read_config
 import porepy.grids.constants as gridding_constants
 
+logger = logging.getLogger(__name__)
+
+
+class GmshError(Exception):
+    """ Raised when gmsh cannot be started, fails, or exceeds its time limit.
+
+    Attributes:
+        command (list of str): The command used to invoke gmsh.
+        status (int): Exit status of gmsh. None if gmsh was not started, or
+            was stopped because of a timeout.
+        output (str): Output from gmsh, stdout and stderr combined.
+
+    """
+
+    def __init__(self, message, command=None, status=None, output=""):
+        super().__init__(message)
+        self.command = command
+        self.status = status
+        self.output = output
+
 
 class GmshWriter(object):
     """
@@ -578,10 +603,22 @@ class GmshGridBucketWriter(object):
 # ------------------ End of GmshGridBucketWriter------------------------------
 
 
-def run_gmsh(in_file, out_file, dims, **kwargs):
+def run_gmsh(
+    in_file,
+    out_file,
+    dims,
+    timeout=None,
+    path_to_gmsh=None,
+    raise_on_error=False,
+    **kwargs
+):
     """
     Convenience function to run gmsh.
 
+    Gmsh is run as a subprocess, without invoking a shell. The output of gmsh is
+    captured and logged (on debug level), and is attached to the error raised if
+    gmsh cannot be started or exceeds the time limit.
+
     Parameters:
         in_file (str): Name of gmsh configuration file (.geo)
         out_file (str): Name of output file for gmsh (.msh)
@@ -589,33 +626,144 @@ def run_gmsh(in_file, out_file, dims, **kwargs):
             the geometry dimensions, gmsh will grid all lower-dimensional
             objcets described in in_file (e.g. all surfaces embeded in a 3D
             geometry).
+        timeout (double, optional): Maximum time, in seconds, allowed for gmsh.
+            Defaults to no limit.
+        path_to_gmsh (str, optional): Gmsh executable. Defaults to the path
+            given in the PorePy config file.
+        raise_on_error (boolean, optional): If True, a GmshError is raised if
+            gmsh exits with a non-zero status. Defaults to False.
         **kwargs: Options passed on to gmsh. See gmsh documentation for
             possible values.
 
     Returns:
-        double: Status of the generation, as returned by os.system. 0 means the
-            simulation completed successfully, >0 signifies problems.
+        int: Exit status of gmsh. 0 means the simulation completed
+            successfully, >0 signifies problems.
+
+    Raises:
+        FileNotFoundError if in_file does not exist.
+        GmshError if gmsh could not be started, or if it exceeded the timeout.
+            Also if gmsh failed, and raise_on_error is True.
 
     """
     if not os.path.isfile(in_file):
         raise FileNotFoundError("file " + in_file + " not found")
 
-    # Import config file to get location of gmsh executable.
-    config = read_config.read()
-    path_to_gmsh = config["gmsh_path"]
+    if path_to_gmsh is None:
+        # Import config file to get location of gmsh executable.
+        config = read_config.read()
+        path_to_gmsh = config["gmsh_path"]
 
-    opts = " "
+    cmd = [path_to_gmsh, "-2" if dims == 2 else "-3", in_file, "-o", out_file]
     for key, val in kwargs.items():
         # Gmsh keywords are specified with prefix '-'
         if key[0] != "-":
             key = "-" + key
-        opts += key + " " + str(val) + " "
+        cmd += [key, str(val)]
+
+    try:
+        proc = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            timeout=timeout,
+            universal_newlines=True,
+        )
+    except OSError as err:
+        raise GmshError("Could not start gmsh: " + str(err), command=cmd)
+    except subprocess.TimeoutExpired as err:
+        # The partial output is given as bytes, also in text mode
+        output = err.output
+        if isinstance(output, bytes):
+            output = output.decode(errors="replace")
+        elif output is None:
+            output = ""
+        raise GmshError(
+            "Gmsh exceeded the time limit of " + str(timeout) + " seconds",
+            command=cmd,
+            output=output,
+        )
+
+    logger.debug(proc.stdout)
+    if raise_on_error and proc.returncode != 0:
+        raise GmshError(
+            "Gmsh failed with status " + str(proc.returncode),
+            command=cmd,
+            status=proc.returncode,
+            output=proc.stdout,
+        )
+    return proc.returncode
 
-    if dims == 2:
-        cmd = path_to_gmsh + " -2 " + in_file + " -o " + out_file + opts
-    else:
-        cmd = path_to_gmsh + " -3 " + in_file + " -o " + out_file + opts
 
-    status = os.system(cmd)
+def run_gmsh_parallel(jobs, num_workers=None, timeout=None, path_to_gmsh=None):
+    """
+    Run several gmsh jobs concurrently.
+
+    Each job is run in a separate gmsh process; the function is intended for
+    meshing of ensembles of geometries, say, realizations of stochastic fracture
+    networks.
+
+    Parameters:
+        jobs (list of dict): Each item contains the arguments in_file, out_file
+            and dims to run_gmsh. Gmsh options can be given as a dictionary under
+            the key "gmsh_opts".
+        num_workers (int, optional): Maximum number of concurrent gmsh processes.
+            Defaults to the number of processors.
+        timeout (double, optional): Time limit, in seconds, for each job.
+        path_to_gmsh (str, optional): Gmsh executable. Defaults to the path
+            given in the PorePy config file.
+
+    Returns:
+        list of int: Exit status of the jobs, in the order of the input.
+
+    Raises:
+        GmshError if one of the jobs could not be started or timed out. The
+            remaining jobs are completed before the error is raised.
+
+    """
+
+    def run(job):
+        return run_gmsh(
+            job["in_file"],
+            job["out_file"],
+            job["dims"],
+            timeout=timeout,
+            path_to_gmsh=path_to_gmsh,
+            **job.get("gmsh_opts", {})
+        )
+
+    # The time is spent in the gmsh processes, threads suffice to drive them.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers) as executor:
+        futures = [executor.submit(run, job) for job in jobs]
+        concurrent.futures.wait(futures)
+    return [f.result() for f in futures]
+
+
+def read_gmsh(file_name):
+    """
+    Read a mesh produced by gmsh.
+
+    Parameters:
+        file_name (str): Name of the gmsh .msh file.
+
+    Returns:
+        np.ndarray: Coordinates of the mesh points.
+        dict: Cells of the mesh, sorted by element type.
+        dict: Cell data, including the physical tags of the elements.
+        dict: Mapping from physical tags to physical names.
+
+    """
+    # The interface of meshio changed between versions 1 and 2. We make no
+    # assumption on which version is installed here.
+    if int(meshio.__version__[0]) < 2:
+        pts, cells, _, cell_info, phys_names = meshio.gmsh_io.read(file_name)
+        # Invert phys_names dictionary to map from physical tags to corresponding
+        # physical names
+        phys_names = {v[0]: k for k, v in phys_names.items()}
+    else:
+        mesh = meshio.read(file_name)
 
-    return status
+        pts = mesh.points
+        cells = mesh.cells
+        cell_info = mesh.cell_data
+        phys_names = {v[0]: k for k, v in mesh.field_data.items()}
+    return pts, cells, cell_info, phys_names
@@ -11,9 +11,11 @@ Acknowledgements:
 
 """
 from __future__ import division
+import concurrent.futures
+
 import numpy as np
-import itertools
 from scipy import sparse as sps
+from scipy import spatial
 
 import porepy as pp
 from porepy.utils import matrix_compression, mcolon, tags
@@ -72,6 +74,15 @@ class Grid(object):
             num_cells
         cell_volumes (np.ndarray): Volumes of all cells
 
+        ---
+        Derived connectivity (cell_nodes(), num_cell_nodes(),
+        cell_face_as_dense() and cell_connection_map()) is computed at the first
+        call, and cached on the grid. The cache is cleared automatically if
+        face_nodes or cell_faces are replaced by new matrices. If the matrices
+        are modified in place, invalidate_connectivity() must be called. The
+        returned objects are shared with the cache, and should not be modified.
+        See connectivity_cache_info() for the content of the cache.
+
     """
 
     def __init__(self, dim, nodes, face_nodes, cell_faces, name):
@@ -189,7 +200,7 @@ class Grid(object):
 
         return s
 
-    def compute_geometry(self):
+    def compute_geometry(self, chunk_size=100000, num_workers=None):
         """Compute geometric quantities for the grid.
 
         This method initializes class variables describing the grid
@@ -199,10 +210,25 @@ class Grid(object):
         in cases where the grid is modified after the initial construction (
         say, grid refinement), this may lead to costly, unnecessary
         computations.
+
+        For 3d grids, the computation is done for blocks of cells, so that the
+        memory needed for temporary arrays is bounded by the block size rather
+        than the grid size. The result does not depend on the block size.
+
+        Parameters:
+            chunk_size (int, optional): Number of cells treated at once in 3d.
+                Defaults to 100000. Not used for grids of lower dimension.
+            num_workers (int, optional): Number of threads used to process the
+                blocks of cells in 3d. If None (default) or less than 2, the blocks
+                are processed in sequence.
+
         """
 
         self.name.append("Compute geometry")
 
+        # The geometry changes, thus the search tree for cell centers is invalid
+        self._cell_center_search_tree = None
+
         if self.dim == 0:
             self.__compute_geometry_0d()
         elif self.dim == 1:
@@ -210,7 +236,7 @@ class Grid(object):
         elif self.dim == 2:
             self.__compute_geometry_2d()
         else:
-            self.__compute_geometry_3d()
+            self.__compute_geometry_3d(chunk_size, num_workers)
 
     def __compute_geometry_0d(self):
         "Compute 0D geometry"
@@ -335,39 +361,111 @@ class Grid(object):
         self.face_centers = np.dot(R.T, self.face_centers)
         self.cell_centers = np.dot(R.T, self.cell_centers)
 
-    def __compute_geometry_3d(self):
+    def __compute_geometry_3d(self, chunk_size, num_workers):
         """
         Helper function to compute geometry for 3D grids
 
         The implementation is motivated by the similar MRST function.
 
-        NOTE: The function is very long, and could have been broken up into
-        parts (face and cell computations are an obvious solution).
+        The cells are processed in chunks. For each chunk, the geometry of the
+        faces of the cells is computed (see _face_geometry_3d), followed by the
+        cell geometry (see _cell_geometry_3d). Faces shared by cells in different
+        chunks are computed more than once, with identical results. Faces that are
+        not part of any cell are treated separately.
+
+        """
+        self.face_centers = np.zeros((3, self.num_faces))
+        self.face_normals = np.zeros((3, self.num_faces))
+        self.face_areas = np.zeros(self.num_faces)
+        self.cell_centers = np.zeros((3, self.num_cells))
+        self.cell_volumes = np.zeros(self.num_cells)
+
+        def face_chunk(faces):
+            geometry = self._face_geometry_3d(faces)
+            self.face_normals[:, faces] = geometry["face_normals"]
+            self.face_areas[faces] = geometry["face_areas"]
+            self.face_centers[:, faces] = geometry["face_centers"]
+
+        def cell_chunk(cells):
+            self._cell_geometry_3d(cells)
+
+        chunk_size = max(int(chunk_size), 1)
+        cell_chunks = [
+            np.arange(start, min(start + chunk_size, self.num_cells))
+            for start in range(0, self.num_cells, chunk_size)
+        ]
+        # Faces without cells are not covered by the cell chunks
+        faces_of_cells = self.cell_faces.nonzero()[0]
+        faces_without_cells = np.where(
+            np.bincount(faces_of_cells, minlength=self.num_faces) == 0
+        )[0]
+        face_chunks = [
+            faces_without_cells[start : start + chunk_size]
+            for start in range(0, faces_without_cells.size, chunk_size)
+        ]
+
+        if num_workers is None or num_workers < 2:
+            [cell_chunk(cells) for cells in cell_chunks]
+            [face_chunk(faces) for faces in face_chunks]
+        else:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers) as pool:
+                futures = [pool.submit(cell_chunk, cells) for cells in cell_chunks]
+                futures += [pool.submit(face_chunk, faces) for faces in face_chunks]
+                # Raise any errors from the threads
+                [f.result() for f in futures]
+
+    def _face_geometry_3d(self, faces):
+        """ Compute the geometry of a set of faces in a 3d grid.
+
+        Each face is divided into triangular sub-faces, one per edge of the face,
+        using the mean of the face nodes as a temporary face center.
+
+        Parameters:
+            faces (np.array): Sorted indices of the faces.
+
+        Returns:
+            dict: With the following fields. Edges are represented by the
+                face-node relations, the edge running from face_nodes[i] to
+                face_nodes[i+1], and ordered as in face_nodes.indices.
+                edges (np.array): Index of the edges of the faces.
+                sub_normals (np.array, 3 x num_edges): Area weighted normal
+                    vectors of the sub-faces.
+                sub_normals_sign (np.array, num_edges): Sign of the sub-normals
+                    relative to the face normals.
+                sub_centroids (np.array, 3 x num_edges): Centers of the
+                    sub-faces.
+                face_normals (np.array, 3 x num_faces): Area weighted face normals.
+                face_areas (np.array, num_faces): Face areas.
+                face_centers (np.array, 3 x num_faces): Face centers.
 
         """
-        num_face_nodes = self.face_nodes.nnz
         face_node_ptr = self.face_nodes.indptr
+        num_nodes_per_face = face_node_ptr[faces + 1] - face_node_ptr[faces]
 
-        num_nodes_per_face = face_node_ptr[1:] - face_node_ptr[:-1]
+        # Index of the edges in the face-node relations
+        edges = mcolon.mcolon(face_node_ptr[faces], face_node_ptr[faces + 1])
+        num_face_nodes = edges.size
 
         # Face-node relationships. Note that the elements here will also
         # serve as a representation of an edge along the face (face_nodes[i]
         #  represents the edge running from face_nodes[i] to face_nodes[i+1])
-        face_nodes = self.face_nodes.indices
-        # For each node, index of its parent face
+        face_nodes = self.face_nodes.indices[edges]
+        # For each node, index of its parent face (among faces)
         face_node_ind = matrix_compression.rldecode(
-            np.arange(self.num_faces), num_nodes_per_face
+            np.arange(faces.size), num_nodes_per_face
         )
 
         # Index of next node on the edge list. Note that this assumes the
         # elements in face_nodes is stored in an ordered fasion
+        first_node = np.hstack((0, np.cumsum(num_nodes_per_face)))
         next_node = np.arange(num_face_nodes) + 1
         # Close loops, for face i, the next node is the first of face i
-        next_node[face_node_ptr[1:] - 1] = face_node_ptr[:-1]
+        next_node[first_node[1:] - 1] = first_node[:-1]
 
         # Mapping from cells to faces
         edge_2_face = sps.coo_matrix(
-            (np.ones(num_face_nodes), (np.arange(num_face_nodes), face_node_ind))
+            (np.ones(num_face_nodes), (np.arange(num_face_nodes), face_node_ind)),
+            shape=(num_face_nodes, faces.size),
         ).tocsc()
 
         # Define temporary face center as the mean of the face nodes
@@ -432,10 +530,57 @@ class Grid(object):
         # the sub-faces
         face_centers = sub_areas * sub_centroids * edge_2_face / face_areas
 
+        return {
+            "edges": edges,
+            "sub_normals": sub_normals,
+            "sub_normals_sign": sub_normals_sign,
+            "sub_centroids": sub_centroids,
+            "face_normals": face_normals,
+            "face_areas": face_areas,
+            "face_centers": face_centers,
+        }
+
+    def _cell_geometry_3d(self, cells):
+        """ Compute the geometry of a set of cells in a 3d grid, together with the
+        geometry of their faces.
+
+        The cells are divided into sub-tetrahedra, one per sub-face of the faces
+        of the cell (see _face_geometry_3d), with the mean of the face centers as
+        a temporary cell center.
+
+        The face and cell geometry is stored in the corresponding attributes of
+        the grid, which should be allocated beforehand.
+
+        Parameters:
+            cells (np.array): Sorted indices of the cells.
+
+        Raises:
+            ValueError if some of the sub-tetrahedra have negative volume.
+
+        """
+        # Faces of the cells, with the orientation of the face normal seen from
+        # the cell. Sort the faces of each cell, so that the edges of the cell
+        # are sorted as well.
+        cell_faces = self.cell_faces[:, cells].tocoo()
+        nonzero = cell_faces.data != 0
+        cell_of_face = cell_faces.col[nonzero]
+        face_of_cell = cell_faces.row[nonzero]
+        sort_ind = np.lexsort((face_of_cell, cell_of_face))
+        cell_of_face = cell_of_face[sort_ind]
+        face_of_cell = face_of_cell[sort_ind]
+        orientation_of_face = cell_faces.data[nonzero][sort_ind]
+
+        # Geometry of the faces of the cells
+        faces = np.unique(face_of_cell)
+        geometry = self._face_geometry_3d(faces)
+        face_normals = geometry["face_normals"]
+        face_areas = geometry["face_areas"]
+        face_centers = geometry["face_centers"]
+
         # .. and we're done with the faces. Store information
-        self.face_centers = face_centers
-        self.face_normals = face_normals
-        self.face_areas = face_areas
+        self.face_centers[:, faces] = face_centers
+        self.face_normals[:, faces] = face_normals
+        self.face_areas[faces] = face_areas
 
         # Cells
 
@@ -444,32 +589,30 @@ class Grid(object):
         # corresponding to triangular sub-faces above), with the temporary
         # cell center as the final node
 
-        # Mapping from edges to cells. Take absolute value of cell_faces,
-        # since the elements are signed (contains the divergence).
-        # Note that edge_2_cell will contain more elements than edge_2_face,
-        # since the former will count internal faces twice (one for each
-        # adjacent cell)
-        edge_2_cell = edge_2_face * np.abs(self.cell_faces)
-        # Sort indices to avoid messing up the mappings later
-        edge_2_cell.sort_indices()
-
         # Obtain relations between edges, faces and cells, in the form of
         # index lists. Each element in the list corresponds to an edge seen
         # from a cell (e.g. edges on internal faces are seen twice).
+        face_node_ptr = self.face_nodes.indptr
+        num_nodes_per_face = (
+            face_node_ptr[face_of_cell + 1] - face_node_ptr[face_of_cell]
+        )
 
-        # Cell numbers are obtained from the columns in edge_2_cell.
-        cell_numbers = matrix_compression.rldecode(
-            np.arange(self.num_cells), np.diff(edge_2_cell.indptr)
+        # Cell numbers, local to this set of cells
+        cell_numbers = matrix_compression.rldecode(cell_of_face, num_nodes_per_face)
+        # Edge numbers, local to the edges of faces. The edges of a face are
+        # contiguous in the face-node relations.
+        edge_numbers = np.searchsorted(
+            geometry["edges"],
+            mcolon.mcolon(face_node_ptr[face_of_cell], face_node_ptr[face_of_cell + 1]),
+        )
+        # Face numbers, local to faces
+        face_numbers = matrix_compression.rldecode(
+            np.searchsorted(faces, face_of_cell), num_nodes_per_face
         )
-        # Edge numbers from the rows. Here it is crucial that the indices
-        # are sorted
-        edge_numbers = edge_2_cell.indices
-        # Face numbers are obtained from the face-node relations (with the
-        # nodes doubling as representation of edges)
-        face_numbers = face_node_ind[edge_numbers]
 
         # Number of edges per cell
-        num_cell_edges = edge_2_cell.indptr[1:] - edge_2_cell.indptr[:-1]
+        num_cells = cells.size
+        num_cell_edges = np.bincount(cell_numbers, minlength=num_cells)
 
         def bincount_nd(arr, weights):
             """ Utility function to sum vector quantities by np.bincount. We
@@ -479,11 +622,12 @@ class Grid(object):
             Intended use: Map sub-cell centroids to a quantity for the cell.
             """
             dim = weights.shape[0]
-            sz = arr.max() + 1
 
-            count = np.zeros((dim, sz))
+            count = np.zeros((dim, num_cells))
             for iter1 in range(dim):
-                count[iter1] = np.bincount(arr, weights=weights[iter1], minlength=sz)
+                count[iter1] = np.bincount(
+                    arr, weights=weights[iter1], minlength=num_cells
+                )
             return count
 
         # First estimate of cell centers as the mean of its faces' centers
@@ -495,19 +639,22 @@ class Grid(object):
         # Distance from the temporary cell center to the sub-centroids (of
         # the tetrahedra associated with each edge)
         dist_cellcenter_subface = (
-            sub_centroids[:, edge_numbers] - tmp_cell_centers[:, cell_numbers]
+            geometry["sub_centroids"][:, edge_numbers]
+            - tmp_cell_centers[:, cell_numbers]
         )
 
         # Get sign of normal vectors, seen from all faces.
-        # Make sure we get a numpy ndarray, and not a matrix (.A), and that
-        # the array is 1D (squeeze)
-        orientation = np.squeeze(self.cell_faces[face_numbers, cell_numbers].A)
+        orientation = matrix_compression.rldecode(
+            orientation_of_face, num_nodes_per_face
+        )
 
         # Get outwards pointing sub-normals for all sub-faces: We need to
         # account for both the orientation of the face, and the orientation
         # of sub-faces relative to faces.
         outer_normals = (
-            sub_normals[:, edge_numbers] * orientation * sub_normals_sign[edge_numbers]
+            geometry["sub_normals"][:, edge_numbers]
+            * orientation
+            * geometry["sub_normals_sign"][edge_numbers]
         )
 
         # Volumes of tetrahedra are now given by the dot product between the
@@ -523,7 +670,9 @@ class Grid(object):
             raise ValueError("Some tets have negative volume")
 
         # The cell volumes are now found by summing sub-tetrahedra
-        cell_volumes = np.bincount(cell_numbers, weights=tet_volumes)
+        cell_volumes = np.bincount(
+            cell_numbers, weights=tet_volumes, minlength=num_cells
+        )
         tri_centroids = 3 / 4 * dist_cellcenter_subface
 
         # Compute a correction to the temporary cell center, by a volume
@@ -534,18 +683,23 @@ class Grid(object):
         cell_centers = tmp_cell_centers + rel_centroid
 
         # ... and we're done
-        self.cell_centers = cell_centers
-        self.cell_volumes = cell_volumes
+        self.cell_centers[:, cells] = cell_centers
+        self.cell_volumes[cells] = cell_volumes
 
     def cell_nodes(self):
         """
         Obtain mapping between cells and nodes.
 
+        The mapping is cached, see the class documentation.
+
         Returns:
             sps.csc_matrix, size num_nodes x num_cells: Value 1 indicates a
                 connection between cell and node.
 
         """
+        return self._connectivity("cell_nodes", self._compute_cell_nodes)
+
+    def _compute_cell_nodes(self):
         # Local version of cell-face map, using absolute value to avoid
         # artifacts from +- in the original version.
         cf_loc = sps.csc_matrix(
@@ -562,11 +716,78 @@ class Grid(object):
     def num_cell_nodes(self):
         """ Number of nodes per cell.
 
+        The array is cached, see the class documentation.
+
         Returns:
             np.ndarray, size num_cells: Number of nodes per cell.
 
         """
-        return self.cell_nodes().sum(axis=0).A.ravel("F")
+        return self._connectivity(
+            "num_cell_nodes", lambda: self.cell_nodes().sum(axis=0).A.ravel("F")
+        )
+
+    def invalidate_connectivity(self):
+        """ Clear the cache of derived connectivity.
+
+        The method should be called if face_nodes or cell_faces are modified in
+        place. If the attributes are replaced by new matrices, the cache is cleared
+        automatically.
+
+        """
+        self._connectivity_cache = None
+
+    def connectivity_cache_info(self):
+        """ Content of the cache of derived connectivity.
+
+        Returns:
+            dict: Keys are the names of the cached quantities (e.g. "cell_nodes"),
+                values are their memory usage in bytes.
+
+        """
+        cache = self._valid_connectivity_cache()
+        info = {}
+        for key, val in cache["values"].items():
+            if sps.issparse(val):
+                info[key] = val.data.nbytes + val.indices.nbytes + val.indptr.nbytes
+            else:
+                info[key] = val.nbytes
+        return info
+
+    def _connectivity(self, key, compute):
+        """ Get a derived connectivity from the cache, compute it if necessary.
+
+        Parameters:
+            key (str): Name of the quantity.
+            compute (callable): Function without arguments that computes the
+                quantity.
+
+        """
+        cache = self._valid_connectivity_cache()
+        if key not in cache["values"]:
+            val = compute()
+            if isinstance(val, np.ndarray):
+                # Guard against modifications of the cached array
+                val.flags.writeable = False
+            cache["values"][key] = val
+        return cache["values"][key]
+
+    def _valid_connectivity_cache(self):
+        """ The connectivity cache, emptied if the topology has been replaced since
+        the quantities were computed.
+        """
+        cache = getattr(self, "_connectivity_cache", None)
+        if (
+            cache is None
+            or cache["face_nodes"] is not self.face_nodes
+            or cache["cell_faces"] is not self.cell_faces
+        ):
+            cache = {
+                "face_nodes": self.face_nodes,
+                "cell_faces": self.cell_faces,
+                "values": {},
+            }
+            self._connectivity_cache = cache
+        return cache
 
     def get_internal_nodes(self):
         """
@@ -671,24 +892,23 @@ class Grid(object):
         if self.dim == 0:
             return np.zeros(1)
 
-        def comb(n):
-            return np.fromiter(
-                itertools.chain.from_iterable(itertools.combinations(n, 2)), n.dtype
-            ).reshape((2, -1), order="F")
-
-        def diam(n):
-            return np.amax(
-                np.linalg.norm(self.nodes[:, n[0, :]] - self.nodes[:, n[1, :]], axis=0)
-            )
-
         if cn is None:
             cn = self.cell_nodes()
-        return np.array(
-            [
-                diam(comb(cn.indices[cn.indptr[c] : cn.indptr[c + 1]]))
-                for c in np.arange(self.num_cells)
-            ]
-        )
+        cn = cn.tocsc()
+
+        # Cells with the same number of nodes are treated together: Compute the
+        # distance between all pairs of nodes of the cells, and take the maximum.
+        num_nodes = np.diff(cn.indptr)
+        diams = np.zeros(self.num_cells)
+        for n in np.unique(num_nodes):
+            cells = np.where(num_nodes == n)[0]
+            nodes = cn.indices[cn.indptr[cells].reshape((-1, 1)) + np.arange(n)]
+            first, second = np.triu_indices(n, 1)
+            dist = np.linalg.norm(
+                self.nodes[:, nodes[:, first]] - self.nodes[:, nodes[:, second]], axis=0
+            )
+            diams[cells] = np.amax(dist, axis=1)
+        return diams
 
     def cell_face_as_dense(self):
         """
@@ -699,10 +919,17 @@ class Grid(object):
         that column refers to cell indices. The value -1 signifies a boundary.
         The normal vector of the face points from the first to the second row.
 
+        The array is cached, see the class documentation.
+
         Returns:
             np.ndarray, 2 x num_faces: Array representation of face-cell
                 relations
         """
+        return self._connectivity(
+            "cell_face_as_dense", self._compute_cell_face_as_dense
+        )
+
+    def _compute_cell_face_as_dense(self):
         n = self.cell_faces.tocsr()
         d = np.diff(n.indptr)
         rows = matrix_compression.rldecode(np.arange(d.size), d)
@@ -723,12 +950,18 @@ class Grid(object):
         Get a matrix representation of cell-cell connections, as defined by
         two cells sharing a face.
 
+        The matrix is cached, see the class documentation.
+
         Returns:
             scipy.sparse.csr_matrix, size num_cells * num_cells: Boolean
                 matrix, element (i,j) is true if cells i and j share a face.
                 The matrix is thus symmetric.
         """
+        return self._connectivity(
+            "cell_connection_map", self._compute_cell_connection_map
+        )
 
+    def _compute_cell_connection_map(self):
         # Create a copy of the cell-face relation, so that we can modify it at
         # will
         cell_faces = self.cell_faces.copy()
@@ -798,28 +1031,39 @@ class Grid(object):
         Returns:
             np.ndarray of ints: For each point, index of the cell with center
                 closest to the point.
+
+        The search uses a KD-tree of the cell centers, which is constructed at the
+        first call and reused until the geometry is recomputed, or the cell
+        centers are replaced.
         """
         p = np.atleast_2d(p)
         if p.shape[0] < 3:
             z = np.zeros((3 - p.shape[0], p.shape[1]))
             p = np.vstack((p, z))
 
-        def min_dist(pts):
-            c = self.cell_centers
-            d = np.sum(np.power(c - pts, 2), axis=0)
-            min_id = np.argmin(d)
-            return min_id, np.sqrt(d[min_id])
-
-        ci = np.empty(p.shape[1], dtype=np.int)
-        di = np.empty(p.shape[1])
-        for i in range(p.shape[1]):
-            ci[i], di[i] = min_dist(p[:, i].reshape((3, -1)))
+        tree = self._cell_center_tree()
+        di, ci = tree.query(p.T)
+        ci = np.asarray(ci, dtype=np.int)
+        di = np.asarray(di)
 
         if return_distance:
             return ci, di
         else:
             return ci
 
+    def _cell_center_tree(self):
+        """ KD-tree of the cell centers, used for nearest-cell queries.
+
+        The tree is stored together with the cell center array it was built from,
+        and rebuilt if self.cell_centers has been replaced since.
+        """
+        cached = getattr(self, "_cell_center_search_tree", None)
+        if cached is None or cached[0] is not self.cell_centers:
+            tree = spatial.cKDTree(self.cell_centers.T)
+            cached = (self.cell_centers, tree)
+            self._cell_center_search_tree = cached
+        return cached[1]
+
     def initiate_face_tags(self):
         keys = tags.standard_face_tags()
         values = [np.zeros(self.num_faces, dtype=bool) for _ in keys]
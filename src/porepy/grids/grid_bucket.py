@@ -826,11 +826,21 @@ class GridBucket(object):
 
             d["cell_global2loc"] = sps.hstack(mat, "csr")
 
-    def compute_geometry(self):
+    def compute_geometry(self, chunk_size=100000, num_workers=None):
         """Compute geometric quantities for the grids.
+
+        Parameters:
+            chunk_size (int, optional): Number of cells treated at once for 3d
+                grids, see Grid.compute_geometry(). Defaults to 100000.
+            num_workers (int, optional): Number of threads used for 3d grids, see
+                Grid.compute_geometry(). Defaults to None (sequential).
+
         """
 
-        [g.compute_geometry() for g, _ in self]
+        [
+            g.compute_geometry(chunk_size=chunk_size, num_workers=num_workers)
+            for g, _ in self
+        ]
         [
             d["mortar_grid"].compute_geometry()
             for _, d in self.edges()
@@ -0,0 +1,355 @@
+"""
+Binary storage of grids, mortar grids and grid buckets.
+
+The objects are stored in a folder, with one numpy (.npy) file per array, and a
+manifest (manifest.json) that describes how the arrays are assembled into
+grids, mortar grids and the GridBucket, together with node and edge data. The
+format is versioned by the manifest. Arrays are written uncompressed, so that
+they can be memory mapped on loading: The data is then read from disk only
+when it is accessed. Alternatively, the arrays can be stored as a compressed
+archive (arrays.npz) in the same folder, which saves space at the cost of
+reading (and decompressing) the arrays on loading. In the archive, arrays are
+split into chunks of a fixed number of entries, each compressed separately, so
+that no single archive member grows with the size of the grid.
+
+A typical usage is to generate the mixed-dimensional grid once, and load it in
+several simulation runs:
+
+    pp.grid_io.save(gb, "gb_folder")
+    ...
+    gb = pp.grid_io.load("gb_folder")
+
+Sparse matrices are stored by their components (data, indices, indptr).
+Objects in the node and edge data which have no array representation (say,
+boundary condition objects) are pickled, and stored as byte arrays. Loading
+pickled data can execute arbitrary code; use allow_pickle=False to store and
+load storage from untrusted sources without pickled objects.
+"""
+import json
+import os
+import pickle
+
+import numpy as np
+import scipy.sparse as sps
+
+import porepy as pp
+
+# Version of the storage format, stored in the manifest. Increase if the format
+# is changed in ways that are not backwards compatible. Version 2 added chunks
+# in the compressed archive; storage of version 1 can still be loaded.
+FORMAT_VERSION = 2
+_SUPPORTED_VERSIONS = (1, 2)
+
+# Default number of array entries per chunk in the compressed archive
+CHUNK_SIZE = 2 ** 20
+
+# Cached quantities that are recomputed when needed, and thus not stored.
+_SKIPPED_ATTRIBUTES = {"_cell_center_search_tree", "_connectivity_cache"}
+
+
+def save(obj, folder, compress=False, allow_pickle=True, chunk_size=CHUNK_SIZE):
+    """ Store a Grid, MortarGrid or GridBucket.
+
+    Parameters:
+        obj (pp.Grid, pp.MortarGrid or pp.GridBucket): Object to be stored.
+        folder (str): Folder used for storage. Created if it does not exist.
+            Files from a previous storage in the same folder are overwritten.
+        compress (boolean, optional): If True, the arrays are stored in a
+            compressed archive, which cannot be memory mapped on loading.
+            Defaults to False.
+        allow_pickle (boolean, optional): If False, objects without an array
+            representation are not pickled. Defaults to True.
+        chunk_size (int, optional): Number of array entries per chunk in the
+            compressed archive. Ignored if compress is False. Defaults to
+            CHUNK_SIZE.
+
+    Raises:
+        ValueError if allow_pickle is False, and obj contains objects without an
+            array representation. Nothing is written to the folder.
+
+    """
+    writer = _Writer(allow_pickle)
+    root = writer.encode(obj)
+
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+
+    # Remove arrays from a previous storage in the folder
+    for f in os.listdir(folder):
+        if f.endswith(".npy") or f == "arrays.npz":
+            os.remove(os.path.join(folder, f))
+
+    chunks = {}
+    if compress:
+        # Split the flattened arrays into chunks, and record the number of
+        # chunks and the shape of each array.
+        members = {}
+        for key, arr in writer.arrays.items():
+            flat = arr.ravel()
+            num_chunks = max(1, -(-flat.size // chunk_size))
+            for i in range(num_chunks):
+                members[key + "_" + str(i)] = flat[
+                    i * chunk_size : (i + 1) * chunk_size
+                ]
+            chunks[key] = {"shape": list(arr.shape), "num_chunks": num_chunks}
+        np.savez_compressed(os.path.join(folder, "arrays.npz"), **members)
+    else:
+        for key, arr in writer.arrays.items():
+            np.save(os.path.join(folder, key + ".npy"), arr, allow_pickle=False)
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "compressed": compress,
+        "chunks": chunks,
+        "grids": writer.grid_entries,
+        "root": root,
+    }
+    with open(os.path.join(folder, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+
+
+def load(folder, mmap_mode="c", allow_pickle=True):
+    """ Load a Grid, MortarGrid or GridBucket stored by save().
+
+    Parameters:
+        folder (str): Folder of the storage.
+        mmap_mode (str, optional): Memory mapping of the stored arrays, passed
+            to numpy.load. The default, 'c', maps the files copy-on-write, that
+            is, arrays are read on access, and can be modified without changing
+            the stored files. Use None to read all arrays into memory. Ignored
+            for compressed storage.
+        allow_pickle (boolean, optional): If False, pickled objects are not
+            loaded, and only classes from porepy are instantiated. Defaults to
+            True.
+
+    Returns:
+        pp.Grid, pp.MortarGrid or pp.GridBucket: The stored object.
+
+    Raises:
+        ValueError if the storage has an unknown format version, or if
+            allow_pickle is False and the storage contains pickled objects or
+            classes outside porepy.
+
+    """
+    with open(os.path.join(folder, "manifest.json"), "r") as f:
+        manifest = json.load(f)
+
+    version = manifest.get("format_version", None)
+    if version not in _SUPPORTED_VERSIONS:
+        raise ValueError("Unknown grid storage format version " + str(version))
+
+    if manifest["compressed"] and version == 1:
+        with np.load(os.path.join(folder, "arrays.npz"), allow_pickle=False) as f:
+            arrays = {key: f[key] for key in f.files}
+
+        def get_array(key):
+            return arrays[key]
+
+    elif manifest["compressed"]:
+        # Assemble the arrays from their chunks, which are decompressed one at
+        # a time into the preallocated array.
+        arrays = {}
+        with np.load(os.path.join(folder, "arrays.npz"), allow_pickle=False) as f:
+            for key, info in manifest["chunks"].items():
+                first = f[key + "_0"]
+                arr = np.empty(int(np.prod(info["shape"])), dtype=first.dtype)
+                start = 0
+                for i in range(info["num_chunks"]):
+                    chunk = first if i == 0 else f[key + "_" + str(i)]
+                    arr[start : start + chunk.size] = chunk
+                    start += chunk.size
+                arrays[key] = arr.reshape(info["shape"])
+
+        def get_array(key):
+            return arrays[key]
+
+    else:
+
+        def get_array(key):
+            return np.load(
+                os.path.join(folder, key + ".npy"),
+                mmap_mode=mmap_mode,
+                allow_pickle=False,
+            )
+
+    reader = _Reader(get_array, manifest["grids"], allow_pickle)
+    return reader.decode(manifest["root"])
+
+
+class _Writer:
+    """ Encode objects to a json-compatible description, collecting arrays.
+    """
+
+    def __init__(self, allow_pickle=True):
+        self.allow_pickle = allow_pickle
+        self.arrays = {}
+        self.grid_entries = []
+        self._grid_ids = {}
+
+    def _add_array(self, arr):
+        key = "a" + str(len(self.arrays))
+        self.arrays[key] = np.ascontiguousarray(arr)
+        return key
+
+    def encode(self, obj):
+        if obj is None or isinstance(obj, (bool, int, float, str)):
+            return {"type": "value", "value": obj}
+        elif isinstance(obj, np.generic):
+            return {"type": "scalar", "dtype": obj.dtype.str, "value": obj.item()}
+        elif isinstance(obj, np.ndarray) and obj.dtype != object:
+            return {"type": "array", "key": self._add_array(obj)}
+        elif sps.issparse(obj):
+            fmt = obj.getformat()
+            mat = obj if fmt in ("csr", "csc") else obj.tocsr()
+            return {
+                "type": "sparse",
+                "format": fmt,
+                "stored_format": mat.getformat(),
+                "shape": list(mat.shape),
+                "data": self._add_array(mat.data),
+                "indices": self._add_array(mat.indices),
+                "indptr": self._add_array(mat.indptr),
+            }
+        elif isinstance(obj, pp.Grid):
+            return {"type": "grid", "id": self._grid_id(obj)}
+        elif isinstance(obj, pp.MortarGrid):
+            return {
+                "type": "mortar_grid",
+                "class": _class_name(obj),
+                "attributes": self._encode_attributes(obj, skip={"sides"}),
+            }
+        elif isinstance(obj, pp.GridBucket):
+            nodes = [[self._grid_id(g), self.encode(d)] for g, d in obj]
+            edges = [
+                [self._grid_id(e[0]), self._grid_id(e[1]), self.encode(d)]
+                for e, d in obj.edges()
+            ]
+            return {
+                "type": "grid_bucket",
+                "name": obj.name,
+                "nodes": nodes,
+                "edges": edges,
+            }
+        elif isinstance(obj, dict):
+            items = [[self.encode(k), self.encode(v)] for k, v in obj.items()]
+            return {"type": "dict", "items": items}
+        elif isinstance(obj, (list, tuple)):
+            return {
+                "type": type(obj).__name__,
+                "items": [self.encode(o) for o in obj],
+            }
+        elif not self.allow_pickle:
+            raise ValueError("Cannot store " + str(type(obj)) + " without pickle")
+        else:
+            # No array representation is known for the object, use pickle
+            data = np.frombuffer(
+                pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL), dtype=np.uint8
+            )
+            return {"type": "pickle", "key": self._add_array(data)}
+
+    def _grid_id(self, g):
+        # Grids are stored once, also if they are referred to several times.
+        if id(g) not in self._grid_ids:
+            ind = len(self.grid_entries)
+            self._grid_ids[id(g)] = ind
+            # Reserve the position before the attributes are encoded
+            self.grid_entries.append(None)
+            self.grid_entries[ind] = {
+                "class": _class_name(g),
+                "attributes": self._encode_attributes(g),
+            }
+        return self._grid_ids[id(g)]
+
+    def _encode_attributes(self, obj, skip=None):
+        skip = _SKIPPED_ATTRIBUTES if skip is None else _SKIPPED_ATTRIBUTES | skip
+        return [
+            [name, self.encode(val)]
+            for name, val in vars(obj).items()
+            if name not in skip
+        ]
+
+
+class _Reader:
+    """ Decode objects from the description written by _Writer.
+    """
+
+    def __init__(self, get_array, grid_entries, allow_pickle=True):
+        self.allow_pickle = allow_pickle
+        self.get_array = get_array
+        self.grid_entries = grid_entries
+        self.grids = {}
+
+    def decode(self, desc):
+        kind = desc["type"]
+        if kind == "value":
+            return desc["value"]
+        elif kind == "scalar":
+            return np.dtype(desc["dtype"]).type(desc["value"])
+        elif kind == "array":
+            return self.get_array(desc["key"])
+        elif kind == "sparse":
+            constructor = (
+                sps.csr_matrix if desc["stored_format"] == "csr" else sps.csc_matrix
+            )
+            mat = constructor(
+                (
+                    self.get_array(desc["data"]),
+                    self.get_array(desc["indices"]),
+                    self.get_array(desc["indptr"]),
+                ),
+                shape=tuple(desc["shape"]),
+            )
+            return mat.asformat(desc["format"])
+        elif kind == "grid":
+            return self._grid(desc["id"])
+        elif kind == "mortar_grid":
+            mg = self._new_object(desc["class"], desc["attributes"])
+            mg.sides = np.array(list(mg.side_grids.keys()))
+            return mg
+        elif kind == "grid_bucket":
+            gb = pp.GridBucket()
+            gb.name = desc["name"]
+            for ind, data in desc["nodes"]:
+                g = self._grid(ind)
+                gb.graph.add_node(g)
+                gb.graph.node[g].update(self.decode(data))
+            for ind_0, ind_1, data in desc["edges"]:
+                g_0, g_1 = self._grid(ind_0), self._grid(ind_1)
+                gb.graph.add_edge(g_0, g_1)
+                gb.graph.adj[g_0][g_1].update(self.decode(data))
+            return gb
+        elif kind == "dict":
+            return {self.decode(k): self.decode(v) for k, v in desc["items"]}
+        elif kind == "list":
+            return [self.decode(o) for o in desc["items"]]
+        elif kind == "tuple":
+            return tuple(self.decode(o) for o in desc["items"])
+        elif kind == "pickle":
+            if not self.allow_pickle:
+                raise ValueError("The storage contains pickled objects")
+            return pickle.loads(np.asarray(self.get_array(desc["key"])).tobytes())
+        else:
+            raise ValueError("Unknown entry type " + str(kind))
+
+    def _grid(self, ind):
+        if ind not in self.grids:
+            entry = self.grid_entries[ind]
+            self.grids[ind] = self._new_object(entry["class"], entry["attributes"])
+        return self.grids[ind]
+
+    def _new_object(self, class_name, attributes):
+        module_name, name = class_name.rsplit(".", 1)
+        if not self.allow_pickle and module_name.split(".")[0] != "porepy":
+            raise ValueError("The storage contains the unknown class " + class_name)
+        module = __import__(module_name, fromlist=[name])
+        cls = getattr(module, name)
+        # The object is reconstructed from its attributes, without calling the
+        # constructor.
+        obj = cls.__new__(cls)
+        for attr, val in attributes:
+            setattr(obj, attr, self.decode(val))
+        return obj
+
+
+def _class_name(obj):
+    return type(obj).__module__ + "." + type(obj).__name__
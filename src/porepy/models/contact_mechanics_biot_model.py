@@ -11,6 +11,7 @@ NOTE: This module should be considered an experimental feature, which will likel
 undergo major changes (or be deleted).
 """
 import numpy as np
+import scipy.sparse as sps
 import porepy as pp
 import logging
 
@@ -381,6 +382,35 @@ class ContactMechanicsBiot(contact_model.ContactMechanics):
                 mech_dict = {"bc_values": bc_values}
                 d[pp.STATE].update({self.mechanics_parameter_key: mech_dict})
 
+    def fixed_stress_stabilization(self, assembler):
+        """ Stabilization term for fixed-stress type preconditioners.
+
+        The term is a diagonal matrix, with entries alpha^2 / K_dr times the cell
+        volumes in the matrix, where K_dr is the drained bulk modulus. The term is
+        zero in the fractures.
+
+        Parameters:
+            assembler (pp.Assembler): Assembler of the problem.
+
+        Returns:
+            sps.dia_matrix: Stabilization for the block of the scalar variable, in
+                the ordering given by assembler.variable_dof_ind.
+
+        """
+        values = np.zeros(assembler.num_dof())
+        for g, d in self.gb:
+            if g.dim != self.Nd:
+                continue
+            param = d[pp.PARAMETERS][self.mechanics_parameter_key]
+            C = param["fourth_order_tensor"]
+            bulk = C.lmbda + 2 * C.mu / self.Nd
+            alpha = param["biot_alpha"]
+            values[assembler.dof_ind(g, self.scalar_variable)] = (
+                alpha ** 2 / bulk * g.cell_volumes
+            )
+        values = values[assembler.variable_dof_ind(self.scalar_variable)]
+        return sps.dia_matrix((values, 0), shape=(values.size, values.size))
+
     def export_step(self):
         pass
 
@@ -388,7 +418,7 @@ class ContactMechanicsBiot(contact_model.ContactMechanics):
         pass
 
 
-def run_biot(setup, newton_tol=1e-10):
+def run_biot(setup, newton_tol=1e-10, solver=None):
     """
     Function for solving the time dependent Biot equations with a non-linear Coulomb
     contact condition on the fractures.
@@ -414,6 +444,8 @@ def run_biot(setup, newton_tol=1e-10):
                 end_time: End time time of simulation.
                 time_step: Time step size
         newton_tol: Tolerance for the Newton solver, see contact_mechanics_model.
+        solver (optional): Linear solver used in the Newton iterations, see
+            contact_mechanics_model.newton_iteration. Defaults to a direct solver.
     """
     if "gb" not in setup.__dict__:
         setup.create_grid()
@@ -473,10 +505,13 @@ def run_biot(setup, newton_tol=1e-10):
             )
             # One Newton iteration:
             sol, u, error, converged_newton = pp.models.contact_mechanics_model.newton_iteration(
-                assembler, setup, u, tol=newton_tol
+                assembler, setup, u, tol=newton_tol, solver=solver
             )
             counter_newton += 1
             newton_errors.append(error)
+            pp.models.contact_mechanics_model.reset_solver_on_stagnation(
+                solver, newton_errors
+            )
         # Prepare for next time step
         assembler.distribute_variable(sol)
         setup.export_step()
@@ -15,6 +15,7 @@ from scipy.spatial.distance import cdist
 import logging
 
 import porepy as pp
+from porepy.numerics.linalg.linsolve import Factory, rigid_body_modes
 
 # Module-wide logger
 logger = logging.getLogger(__name__)
@@ -357,7 +358,7 @@ class ContactMechanics:
         return friction_coefficient
 
 
-def run_mechanics(setup):
+def run_mechanics(setup, solver=None):
     """
     Function for solving linear elasticity with a non-linear Coulomb contact.
 
@@ -378,6 +379,8 @@ def run_mechanics(setup):
                 folder_name: returns a string. The data from the simulation will be
                 written to the file 'folder_name/' + setup.out_name and the vtk files to
                 'res_plot/' + setup.out_name
+        solver (optional): Linear solver used in the Newton iterations, see
+            newton_iteration. Defaults to a direct solver.
     """
     # Define mixed-dimensional grid. Avoid overwriting existing gb.
     if "gb" in setup.__dict__:
@@ -414,10 +417,13 @@ def run_mechanics(setup):
             "Newton iteration number {} of {}".format(counter_newton, max_newton)
         )
 
-        sol, u0, error, converged_newton = newton_iteration(assembler, setup, u0)
+        sol, u0, error, converged_newton = newton_iteration(
+            assembler, setup, u0, solver=solver
+        )
         counter_newton += 1
         viz.write_vtk({"ux": u0[::2], "uy": u0[1::2]})
         errors.append(error)
+        reset_solver_on_stagnation(solver, errors)
 
     if counter_newton > max_newton and not converged_newton:
         raise ValueError("Newton iterations did not converge")
@@ -425,6 +431,25 @@ def run_mechanics(setup):
 
 
 def newton_iteration(assembler, setup, u0, tol=1e-14, solver=None):
+    """ Perform one Newton iteration for the contact problem.
+
+    Parameters:
+        assembler (pp.Assembler): Assembler of the problem.
+        setup: Setup class, see run_mechanics.
+        u0 (np.array): Displacement of the previous iteration.
+        tol (double, optional): Tolerance for the convergence check.
+        solver (optional): Function solver(assembler, A, b), which returns the
+            solution of the linear system, e.g. as produced by block_solver, or
+            a pp.numerics.linalg.linsolve.LUCache, which reuses the
+            factorization between iterations. Defaults to a direct solver.
+
+    Returns:
+        np.array: Solution vector.
+        np.array: Displacement of the current iteration.
+        double: Error measure.
+        boolean: True if the iteration has converged.
+
+    """
     converged = False
     # @EK! If this is to work for both mechanics and biot, we probably need to pass
     # the solver to this method.
@@ -432,6 +457,13 @@ def newton_iteration(assembler, setup, u0, tol=1e-14, solver=None):
 
     # Re-discretize the nonlinear term
     assembler.discretize(term_filter=setup.friction_coupling_term)
+    logger.debug(
+        "Active set changed in {} cells".format(
+            pp.contact_conditions.active_set_changes(
+                setup.gb, setup.mechanics_parameter_key
+            )
+        )
+    )
 
     # Assemble and solve
     A, b = assembler.assemble_matrix_rhs()
@@ -444,6 +476,8 @@ def newton_iteration(assembler, setup, u0, tol=1e-14, solver=None):
 
     if solver is None:
         sol = sps.linalg.spsolve(A, b)
+    else:
+        sol = solver(assembler, A, b)
 
     # Obtain the current iterate for the displacement, and distribute the current
     # iterates for mortar displacements and contact traction.
@@ -468,6 +502,131 @@ def newton_iteration(assembler, setup, u0, tol=1e-14, solver=None):
     return sol, u1, error, converged
 
 
+def reset_solver_on_stagnation(solver, errors, reduction=0.5):
+    """ Force a new factorization in the linear solver if the Newton iterations
+    stagnate.
+
+    Solvers which reuse a factorization between iterations, such as
+    pp.numerics.linalg.linsolve.LUCache, may give inexact Newton updates. If the
+    error is not sufficiently reduced by the last iteration, and the solver has a
+    method reset(), this is called, so that the next system is factorized anew.
+
+    Parameters:
+        solver: Linear solver used in the Newton iterations, see newton_iteration.
+        errors (list of double): Errors of the Newton iterations so far.
+        reduction (double, optional): Required reduction of the error in each
+            iteration. Defaults to 0.5.
+
+    """
+    if (
+        len(errors) > 1
+        and errors[-1] > reduction * errors[-2]
+        and hasattr(solver, "reset")
+    ):
+        logger.debug("Newton iterations stagnate, reset the linear solver")
+        solver.reset()
+
+
+def block_solver(
+    variable_groups,
+    solvers=None,
+    form="lower",
+    stabilization=None,
+    null_spaces=None,
+    tol=1e-10,
+    maxiter=None,
+    restart=None,
+):
+    """ Construct an iterative solver which uses the block structure of the system.
+
+    The returned function solves the linear system with GMRES, preconditioned by
+    a block triangular preconditioner (see Factory.block_preconditioner). The
+    blocks are defined by groups of variables, e.g.
+
+        solver = block_solver(
+            [[setup.displacement_variable], [setup.scalar_variable],
+             [setup.mortar_displacement_variable, setup.contact_traction_variable,
+              setup.mortar_scalar_variable]],
+            solvers=["amg", "amg", "lu"],
+            stabilization={1: setup.fixed_stress_stabilization},
+        )
+        run_biot(setup, solver=solver)
+
+    gives a fixed-stress type preconditioner for the poro-elastic contact
+    problem, with AMG for the elliptic blocks, and a direct solver for the
+    interface variables.
+
+    For AMG blocks that consist of a vector variable on a single grid, such as
+    the displacement block above, the rigid body modes of the grid are used as
+    near null space (see pp.numerics.linalg.linsolve.rigid_body_modes), unless
+    a null space is given for the block.
+
+    Parameters:
+        variable_groups (list of list of str): Names of the variables in each
+            block. All active variables should be included in exactly one block.
+        solvers (list, optional): Solvers for the diagonal blocks, see
+            Factory.block_preconditioner. Defaults to LU factorization.
+        form (str, optional): "lower", "upper" or "diagonal". Defaults to "lower".
+        stabilization (dict, optional): For block numbers, a matrix that is added
+            to the diagonal block, or a function which takes the assembler and
+            returns such a matrix.
+        null_spaces (dict, optional): For block numbers, the near null space used
+            by AMG, or a function which takes the assembler and returns it.
+        tol (double, optional): Relative tolerance for GMRES. Defaults to 1e-10.
+        maxiter (int, optional): Maximum number of GMRES iterations.
+        restart (int, optional): Number of iterations between GMRES restarts.
+
+    Returns:
+        Function solver(assembler, A, b), which returns the solution of the
+            linear system.
+
+    Raises:
+        ValueError (from the returned function) if GMRES does not converge.
+
+    """
+    factory = Factory()
+
+    def solve(assembler, A, b):
+        blocks = [assembler.variable_dof_ind(names) for names in variable_groups]
+        stab = {}
+        if stabilization is not None:
+            for bi, mat in stabilization.items():
+                stab[bi] = mat(assembler) if callable(mat) else mat
+
+        null = {}
+        if null_spaces is not None:
+            for bi, ns in null_spaces.items():
+                null[bi] = ns(assembler) if callable(ns) else ns
+        if solvers is not None:
+            for bi, names in enumerate(variable_groups):
+                if solvers[bi] == "amg" and bi not in null:
+                    ns = _vector_null_space(assembler, names)
+                    if ns is not None:
+                        null[bi] = ns
+
+        M = factory.block_preconditioner(
+            A, blocks, solvers=solvers, form=form, stabilization=stab, null_spaces=null
+        )
+        sol, info = factory.gmres(A)(b, M=M, tol=tol, maxiter=maxiter, restart=restart)
+        if info != 0:
+            raise ValueError("GMRES did not converge, info = {}".format(info))
+        return sol
+
+    return solve
+
+
+def _vector_null_space(assembler, names):
+    # Rigid body modes if the variables form a vector variable on a single grid,
+    # else None.
+    grids = [g for (g, name) in assembler.block_dof.keys() if name in names]
+    if len(grids) != 1 or not isinstance(grids[0], pp.Grid):
+        return None
+    g = grids[0]
+    if g.dim < 2 or assembler.variable_dof_ind(names).size != g.dim * g.num_cells:
+        return None
+    return rigid_body_modes(g)
+
+
 def l2_norm_cell(g, u, uref=None):
     """
     Compute the cell volume weighted norm of a vector-valued cellwise quantity.
@@ -21,10 +21,38 @@ import porepy as pp
 
 
 class ColoumbContact:
-    def __init__(self, keyword, ambient_dimension):
+    """ Discretization of Coloumb friction contact conditions.
+
+    The discretization records the active set of the contact, that is, whether
+    each cell is open, sticking or sliding, in the matrix dictionary of the
+    lower-dimensional grid (key self.active_set), together with the number of cells
+    where the active set changed in the last discretization (key
+    self.active_set_changes). The latter can serve as a convergence diagnostic of
+    the Newton iterations.
+
+    When the contact is rediscretized, only cells where the active set, or the
+    iterate of contact traction and displacement jump, has changed are
+    recomputed. A change in the iterate is measured relative to the previous
+    iterate, and cells with changes smaller than update_tol keep their previous
+    discretization. The default value, 0, recomputes all cells in contact with
+    a changed iterate, which gives the same result as discretizing all cells.
+
+    Attributes:
+        OPEN, STICKING, SLIDING (int): Values of the active set for cells that are
+            not in contact, in contact and sticking, and in contact and sliding,
+            respectively.
+
+    """
+
+    OPEN = 0
+    STICKING = 1
+    SLIDING = 2
+
+    def __init__(self, keyword, ambient_dimension, update_tol=0):
         self.keyword = keyword
 
         self.dim = ambient_dimension
+        self.update_tol = update_tol
 
         self.mortar_displacement_variable = "mortar_u"
         self.contact_variable = "contact_traction"
@@ -32,6 +60,9 @@ class ColoumbContact:
         self.traction_discretization = "traction_discretization"
         self.displacement_discretization = "displacement_discretization"
         self.rhs_discretization = "contact_rhs"
+        self.active_set = "active_set"
+        self.active_set_changes = "active_set_changes"
+        self.contact_iterate = "contact_iterate"
 
     def _key(self):
         return self.keyword + "_"
@@ -177,110 +208,146 @@ class ColoumbContact:
             c_num,
         )
 
-        # Structures for storing the computed coefficients.
-        displacement_weight = []  # Multiplies displacement jump
-        traction_weight = []  # Multiplies the normal forces
-        rhs = np.array([])  # Goes to the right hand side.
-
-        # Zero vectors of the size of the tangential space and the full space,
-        # respectively. These are needed to complement the discretization
-        # coefficients to be determined below.
-        zer = np.array([0] * (self.dim - 1))
-        zer1 = np.array([0] * (self.dim))
-        zer1[-1] = 1
-
-        # Loop over all mortar cells, discretize according to the current state of
-        # the contact
-        # The loop computes three parameters:
-        # L will eventually multiply the displacement jump, and be associated with
-        #   the coefficient in a Robin boundary condition (using the terminology of
-        #   the mpsa implementation)
+        sliding = np.logical_and(sliding_bc, penetration_bc)
+        sticking = np.logical_and(np.logical_not(sliding_bc), penetration_bc)
+
+        # Active set of the contact, and the quantities the discretization depends on
+        active_set = np.zeros(num_cells, dtype=np.int)
+        active_set[sticking] = self.STICKING
+        active_set[sliding] = self.SLIDING
+        iterate = np.vstack(
+            (
+                contact_force_tangential,
+                displacement_jump_tangential,
+                friction_bound,
+                friction_coefficient,
+            )
+        )
+
+        matrix_dictionary = data_l[pp.DISCRETIZATION_MATRICES][self.keyword]
+
+        # Find the cells to be discretized. If a previous discretization is
+        # available, only cells where the active set or the iterate has changed are
+        # recomputed. The discretization of open cells does not depend on the
+        # iterate.
+        update = self._cells_to_update(matrix_dictionary, active_set, iterate)
+        if update is None:
+            update = np.ones(num_cells, dtype=np.bool)
+            num_changes = num_cells
+        else:
+            previous_active_set = matrix_dictionary[self.active_set]
+            num_changes = int(np.sum(active_set != previous_active_set))
+            # Cells that are not updated keep the iterate of their discretization
+            previous_iterate = matrix_dictionary[self.contact_iterate]
+            iterate[:, ~update] = previous_iterate[:, ~update]
+
+        matrix_dictionary[self.active_set] = active_set
+        matrix_dictionary[self.active_set_changes] = num_changes
+        matrix_dictionary[self.contact_iterate] = iterate
+
+        # Structures for storing the computed coefficients, one dim x dim block
+        # per updated cell for the weights.
+        num_update = np.sum(update)
+        displacement_weight = np.zeros((num_update, self.dim, self.dim))
+        traction_weight = np.zeros((num_update, self.dim, self.dim))
+        rhs = np.zeros((num_update, self.dim))
+
+        friction_coefficient = friction_coefficient[update]
+        friction_bound = friction_bound[update]
+        contact_force_tangential = contact_force_tangential[:, update]
+        displacement_jump_tangential = displacement_jump_tangential[:, update]
+        sliding = sliding[update]
+        sticking = sticking[update]
+        not_in_contact = np.logical_not(penetration_bc[update])
+
+        # Discretize the cells according to the current state of the contact.
+        # For each state, three parameters are computed:
+        # The displacement weight will eventually multiply the displacement jump, and
+        #   be associated with the coefficient in a Robin boundary condition (using
+        #   the terminology of the mpsa implementation)
+        # The traction weight multiplies the contact force.
         # r is the right hand side term
-        # IS: Comment about the traction weight?
-
-        for i in range(num_cells):
-            if sliding_bc[i] & penetration_bc[i]:  # in contact and sliding
-                # The equation for the normal direction is computed from equation
-                # (24)-(25) in Berge et al.
-                # Compute coeffecients L, r, v
-                loc_displacement_tangential, r, v = self._L_r(
-                    contact_force_tangential[:, i],
-                    displacement_jump_tangential[:, i],
-                    friction_bound[i],
-                    c_num,
-                )
-
-                # There is no interaction between displacement jumps in normal and
-                # tangential direction
-                L = np.hstack((loc_displacement_tangential, np.atleast_2d(zer).T))
-                loc_displacement_weight = np.vstack((L, zer1))
-                # Right hand side is computed from (24-25). In the normal
-                # direction, zero displacement is enforced.
-                # This assumes that the original distance, g, between the fracture
-                # walls is zero.
-                r = np.vstack((r + friction_bound[i] * v, 0))
-                # Unit contribution from tangential force
-                loc_traction_weight = np.eye(self.dim)
-                # Zero weight on normal force
-                loc_traction_weight[-1, -1] = 0
-                # Contribution from normal force
-                loc_traction_weight[:-1, -1] = -friction_coefficient[i] * v.ravel()
-
-            elif ~sliding_bc[i] & penetration_bc[i]:  # In contact and sticking
-                # Weight for contact force computed according to (23)
-                loc_traction_tangential = (
-                    -friction_coefficient[i]
-                    * displacement_jump_tangential[:, i].ravel("F")
-                    / friction_bound[i]
-                )
-                # Unit coefficient for all displacement jumps
-                loc_displacement_weight = np.eye(self.dim)
-
-                # Tangential traction dependent on normal one
-                loc_traction_weight = np.zeros((self.dim, self.dim))
-                loc_traction_weight[:-1, -1] = loc_traction_tangential
-
-                # The right hand side is the previous tangential jump, and zero
-                # in the normal direction.
-                r = np.hstack((displacement_jump_tangential[:, i], 0)).T
-
-            elif ~penetration_bc[i]:  # not in contact
-                # This is a free boundary, no conditions on displacement
-                loc_displacement_weight = np.zeros((self.dim, self.dim))
-
-                # Free boundary conditions on the forces.
-                loc_traction_weight = np.eye(self.dim)
-                r = np.zeros(self.dim)
-
-            else:  # should never happen
-                raise AssertionError("Should not get here")
-
-            # Depending on the state of the system, the weights in the tangential direction may
-            # become huge or tiny compared to the other equations. This will
-            # impede convergence of an iterative solver for the linearized
-            # system. As a partial remedy, rescale the condition to become
-            # closer to unity.
-            w_diag = np.diag(loc_displacement_weight) + np.diag(loc_traction_weight)
-            W_inv = np.diag(1 / w_diag)
-            loc_displacement_weight = W_inv.dot(loc_displacement_weight)
-            loc_traction_weight = W_inv.dot(loc_traction_weight)
-            r = r.ravel() / w_diag
-
-            # Append to the list of global coefficients.
-            displacement_weight.append(loc_displacement_weight)
-            traction_weight.append(loc_traction_weight)
-            rhs = np.hstack((rhs, r))
-
-        traction_discretization_coefficients = sps.block_diag(traction_weight)
-        displacement_discretization_coefficients = sps.block_diag(displacement_weight)
-
-        data_l[pp.DISCRETIZATION_MATRICES][self.keyword][
-            self.traction_discretization
-        ] = traction_discretization_coefficients
-        data_l[pp.DISCRETIZATION_MATRICES][self.keyword][
-            self.displacement_discretization
-        ] = displacement_discretization_coefficients
-        data_l[pp.DISCRETIZATION_MATRICES][self.keyword][self.rhs_discretization] = rhs
+
+        # In contact and sliding
+        if np.any(sliding):
+            # The equation for the normal direction is computed from equation
+            # (24)-(25) in Berge et al.
+            # Compute coeffecients L, r, v
+            loc_displacement_tangential, r, v = self._L_r(
+                contact_force_tangential[:, sliding],
+                displacement_jump_tangential[:, sliding],
+                friction_bound[sliding],
+                c_num,
+            )
+            # There is no interaction between displacement jumps in normal and
+            # tangential direction
+            displacement_weight[sliding, :-1, :-1] = loc_displacement_tangential
+            displacement_weight[sliding, -1, -1] = 1
+            # Right hand side is computed from (24-25). In the normal
+            # direction, zero displacement is enforced.
+            # This assumes that the original distance, g, between the fracture
+            # walls is zero.
+            rhs[sliding, :-1] = (r + friction_bound[sliding] * v).T
+            # Unit contribution from tangential force, zero weight on normal force
+            traction_weight[sliding, :-1, :-1] = np.eye(self.dim - 1)
+            # Contribution from normal force
+            traction_weight[sliding, :-1, -1] = (-friction_coefficient[sliding] * v).T
+
+        # In contact and sticking
+        if np.any(sticking):
+            # Weight for contact force computed according to (23). Tangential
+            # traction dependent on normal one
+            traction_weight[sticking, :-1, -1] = (
+                -friction_coefficient[sticking]
+                * displacement_jump_tangential[:, sticking]
+                / friction_bound[sticking]
+            ).T
+            # Unit coefficient for all displacement jumps
+            displacement_weight[sticking] = np.eye(self.dim)
+            # The right hand side is the previous tangential jump, and zero
+            # in the normal direction.
+            rhs[sticking, :-1] = displacement_jump_tangential[:, sticking].T
+
+        # Not in contact. This is a free boundary, no conditions on displacement.
+        # Free boundary conditions on the forces.
+        traction_weight[not_in_contact] = np.eye(self.dim)
+
+        # Depending on the state of the system, the weights in the tangential
+        # direction may become huge or tiny compared to the other equations. This will
+        # impede convergence of an iterative solver for the linearized
+        # system. As a partial remedy, rescale the condition to become
+        # closer to unity.
+        w_diag = np.diagonal(displacement_weight, axis1=1, axis2=2) + np.diagonal(
+            traction_weight, axis1=1, axis2=2
+        )
+        w_inv = 1 / w_diag
+        displacement_weight *= w_inv[:, :, np.newaxis]
+        traction_weight *= w_inv[:, :, np.newaxis]
+        rhs /= w_diag
+
+        if np.all(update):
+            matrix_dictionary[self.traction_discretization] = self._block_diagonal(
+                traction_weight
+            )
+            matrix_dictionary[self.displacement_discretization] = self._block_diagonal(
+                displacement_weight
+            )
+            matrix_dictionary[self.rhs_discretization] = rhs.ravel()
+        else:
+            # Scatter the updated blocks into copies of the previous discretization.
+            # The blocks are stored in full, thus the data of a cell is found in a
+            # contiguous chunk of the data array.
+            for key, blocks in [
+                (self.traction_discretization, traction_weight),
+                (self.displacement_discretization, displacement_weight),
+            ]:
+                mat = matrix_dictionary[key].copy()
+                mat.data.reshape((num_cells, self.dim, self.dim))[update] = blocks
+                matrix_dictionary[key] = mat
+
+            full_rhs = matrix_dictionary[self.rhs_discretization].copy()
+            full_rhs.reshape((num_cells, self.dim))[update] = rhs
+            matrix_dictionary[self.rhs_discretization] = full_rhs
 
     def assemble_matrix_rhs(self, g, data):
         # Generate matrix for the coupling. This can probably be generalized
@@ -296,6 +363,56 @@ class ColoumbContact:
 
         return traction_coefficient, displacement_coefficient, rhs
 
+    def _cells_to_update(self, matrix_dictionary, active_set, iterate):
+        """ Find cells where the discretization must be recomputed.
+
+        Arguments:
+            matrix_dictionary (dict): Discretization matrices of the contact.
+            active_set (np.array of int, num_cells): Current active set.
+            iterate (np.array, 2 * dim x num_cells): Current iterate of the
+                quantities the discretization depends on.
+
+        Returns:
+            np.array of bool, num_cells: True for cells to be discretized. None if
+                there is no previous discretization to update, and all cells must
+                be discretized.
+
+        """
+        keys = [
+            self.traction_discretization,
+            self.displacement_discretization,
+            self.rhs_discretization,
+            self.active_set,
+            self.contact_iterate,
+        ]
+        if not all(key in matrix_dictionary for key in keys):
+            return None
+
+        previous_active_set = matrix_dictionary[self.active_set]
+        previous_iterate = matrix_dictionary[self.contact_iterate]
+        if previous_iterate.shape != iterate.shape:
+            return None
+
+        # The discretization matrices must have the structure given by
+        # self._block_diagonal
+        num_cells = active_set.size
+        for key in [self.traction_discretization, self.displacement_discretization]:
+            mat = matrix_dictionary[key]
+            if not sps.isspmatrix_csr(mat) or mat.nnz != num_cells * self.dim ** 2:
+                return None
+
+        changed_iterate = np.any(
+            np.abs(iterate - previous_iterate)
+            > self.update_tol * np.abs(previous_iterate),
+            axis=0,
+        )
+        # Cells that remain open have a discretization independent of the iterate
+        changed_iterate[
+            np.logical_and(active_set == self.OPEN, previous_active_set == self.OPEN)
+        ] = False
+
+        return np.logical_or(active_set != previous_active_set, changed_iterate)
+
     # Active and inactive boundary faces
     def _sliding(self, Tt, ut, bf, ct):
         """ Find faces where the frictional bound is exceeded, that is, the face is
@@ -334,7 +451,9 @@ class ColoumbContact:
         tol = 1e-8 * cn
         return (-Tn + cn * un) > tol
 
-    # Below here are different help function for calculating the Newton step
+    # Below here are different help function for calculating the Newton step.
+    # The functions operate on a set of cells: Forces and displacements have one
+    # column per cell, and matrices are stacked along the first axis.
     def _ef(self, Tt, cut, bf):
         # Compute part of (25) in Berge et al.
         return bf / self._l2(-Tt + cut)
@@ -342,71 +461,110 @@ class ColoumbContact:
     def _Ff(self, Tt, cut, bf):
         # Implementation of the term Q involved in the calculation of (25) in Berge
         # et al.
-        numerator = -Tt.dot((-Tt + cut).T)
+        # Outer product of -Tt and -Tt + cut for each cell
+        numerator = np.einsum("ik,jk->kij", -Tt, -Tt + cut)
 
         # Regularization to avoid issues during the iterations to avoid dividing by
         # zero if the faces are not in contact durign iterations.
-        denominator = max(bf, self._l2(-Tt)) * self._l2(-Tt + cut)
+        denominator = np.maximum(bf, self._l2(-Tt)) * self._l2(-Tt + cut)
 
-        return numerator / denominator
+        return numerator / denominator[:, np.newaxis, np.newaxis]
 
     def _M(self, Tt, cut, bf):
         """ Compute the coefficient M used in Eq. (25) in Berge et al.
         """
         Id = np.eye(Tt.shape[0])
-        return self._ef(Tt, cut, bf) * (Id - self._Ff(Tt, cut, bf))
+        return self._ef(Tt, cut, bf)[:, np.newaxis, np.newaxis] * (
+            Id - self._Ff(Tt, cut, bf)
+        )
 
     def _hf(self, Tt, cut, bf):
-        return self._ef(Tt, cut, bf) * self._Ff(Tt, cut, bf).dot(-Tt + cut)
+        return self._ef(Tt, cut, bf) * np.einsum(
+            "kij,jk->ik", self._Ff(Tt, cut, bf), -Tt + cut
+        )
 
     def _L_r(self, Tt, ut, bf, c):
         """
         Compute the coefficient L, defined in Eq. (25) in Berge et al.
 
         Arguments:
-            Tt: Tangential forces. np array, two or three elements
+            Tt: Tangential forces. np array, nd-1 x num_cells.
             ut: Tangential displacement. Same size as Tt
-            bf: Friction bound for this mortar cell.
+            bf: Friction bound for the mortar cells. np.array, num_cells.
             c: Numerical parameter
 
+        Returns:
+            np.array, num_cells x nd-1 x nd-1: The coefficient L for each cell.
+            np.array, nd-1 x num_cells: The coefficient r.
+            np.array, nd-1 x num_cells: The coefficient v.
 
         """
         if Tt.ndim <= 1:
             Tt = np.atleast_2d(Tt).T
             ut = np.atleast_2d(ut).T
+        bf = np.atleast_1d(bf)
 
         cut = c * ut
         # Identity matrix
         Id = np.eye(Tt.shape[0])
 
+        L = np.zeros((bf.size, Id.shape[0], Id.shape[0]))
         # Shortcut if the friction coefficient is effectively zero.
         # Numerical tolerance here is likely somewhat arbitrary.
-        if bf <= 1e-10:
-            return (
-                0 * Id,
-                bf * np.ones((Id.shape[0], 1)),
-                (-Tt + cut) / self._l2(-Tt + cut),
-            )
+        r = bf * np.ones((Id.shape[0], 1))
+        v = (-Tt + cut) / self._l2(-Tt + cut)
+
+        hit = bf > 1e-10
+        if not np.any(hit):
+            return L, r, v
+
+        Tt = Tt[:, hit]
+        cut = cut[:, hit]
+        bf = bf[hit]
 
         # Compute the coefficient M
         coeff_M = self._M(Tt, cut, bf)
 
         # Regularization during the iterations requires computations of parameters
         # alpha, beta, delta
-        alpha = -Tt.T.dot(-Tt + cut) / (self._l2(-Tt) * self._l2(-Tt + cut))
-        delta = min(self._l2(-Tt) / bf, 1)
+        alpha = -np.sum(Tt * (-Tt + cut), axis=0) / (
+            self._l2(-Tt) * self._l2(-Tt + cut)
+        )
+        delta = np.minimum(self._l2(-Tt) / bf, 1)
 
-        if alpha < 0:
-            beta = 1 / (1 - alpha * delta)
-        else:
-            beta = 1
+        beta = np.ones(bf.size)
+        neg = alpha < 0
+        beta[neg] = 1 / (1 - alpha[neg] * delta[neg])
 
         # The expression (I - beta * M)^-1
-        IdM_inv = np.linalg.inv(Id - beta * coeff_M)
+        IdM_inv = np.linalg.inv(Id - beta[:, np.newaxis, np.newaxis] * coeff_M)
+
+        L[hit] = c * (IdM_inv - Id)
+        r[:, hit] = -np.einsum("kij,jk->ik", IdM_inv, self._hf(Tt, cut, bf))
+        v[:, hit] = np.einsum("kij,jk->ik", IdM_inv, -Tt + cut) / self._l2(-Tt + cut)
 
-        v = IdM_inv.dot(-Tt + cut) / self._l2(-Tt + cut)
+        return L, r, v
 
-        return c * (IdM_inv - Id), -IdM_inv.dot(self._hf(Tt, cut, bf)), v
+    def _block_diagonal(self, blocks):
+        """ Block diagonal matrix of a stack of dense blocks.
+
+        Arguments:
+            blocks (np.array, num_blocks x n x n): The blocks.
+
+        Returns:
+            sps.csr_matrix (num_blocks * n x num_blocks * n): Block diagonal matrix.
+                All elements of the blocks are stored, thus the sparsity pattern
+                does not depend on the state of the contact.
+
+        """
+        num_blocks, n, _ = blocks.shape
+        indptr = np.arange(0, num_blocks * n * n + 1, n)
+        indices = np.tile(np.arange(n), num_blocks * n) + np.repeat(
+            n * np.arange(num_blocks), n * n
+        )
+        return sps.csr_matrix(
+            (blocks.ravel(), indices, indptr), shape=(num_blocks * n, num_blocks * n)
+        )
 
     def _l2(self, x):
         x = np.atleast_2d(x)
@@ -484,3 +642,27 @@ def set_projections(gb):
 
         # Store the projection operator in the mortar data
         d_m["tangential_normal_projection"] = projection
+
+
+def active_set_changes(gb, keyword):
+    """ Number of cells where the active set of the contact changed in the last
+    discretization.
+
+    Parameters:
+        gb (pp.GridBucket): Mixed-dimensional grid. The contact conditions are
+            discretized by ColoumbContact on the grids of co-dimension 1.
+        keyword (str): Keyword of the ColoumbContact discretization.
+
+    Returns:
+        int: Number of cells, summed over all fractures, where the state (open,
+            sticking or sliding) changed. Grids that are not discretized are
+            ignored.
+
+    """
+    num_changes = 0
+    for g, d in gb:
+        if g.dim != gb.dim_max() - 1:
+            continue
+        matrices = d.get(pp.DISCRETIZATION_MATRICES, {}).get(keyword, {})
+        num_changes += matrices.get("active_set_changes", 0)
+    return num_changes
@@ -86,16 +86,6 @@ class RT0(pp.numerics.vem.dual_elliptic.DualElliptic):
                 k.values = np.delete(k.values, (remove_dim), axis=0)
                 k.values = np.delete(k.values, (remove_dim), axis=1)
 
-        # Allocate the data to store matrix entries, that's the most efficient
-        # way to create a sparse matrix.
-        size = np.power(g.dim + 1, 2) * g.num_cells
-        I = np.empty(size, dtype=np.int)
-        J = np.empty(size, dtype=np.int)
-        dataIJ = np.empty(size)
-        idx = 0
-
-        nodes, _, _ = sps.find(g.face_nodes)
-
         size_HB = g.dim * (g.dim + 1)
         HB = np.zeros((size_HB, size_HB))
         for it in np.arange(0, size_HB, g.dim):
@@ -103,35 +93,28 @@ class RT0(pp.numerics.vem.dual_elliptic.DualElliptic):
         HB += HB.T
         HB /= g.dim * g.dim * (g.dim + 1) * (g.dim + 2)
 
-        for c in np.arange(g.num_cells):
-            # For the current cell retrieve its faces
-            loc = slice(g.cell_faces.indptr[c], g.cell_faces.indptr[c + 1])
-            faces_loc = faces[loc]
-
-            # find the opposite node id for each face
-            node = RT0.opposite_side_node(g.face_nodes, nodes, faces_loc)
-            coord_loc = node_coords[:, node]
-
-            # Compute the H_div-mass local matrix
-            A = RT0.massHdiv(
-                k.values[0 : g.dim, 0 : g.dim, c],
-                g.cell_volumes[c],
-                coord_loc,
-                sign[loc],
-                g.dim,
-                HB,
-            )
-
-            # Save values for Hdiv-mass local matrix in the global structure
-            cols = np.tile(faces_loc, (faces_loc.size, 1))
-            loc_idx = slice(idx, idx + cols.size)
-            I[loc_idx] = cols.T.ravel()
-            J[loc_idx] = cols.ravel()
-            dataIJ[loc_idx] = A.ravel()
-            idx += cols.size
+        # For each cell, the faces and their opposite nodes. Since the grid is
+        # simplicial, all cells have g.dim + 1 faces.
+        faces_loc = faces.reshape((g.num_cells, g.dim + 1))
+        sign_loc = sign.reshape((g.num_cells, g.dim + 1))
+        node = RT0.opposite_side_nodes(g, faces_loc)
+
+        # Compute the H_div-mass local matrices for all cells
+        A = RT0.massHdiv_batch(
+            np.moveaxis(k.values[0 : g.dim, 0 : g.dim], -1, 0),
+            g.cell_volumes,
+            np.moveaxis(node_coords[:, node], 0, 1),
+            sign_loc,
+            g.dim,
+            HB,
+        )
+
+        # Save values for Hdiv-mass local matrix in the global structure
+        I = np.repeat(faces_loc, g.dim + 1, axis=1).ravel()
+        J = np.tile(faces_loc, (1, g.dim + 1)).ravel()
 
         # Construct the global matrices
-        mass = sps.coo_matrix((dataIJ, (I, J)))
+        mass = sps.coo_matrix((A.ravel(), (I, J)))
         div = -g.cell_faces.T
 
         matrix_dictionary["mass"] = mass
@@ -176,30 +159,22 @@ class RT0(pp.numerics.vem.dual_elliptic.DualElliptic):
             g, deviation_from_plane_tol
         )
 
-        nodes, _, _ = sps.find(g.face_nodes)
-
-        P0u = np.zeros((3, g.num_cells))
-
-        for c in np.arange(g.num_cells):
-            loc = slice(g.cell_faces.indptr[c], g.cell_faces.indptr[c + 1])
-            faces_loc = faces[loc]
-
-            # find the opposite node id for each face
-            node = RT0.opposite_side_node(g.face_nodes, nodes, faces_loc)
+        # find the opposite node id for each face of each cell
+        faces_loc = faces.reshape((g.num_cells, g.dim + 1))
+        node = RT0.opposite_side_nodes(g, faces_loc)
 
-            # extract the coordinates
-            center = np.tile(c_centers[:, c], (node.size, 1)).T
-            delta_c = center - node_coords[:, node]
-            delta_f = f_centers[:, faces_loc] - node_coords[:, node]
-            normals = f_normals[:, faces_loc]
+        # extract the coordinates, with shape (dim, num_cells, num_faces_of_cell)
+        delta_c = c_centers[:, :, np.newaxis] - node_coords[:, node]
+        delta_f = f_centers[:, faces_loc] - node_coords[:, node]
+        normals = f_normals[:, faces_loc]
 
-            Pi = delta_c / np.einsum("ij,ij->j", delta_f, normals)
+        Pi = delta_c / np.einsum("icj,icj->cj", delta_f, normals)
 
-            # extract the velocity for the current cell
-            P0u[dim, c] = np.dot(Pi, u[faces_loc])
-            P0u[:, c] = np.dot(R.T, P0u[:, c])
+        # extract the velocity for the cells
+        P0u = np.zeros((3, g.num_cells))
+        P0u[dim] = np.einsum("icj,cj->ic", Pi, u[faces_loc])
 
-        return P0u
+        return np.dot(R.T, P0u)
 
     @staticmethod
     def massHdiv(K, c_volume, coord, sign, dim, HB):
@@ -233,6 +208,75 @@ class RT0(pp.numerics.vem.dual_elliptic.DualElliptic):
 
         return np.dot(C.T, np.dot(N.T, np.dot(HB, np.dot(inv_K, np.dot(N, C)))))
 
+    @staticmethod
+    def massHdiv_batch(K, c_volumes, coords, sign, dim, HB):
+        """ Compute the local mass Hdiv matrices of all cells in a simplex grid.
+
+        The computation is equivalent to calling massHdiv for each cell, but all
+        cells are treated with stacked array operations.
+
+        Parameters
+        ----------
+        K : ndarray (num_cells, g.dim, g.dim)
+            Permeability of the cells.
+        c_volumes : array (num_cells)
+            Cell volumes.
+        coords : ndarray (num_cells, >= g.dim, g.dim + 1)
+            Coordinates of the node opposite to each face of the cells.
+        sign : ndarray (num_cells, g.dim + 1)
+            +1 or -1 if the normal is inward or outward to the cell.
+
+        Return
+        ------
+        out: ndarray (num_cells, g.dim + 1, g.dim + 1)
+            Local mass Hdiv matrices.
+        """
+        # Allow short variable names in this function
+        # pylint: disable=invalid-name
+        num_cells = c_volumes.size
+        inv_K = np.linalg.inv(K) / c_volumes[:, np.newaxis, np.newaxis]
+
+        # N[c, j, :, i] = coord[c, :, j] - coord[c, :, i], with the rows indexed by
+        # j and the coordinate direction, as in massHdiv.
+        coords = coords[:, 0:dim, :]
+        N = np.swapaxes(coords, 1, 2)[:, :, :, np.newaxis] - coords[:, np.newaxis]
+
+        # Multiplication with the block diagonal matrix of inverse permeabilities
+        inv_K_N = np.einsum("cab,cjbi->cjai", inv_K, N)
+
+        N = N.reshape((num_cells, dim * (dim + 1), dim + 1))
+        inv_K_N = inv_K_N.reshape((num_cells, dim * (dim + 1), dim + 1))
+
+        A = np.matmul(np.swapaxes(N, 1, 2), np.matmul(HB, inv_K_N))
+        return A * sign[:, :, np.newaxis] * sign[:, np.newaxis, :]
+
+    @staticmethod
+    def opposite_side_nodes(g, faces_loc):
+        """
+        For all faces of all cells in a simplex grid, find the node on the opposite
+        side of the cell. This function is mainly for internal use.
+
+        The nodes of a simplex are distinct, and each node belongs to all faces of
+        the cell, except the opposite one. The sum of the node indices of the
+        cell can thus be computed from the node sums of the faces, and the opposite
+        node is the difference between the two sums.
+
+        Parameters:
+        ----------
+        g: simplex grid.
+        faces_loc: ndarray (num_cells, g.dim + 1), face ids of each cell.
+
+        Return:
+        -------
+        opposite_node: ndarray (num_cells, g.dim + 1), for each face in faces_loc
+            the id of the node at their opposite side
+
+        """
+        face_node_sum = g.face_nodes.T.astype(np.int) * np.arange(g.num_nodes)
+        face_sum = face_node_sum[faces_loc]
+        cell_sum = face_sum.sum(axis=1) // g.dim
+        return cell_sum[:, np.newaxis] - face_sum
+
     @staticmethod
     def opposite_side_node(face_nodes, nodes, faces_loc):
         """
@@ -176,6 +176,11 @@ class Biot:
                     options.
                 mpsa_eta, mpfa_eta (double): Location of continuity point in MPSA and MPFA.
                     Defaults to 1/3 for simplex grids, 0 otherwise.
+                max_memory (double): Threshold for the estimated peak memory of the
+                    discretization. If given in the mechanics (flow) parameters,
+                    the mechanics (flow) discretization is split into partitions.
+                num_workers (int): Number of processes used to discretize the
+                    partitions. Defaults to sequential discretization.
 
         The discretization is stored in the data dictionary, in the form of
         several matrices representing different coupling terms. For details,
@@ -293,6 +298,11 @@ class Biot:
                 fvutils.determine_eta(g).
             inverter (string) Block inverter to be used, either numba (default),
                 cython or python. See fvutils.invert_diagonal_blocks for details.
+            max_memory (double) Optional threshold for the estimated peak memory. If
+                given, the discretization is split into partitions, see
+                _discretize_mech_memory_bounded().
+            num_workers (int) Optional number of processes used to discretize the
+                partitions if max_memory is given.
 
         Returns:
             scipy.sparse.csr_matrix (shape num_faces * dim, num_cells * dim): stress
@@ -321,9 +331,50 @@ class Biot:
 
         eta = parameters_m.get("mpsa_eta", fvutils.determine_eta(g))
         inverter = parameters_m.get("inverter", None)
+        max_memory = parameters_m.get("max_memory", None)
+        num_workers = parameters_m.get("num_workers", None)
 
         alpha = parameters_m["biot_alpha"]
 
+        if max_memory is None:
+            matrices = self._local_discr_mech(
+                g, constit, bound_mech, alpha, eta, inverter
+            )
+        else:
+            matrices = self._discretize_mech_memory_bounded(
+                g, constit, bound_mech, alpha, eta, inverter, max_memory, num_workers
+            )
+
+        # Add discretizations to data
+        for key in [
+            "stress",
+            "bound_stress",
+            "grad_p",
+            "bound_displacement_cell",
+            "bound_displacement_face",
+            "bound_displacement_pressure",
+        ]:
+            matrices_m[key] = matrices[key]
+        for key in ["div_u", "bound_div_u", "biot_stabilization"]:
+            matrices_f[key] = matrices[key]
+
+    def _local_discr_mech(self, g, constit, bound_mech, alpha, eta, inverter):
+        """ Core of the discretization of poro-elasticity, see _discretize_mech().
+
+        Parameters:
+            g (core.grids.grid): grid to be discretized
+            constit (pp.FourthOrderTensor): Stiffness tensor.
+            bound_mech (pp.BoundaryConditionVectorial): Boundary conditions for
+                mechanics.
+            alpha (double): Biot's coefficient.
+            eta: Location of displacement continuity point.
+            inverter (string): Block inverter to be used.
+
+        Returns:
+            dictionary: The discretization matrices, stored with the keywords
+                used in the matrix dictionaries, see _discretize_mech().
+
+        """
         # The grid coordinates are always three-dimensional, even if the grid
         # is really 2D. This means that there is not a 1-1 relation between the
         # number of coordinates of a point / vector and the real dimension.
@@ -420,16 +471,268 @@ class Biot:
         disp_bound = dist_grad * igrad * rhs_bound
         disp_pressure = dist_grad * igrad * rhs_jumps
 
-        # Add discretizations to data
-        matrices_m["stress"] = stress
-        matrices_m["bound_stress"] = bound_stress
-        matrices_f["div_u"] = div_u
-        matrices_f["bound_div_u"] = bound_div_u
-        matrices_m["grad_p"] = grad_p
-        matrices_f["biot_stabilization"] = stabilization
-        matrices_m["bound_displacement_cell"] = disp_cell
-        matrices_m["bound_displacement_face"] = disp_bound
-        matrices_m["bound_displacement_pressure"] = disp_pressure
+        return {
+            "stress": stress,
+            "bound_stress": bound_stress,
+            "div_u": div_u,
+            "bound_div_u": bound_div_u,
+            "grad_p": grad_p,
+            "biot_stabilization": stabilization,
+            "bound_displacement_cell": disp_cell,
+            "bound_displacement_face": disp_bound,
+            "bound_displacement_pressure": disp_pressure,
+        }
+
+    def _discretize_mech_memory_bounded(
+        self, g, constit, bound_mech, alpha, eta, inverter, max_memory, num_workers
+    ):
+        """ Memory bounded discretization of poro-elasticity.
+
+        The grid is partitioned based on the estimated peak memory of the MPSA
+        discretization, and the partitions are discretized one by one (or in
+        parallel, if num_workers > 1) by _partial_discr_mech(). Rows of the face
+        and sub-face quantities are taken from the first partition where the
+        face is active, rows of cell quantities from the first partition where
+        all nodes of the cell are active.
+
+        Parameters:
+            g (core.grids.grid): grid to be discretized
+            constit, bound_mech, alpha, eta, inverter: See _local_discr_mech().
+            max_memory (double): Threshold for the estimated peak memory.
+            num_workers (int): Number of processes used for the partitions.
+                If None, the partitions are discretized sequentially.
+
+        Returns:
+            dictionary: The discretization matrices, see _local_discr_mech().
+
+        Raises:
+            ValueError if the boundary conditions are given on sub-faces.
+
+        """
+        if bound_mech.num_faces != g.num_faces:
+            raise ValueError(
+                "Memory bounded Biot discretization requires face boundary conditions"
+            )
+        nd = g.dim
+
+        # Estimate number of partitions necessary based on prescribed memory
+        # usage
+        peak_mem = mpsa._estimate_peak_memory_mpsa(g)
+        num_part = np.ceil(peak_mem / max_memory).astype(np.int)
+
+        # Let partitioning module apply the best available method
+        part = pp.partition.partition(g, num_part)
+
+        num_subfaces = g.face_nodes.indices.size
+        # Global sizes of the rows and columns of the discretization matrices
+        row_size = {
+            "stress": nd * g.num_faces,
+            "bound_stress": nd * g.num_faces,
+            "grad_p": nd * g.num_faces,
+            "div_u": g.num_cells,
+            "bound_div_u": g.num_cells,
+            "biot_stabilization": g.num_cells,
+            "bound_displacement_cell": nd * num_subfaces,
+            "bound_displacement_face": nd * num_subfaces,
+            "bound_displacement_pressure": nd * num_subfaces,
+        }
+        col_size = {
+            "stress": nd * g.num_cells,
+            "bound_stress": nd * g.num_faces,
+            "grad_p": g.num_cells,
+            "div_u": nd * g.num_cells,
+            "bound_div_u": nd * g.num_faces,
+            "biot_stabilization": g.num_cells,
+            "bound_displacement_cell": nd * g.num_cells,
+            "bound_displacement_face": nd * g.num_faces,
+            "bound_displacement_pressure": g.num_cells,
+        }
+        matrices = {
+            key: sps.csr_matrix((row_size[key], col_size[key])) for key in row_size
+        }
+
+        face_covered = np.zeros(g.num_faces, dtype=np.bool)
+        cell_covered = np.zeros(g.num_cells, dtype=np.bool)
+        # Map from sub-faces to faces
+        subface_faces = pp.utils.matrix_compression.rldecode(
+            np.arange(g.num_faces), np.diff(g.face_nodes.indptr)
+        )
+
+        # The grid and parameters are shared by all partitions
+        shared = {
+            "g": g,
+            "constit": constit,
+            "bound_mech": bound_mech,
+            "alpha": alpha,
+            "eta": eta,
+            "inverter": inverter,
+        }
+        arguments = [
+            {"nodes": active_nodes} for active_nodes in fvutils.partition_nodes(g, part)
+        ]
+
+        for loc_matrices, loc_faces, loc_cells in fvutils.map_partitions(
+            self._partial_discr_mech, arguments, num_workers, shared
+        ):
+            # Eliminate contribution from faces and cells already covered
+            eliminate_faces = fvutils.expand_indices_nd(np.where(face_covered)[0], nd)
+            eliminate_subfaces = fvutils.expand_indices_nd(
+                np.where(face_covered[subface_faces])[0], nd
+            )
+            eliminate_cells = np.where(cell_covered)[0]
+            for key in ["stress", "bound_stress", "grad_p"]:
+                fvutils.zero_out_sparse_rows(loc_matrices[key], eliminate_faces)
+            for key in ["div_u", "bound_div_u", "biot_stabilization"]:
+                fvutils.zero_out_sparse_rows(loc_matrices[key], eliminate_cells)
+            for key in [
+                "bound_displacement_cell",
+                "bound_displacement_face",
+                "bound_displacement_pressure",
+            ]:
+                fvutils.zero_out_sparse_rows(loc_matrices[key], eliminate_subfaces)
+
+            face_covered[loc_faces] = 1
+            cell_covered[loc_cells] = 1
+
+            for key in matrices:
+                matrices[key] += loc_matrices[key]
+
+        return matrices
+
+    def _partial_discr_mech(
+        self, g, constit, bound_mech, alpha, eta, inverter, nodes
+    ):
+        """ Discretize poro-elasticity on a subgrid, and return the discretization
+        in terms of global variable numbers.
+
+        The subgrid is defined by nodes, in the same way as for mpsa.mpsa_partial().
+
+        Parameters:
+            g (core.grids.grid): grid to be discretized
+            constit, bound_mech, alpha, eta, inverter: See _local_discr_mech().
+            nodes (np.array, int): Index of nodes on which to base the subgrid
+                computation.
+
+        Returns:
+            dictionary: The discretization matrices, see _local_discr_mech(), with
+                global numbering. Rows of faces that are not active, and cells
+                that have nodes outside the active nodes, are zero.
+            np.array (int): Global index of the active faces.
+            np.array (int): Global index of cells with all nodes active.
+
+        """
+        nd = g.dim
+        # Find computational stencil, based on the specified nodes.
+        ind, active_faces = fvutils.cell_ind_for_partial_update(g, nodes=nodes)
+
+        # Cells where all nodes are active. For these, the discretization of the
+        # cell quantities (div_u etc.) is complete.
+        active_vertexes = np.zeros(g.num_nodes, dtype=np.int)
+        active_vertexes[nodes] = 1
+        cn = g.cell_nodes()
+        active_cells = np.where(
+            cn.transpose() * active_vertexes == np.asarray(cn.sum(axis=0)).ravel()
+        )[0]
+
+        # Extract subgrid, together with mappings between local and global
+        # cells
+        sub_g, l2g_faces, _ = pp.partition.extract_subgrid(g, ind)
+        l2g_cells = sub_g.parent_cell_ind
+
+        # Restrict stiffness tensor to local cells
+        loc_c = constit.restrict_to_cells(l2g_cells)
+
+        # Transfer boundary conditions to the local faces
+        loc_bnd = pp.BoundaryConditionVectorial(sub_g)
+        loc_bnd.is_dir = bound_mech.is_dir[:, l2g_faces]
+        loc_bnd.is_rob = bound_mech.is_rob[:, l2g_faces]
+        loc_bnd.is_neu[loc_bnd.is_dir + loc_bnd.is_rob] = False
+        loc_bnd.robin_weight = bound_mech.robin_weight[:, :, l2g_faces]
+        loc_bnd.basis = bound_mech.basis[:, :, l2g_faces]
+
+        loc_matrices = self._local_discr_mech(
+            sub_g, loc_c, loc_bnd, alpha, eta, inverter
+        )
+
+        # Mappings from local to global faces, cells and sub-faces. The sub-faces
+        # are ordered as the face-node relation, both locally and globally.
+        face_map_nd, cell_map_nd = fvutils.map_subgrid_to_grid(
+            g, l2g_faces, l2g_cells, is_vector=True
+        )
+        _, cell_map = fvutils.map_subgrid_to_grid(
+            g, l2g_faces, l2g_cells, is_vector=False
+        )
+        indptr = g.face_nodes.indptr
+        l2g_subfaces = pp.utils.mcolon.mcolon(
+            indptr[l2g_faces], indptr[l2g_faces + 1]
+        )
+        subface_map_nd = sps.csr_matrix(
+            (
+                np.ones(l2g_subfaces.size * nd),
+                (
+                    fvutils.expand_indices_nd(l2g_subfaces, nd),
+                    np.arange(l2g_subfaces.size * nd),
+                ),
+            ),
+            shape=(g.face_nodes.indices.size * nd, l2g_subfaces.size * nd),
+        )
+
+        row_map = {
+            "stress": face_map_nd,
+            "bound_stress": face_map_nd,
+            "grad_p": face_map_nd,
+            "div_u": cell_map.T,
+            "bound_div_u": cell_map.T,
+            "biot_stabilization": cell_map.T,
+            "bound_displacement_cell": subface_map_nd,
+            "bound_displacement_face": subface_map_nd,
+            "bound_displacement_pressure": subface_map_nd,
+        }
+        col_map = {
+            "stress": cell_map_nd,
+            "bound_stress": face_map_nd.T,
+            "grad_p": cell_map,
+            "div_u": cell_map_nd,
+            "bound_div_u": face_map_nd.T,
+            "biot_stabilization": cell_map,
+            "bound_displacement_cell": cell_map_nd,
+            "bound_displacement_face": face_map_nd.T,
+            "bound_displacement_pressure": cell_map,
+        }
+        matrices = {
+            key: (row_map[key] * loc_matrices[key] * col_map[key]).tocsr()
+            for key in loc_matrices
+        }
+
+        # By design of mpsa, and the subgrids, the discretization will update faces
+        # and cells outside the active ones. Kill these.
+        outside_faces = np.setdiff1d(
+            np.arange(g.num_faces), active_faces, assume_unique=True
+        )
+        outside_subfaces = np.setdiff1d(
+            np.arange(g.face_nodes.indices.size),
+            pp.utils.mcolon.mcolon(indptr[active_faces], indptr[active_faces + 1]),
+            assume_unique=True,
+        )
+        outside_cells = np.setdiff1d(
+            np.arange(g.num_cells), active_cells, assume_unique=True
+        )
+        for key in ["stress", "bound_stress", "grad_p"]:
+            fvutils.zero_out_sparse_rows(
+                matrices[key], fvutils.expand_indices_nd(outside_faces, nd)
+            )
+        for key in ["div_u", "bound_div_u", "biot_stabilization"]:
+            fvutils.zero_out_sparse_rows(matrices[key], outside_cells)
+        for key in [
+            "bound_displacement_cell",
+            "bound_displacement_face",
+            "bound_displacement_pressure",
+        ]:
+            fvutils.zero_out_sparse_rows(
+                matrices[key], fvutils.expand_indices_nd(outside_subfaces, nd)
+            )
+
+        return matrices, active_faces, active_cells
 
     def discretize_biot_grad_p(self, g, subcell_topology, alpha, bound_exclusion):
         """
@@ -2,6 +2,9 @@
 Various FV specific utility functions.
 """
 from __future__ import division
+import collections
+import concurrent.futures
+import itertools
 import numpy as np
 import scipy.sparse as sps
 
@@ -1304,6 +1307,141 @@ def map_subgrid_to_grid(g, loc_faces, loc_cells, is_vector):
     return face_map, cell_map
 
 
+def partition_nodes(g, part):
+    """ Find the nodes of the cells in each partition of a grid.
+
+    The nodes are intended as input to the nodes keyword of the partial
+    discretization methods, so that a memory bounded discretization can be built
+    one partition at a time, with as little overlap as possible.
+
+    Parameters:
+        g (core.grids.grid): Partitioned grid.
+        part (np.array, int, size g.num_cells): Partition vector, as returned from
+            pp.partition.partition().
+
+    Returns:
+        list of np.array, int: Nodes of each partition, ordered as np.unique(part).
+
+    """
+    cn = g.cell_nodes()
+
+    nodes = []
+    for p in np.unique(part):
+        active_cells = np.zeros(g.num_cells, dtype=np.bool)
+        active_cells[part == p] = 1
+        nodes.append(np.where((cn * active_cells) > 0)[0])
+    return nodes
+
+
+def map_partitions(func, arguments, num_workers=None, shared=None):
+    """ Evaluate a function for a sequence of independent sub-problems, possibly
+    on a pool of processes.
+
+    The function is a generator, results are returned one by one in the order of
+    the arguments, so that the caller can merge the results of one sub-problem
+    before the next one is retrieved. At most num_workers sub-problems are
+    evaluated, or waiting to be retrieved, at any time.
+
+    In parallel evaluation, the shared arguments are sent once to each worker
+    process, rather than with each sub-problem. Sparse matrices in the results
+    are sent back as their non-zero rows only, and are restored to csr matrices
+    of the full size.
+
+    Parameters:
+        func (callable): Function to be evaluated. If the evaluation is done in
+            parallel, func and its arguments must be picklable, that is, func
+            should be a module level function, or a method of a picklable object.
+        arguments (list of dict): Keyword arguments for each evaluation of func.
+        num_workers (int, optional): Number of worker processes. If None or 1,
+            the evaluations are done sequentially in the current process.
+        shared (dict, optional): Keyword arguments common to all evaluations of
+            func, typically the grid and the parameters.
+
+    Yields:
+        The return value of func for each entry in arguments.
+
+    """
+    if shared is None:
+        shared = {}
+
+    if num_workers is None or num_workers <= 1 or len(arguments) < 2:
+        for kwargs in arguments:
+            yield func(**shared, **kwargs)
+        return
+
+    num_workers = min(num_workers, len(arguments))
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=num_workers, initializer=_set_shared_arguments, initargs=(shared,)
+    ) as executor:
+        arguments = iter(arguments)
+        pending = collections.deque(
+            executor.submit(_evaluate_partition, func, kwargs)
+            for kwargs in itertools.islice(arguments, num_workers)
+        )
+        while pending:
+            result = pending.popleft().result()
+            # Keep the workers busy while the caller merges the result
+            for kwargs in itertools.islice(arguments, 1):
+                pending.append(executor.submit(_evaluate_partition, func, kwargs))
+            yield _restore_rows(result)
+
+
+# Keyword arguments common to all evaluations in a worker process of
+# map_partitions, set by the initializer of the process.
+_shared_arguments = {}
+
+
+def _set_shared_arguments(shared):
+    global _shared_arguments
+    _shared_arguments = shared
+
+
+def _evaluate_partition(func, kwargs):
+    # Evaluate func in a worker process, and compress the result for transfer
+    return _compress_rows(func(**_shared_arguments, **kwargs))
+
+
+class _NonZeroRows:
+    """ The non-zero rows of a sparse matrix, see map_partitions.
+    """
+
+    def __init__(self, mat):
+        mat = sps.csr_matrix(mat)
+        self.shape = mat.shape
+        self.rows = np.where(np.diff(mat.indptr) > 0)[0]
+        self.mat = mat[self.rows]
+
+    def restore(self):
+        num_per_row = np.zeros(self.shape[0], dtype=self.mat.indptr.dtype)
+        num_per_row[self.rows] = np.diff(self.mat.indptr)
+        indptr = np.hstack((0, np.cumsum(num_per_row)))
+        return sps.csr_matrix(
+            (self.mat.data, self.mat.indices, indptr), shape=self.shape
+        )
+
+
+def _compress_rows(obj):
+    # Replace sparse matrices in (nested) results by their non-zero rows
+    if sps.issparse(obj):
+        return _NonZeroRows(obj)
+    elif isinstance(obj, dict):
+        return {key: _compress_rows(val) for key, val in obj.items()}
+    elif isinstance(obj, (list, tuple)):
+        return type(obj)(_compress_rows(val) for val in obj)
+    return obj
+
+
+def _restore_rows(obj):
+    # Inverse of _compress_rows
+    if isinstance(obj, _NonZeroRows):
+        return obj.restore()
+    elif isinstance(obj, dict):
+        return {key: _restore_rows(val) for key, val in obj.items()}
+    elif isinstance(obj, (list, tuple)):
+        return type(obj)(_restore_rows(val) for val in obj)
+    return obj
+
+
 # ------------------------------------------------------------------------------
 
 
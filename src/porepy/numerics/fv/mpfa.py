@@ -62,6 +62,11 @@ class Mpfa(FVElliptic):
                 pressure reconstruction point at faces. If not given, mpfa_eta is used.
             mpfa_inverter (str): Optional. Inverter to apply for local problems.
                 Can take values 'numba' (default), 'cython' or 'python'.
+            max_memory (double): Optional. Threshold for the estimated peak memory
+                during discretization, see self.mpfa().
+            num_workers (int): Optional. Number of processes used for the
+                sub-calculations of a memory bounded discretization, see
+                self.mpfa().
 
         matrix_dictionary will be updated with the following entries:
             flux: sps.csc_matrix (g.num_faces, g.num_cells)
@@ -90,6 +95,8 @@ class Mpfa(FVElliptic):
         eta = parameter_dictionary.get("mpfa_eta", None)
         eta_reconstruction = parameter_dictionary.get("reconstruction_eta", None)
         inverter = parameter_dictionary.get("mpfa_inverter", None)
+        max_memory = parameter_dictionary.get("max_memory", None)
+        num_workers = parameter_dictionary.get("num_workers", None)
 
         trm, bound_flux, bp_cell, bp_face = self.mpfa(
             g,
@@ -99,6 +106,8 @@ class Mpfa(FVElliptic):
             eta=eta,
             eta_reconstruction=eta_reconstruction,
             inverter=inverter,
+            max_memory=max_memory,
+            num_workers=num_workers,
         )
         matrix_dictionary["flux"] = trm
         matrix_dictionary["bound_flux"] = bound_flux
@@ -115,6 +124,7 @@ class Mpfa(FVElliptic):
         eta_reconstruction=None,
         inverter=None,
         max_memory=None,
+        num_workers=None,
         **kwargs
     ):
         """
@@ -150,7 +160,11 @@ class Mpfa(FVElliptic):
             max_memory (double): Threshold for peak memory during discretization.
                 If the **estimated** memory need is larger than the provided
                 threshold, the discretization will be split into an appropriate
-                number of sub-calculations, using mpfa_partial().
+                number of sub-calculations, using partial_discr().
+            num_workers (int): Number of processes used to discretize the
+                sub-calculations if max_memory is given. Defaults to None, in
+                which case the partitions are discretized sequentially. Note that
+                each worker has its own peak memory.
 
         Returns:
             scipy.sparse.csr_matrix (shape num_faces, num_cells): flux
@@ -225,37 +239,36 @@ class Mpfa(FVElliptic):
             # Implementation note: It should be relatively straightforward to
             # estimate the memory need of flux (face_nodes -> node_cells ->
             # unique).
-            flux = sps.csr_matrix(g.num_faces, g.num_cells)
-            bound_flux = sps.csr_matrix(g.num_faces, g.num_faces)
-            bound_pressure_cell = sps.csr_matrix(g.num_faces, g.num_cells)
-            bound_pressure_face = sps.csr_matrix(g.num_faces, g.num_faces)
-
-            cn = g.cell_nodes()
+            flux = sps.csr_matrix((g.num_faces, g.num_cells))
+            bound_flux = sps.csr_matrix((g.num_faces, g.num_faces))
+            bound_pressure_cell = sps.csr_matrix((g.num_faces, g.num_cells))
+            bound_pressure_face = sps.csr_matrix((g.num_faces, g.num_faces))
 
             face_covered = np.zeros(g.num_faces, dtype=np.bool)
 
-            for p in range(part.max()):
-                # Cells in this partitioning
-                cell_ind = np.argwhere(part == p).ravel("F")
-                # To discretize with as little overlap as possible, we use the
-                # keyword nodes to specify the update stencil. Find nodes of the
-                # local cells.
-                active_cells = np.zeros(g.num_cells, dtype=np.bool)
-                active_cells[cell_ind] = 1
-                active_nodes = np.squeeze(np.where((cn * active_cells) > 0))
-
-                # Perform local discretization.
-                loc_flux, loc_bound_flux, loc_bp_cell, loc_bp_face, loc_faces = self.partial_discr(
-                    g,
-                    k,
-                    bnd,
-                    deviation_from_plane_tol,
-                    eta=eta,
-                    eta_reconstruction=eta_reconstruction,
-                    inverter=inverter,
-                    nodes=active_nodes,
-                )
-
+            # To discretize with as little overlap as possible, we use the
+            # keyword nodes to specify the update stencil. The partitions are
+            # independent, and can be discretized in parallel. The grid and
+            # parameters are shared by all partitions.
+            shared = {
+                "g": g,
+                "k": k,
+                "bnd": bnd,
+                "deviation_from_plane_tol": deviation_from_plane_tol,
+                "eta": eta,
+                "eta_reconstruction": eta_reconstruction,
+                "inverter": inverter,
+            }
+            arguments = [
+                {"nodes": active_nodes}
+                for active_nodes in fvutils.partition_nodes(g, part)
+            ]
+
+            # Merge the local discretizations in the order of the partitions, so
+            # that the result is independent of the number of workers.
+            for loc_flux, loc_bound_flux, loc_bp_cell, loc_bp_face, loc_faces in fvutils.map_partitions(
+                self.partial_discr, arguments, num_workers, shared
+            ):
                 # Eliminate contribution from faces already covered
                 loc_flux[face_covered, :] *= 0
                 loc_bound_flux[face_covered, :] *= 0
@@ -346,9 +359,8 @@ class Mpfa(FVElliptic):
         l2g_cells = sub_g.parent_cell_ind
 
         # Local parameter fields
-        # Copy permeability field, and restrict to local cells
-        loc_k = k.copy()
-        loc_k.values = loc_k.values[::, ::, l2g_cells]
+        # Restrict permeability field to local cells
+        loc_k = k.restrict_to_cells(l2g_cells)
 
         glob_bound_face = g.get_all_boundary_faces()
 
@@ -876,7 +888,7 @@ class Mpfa(FVElliptic):
         Rough estimate of peak memory need
         """
         nd = g.dim
-        num_cell_nodes = g.cell_nodes().toarray().sum(axis=1)
+        num_cell_nodes = g.cell_nodes().sum(axis=1).A
 
         # Number of unknowns around a vertex: nd per cell that share the vertex for
         # pressure gradients, and one per cell (cell center pressure)
@@ -888,7 +900,7 @@ class Mpfa(FVElliptic):
 
         # The discretization of Darcy's law will require nd (that is, a gradient)
         # per sub-face.
-        num_sub_face = g.face_nodes.toarray().sum()
+        num_sub_face = g.face_nodes.sum()
         darcy_size = nd * num_sub_face
 
         # Balancing of fluxes will require 2*nd (gradient on both sides) fields per
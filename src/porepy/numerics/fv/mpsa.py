@@ -132,6 +132,7 @@ class Mpsa:
         partial = parameter_dictionary.get("partial_update", False)
         inverter = parameter_dictionary.get("inverter", None)
         max_memory = parameter_dictionary.get("max_memory", None)
+        num_workers = parameter_dictionary.get("num_workers", None)
 
         if not partial:
             if max_memory is None:
@@ -153,6 +154,7 @@ class Mpsa:
                     hf_eta=hf_eta,
                     inverter=inverter,
                     max_memory=max_memory,
+                    num_workers=num_workers,
                 )
                 matrix_dictionary["stress"] = stress
                 matrix_dictionary["bound_stress"] = bound_stress
@@ -531,6 +533,7 @@ def mpsa(
     max_memory=None,
     hf_disp=False,
     hf_eta=None,
+    num_workers=None,
     **kwargs
 ):
     """
@@ -578,6 +581,9 @@ def mpsa(
         hf_eta (float) None: The point of displacment on the sub-faces. hf_eta=0 gives the
             displacement at the face centers while hf_eta=1 gives the displacements at
             the nodes. If None is given, the continuity points eta will be used.
+        num_workers (int) None: Number of processes used to discretize the
+            sub-calculations if max_memory is given. If None, the partitions are
+            discretized sequentially. Note that each worker has its own peak memory.
     Returns:
         scipy.sparse.csr_matrix (shape num_faces, num_cells): stress
             discretization, in the form of mapping from cell displacement to
@@ -671,7 +677,7 @@ def mpsa(
         logger.info("Split MPSA discretization into " + str(num_part) + " parts")
 
         # Let partitioning module apply the best available method
-        part = pp.partition.partition_metis(g, num_part)
+        part = pp.partition.partition(g, num_part)
 
         # Empty fields for stress and bound_stress. Will be expanded as we go.
         # Implementation note: It should be relatively straightforward to
@@ -680,33 +686,34 @@ def mpsa(
         stress = sps.csr_matrix((g.num_faces * g.dim, g.num_cells * g.dim))
         bound_stress = sps.csr_matrix((g.num_faces * g.dim, g.num_faces * g.dim))
 
-        cn = g.cell_nodes()
-
         face_covered = np.zeros(g.num_faces, dtype=np.bool)
 
-        for p in np.unique(part):
-            # Cells in this partitioning
-            cell_ind = np.argwhere(part == p).ravel("F")
-            # To discretize with as little overlap as possible, we use the
-            # keyword nodes to specify the update stencil. Find nodes of the
-            # local cells.
-            active_cells = np.zeros(g.num_cells, dtype=np.bool)
-            active_cells[cell_ind] = 1
-            active_nodes = np.squeeze(np.where((cn * active_cells) > 0))
-
-            # Perform local discretization.
-            loc_stress, loc_bound_stress, loc_faces = mpsa_partial(
-                g,
-                constit,
-                bound,
-                eta=eta,
-                inverter=inverter,
-                nodes=active_nodes,
-                hf_disp=False,
-            )
-
+        # To discretize with as little overlap as possible, we use the
+        # keyword nodes to specify the update stencil. The partitions are
+        # independent, and can be discretized in parallel. The grid and
+        # parameters are shared by all partitions.
+        shared = {
+            "g": g,
+            "constit": constit,
+            "bound": bound,
+            "eta": eta,
+            "inverter": inverter,
+            "hf_disp": False,
+        }
+        arguments = [
+            {"nodes": active_nodes}
+            for active_nodes in pp.fvutils.partition_nodes(g, part)
+        ]
+
+        # Merge the local discretizations in the order of the partitions, so
+        # that the result is independent of the number of workers.
+        for loc_stress, loc_bound_stress, loc_faces in pp.fvutils.map_partitions(
+            mpsa_partial, arguments, num_workers, shared
+        ):
             # Eliminate contribution from faces already covered
-            eliminate_ind = pp.fvutils.expand_indices_nd(face_covered, g.dim)
+            eliminate_ind = pp.fvutils.expand_indices_nd(
+                np.where(face_covered)[0], g.dim
+            )
             pp.fvutils.zero_out_sparse_rows(loc_stress, eliminate_ind)
             pp.fvutils.zero_out_sparse_rows(loc_bound_stress, eliminate_ind)
 
@@ -909,13 +916,9 @@ def mpsa_partial(
     sub_g, l2g_faces, _ = pp.partition.extract_subgrid(g, ind)
     l2g_cells = sub_g.parent_cell_ind
 
-    # Copy stiffness tensor, and restrict to local cells
-    loc_c = constit.copy()
-    loc_c.values = loc_c.values[::, ::, l2g_cells]
-    # Also restrict the lambda and mu fields; we will copy the stiffness
-    # tensors later.
-    loc_c.lmbda = loc_c.lmbda[l2g_cells]
-    loc_c.mu = loc_c.mu[l2g_cells]
+    # Restrict stiffness tensor to local cells. This also restricts the lambda
+    # and mu fields; we will copy the stiffness tensors later.
+    loc_c = constit.restrict_to_cells(l2g_cells)
 
     # Boundary conditions are slightly more complex. Find local faces
     # that are on the global boundary.
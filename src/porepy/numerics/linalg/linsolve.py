@@ -8,6 +8,7 @@ Created on Thu Nov  2 19:08:28 2017
 @author: Eirik Keilegavlen
 """
 import numpy as np
+import scipy.sparse as sps
 import scipy.sparse.linalg as spl
 import logging
 
@@ -37,6 +38,218 @@ class IterCounter(object):
             logger.info("iter %3i\trk = %s" % (self.niter, str(rk)))
 
 
+def rigid_body_modes(g):
+    """ Rigid body modes of a grid, for use as near null space of linear elasticity.
+
+    The modes are the translations in each coordinate direction, and the
+    rotations (one in 2d, three in 3d) about the center of the grid. The
+    displacements are ordered cell-wise, that is, [u_x, u_y(, u_z)] for the
+    first cell, then the second cell etc., as in the Mpsa discretizations.
+
+    Smoothed aggregation AMG for elasticity needs these modes to build a good
+    coarse space; the default near null space (a vector of ones) is only
+    suited for scalar equations.
+
+    Parameters:
+        g (pp.Grid): Grid with computed geometry.
+
+    Returns:
+        np.ndarray (g.dim * g.num_cells, num_modes): The rigid body modes.
+
+    """
+    nd = g.dim
+    x = g.cell_centers[:nd]
+    x = x - np.mean(x, axis=1).reshape((-1, 1))
+
+    if nd == 2:
+        rotations = [(0, 1)]
+    elif nd == 3:
+        rotations = [(1, 2), (2, 0), (0, 1)]
+    else:
+        rotations = []
+
+    modes = np.zeros((nd, g.num_cells, nd + len(rotations)))
+    for k in range(nd):
+        modes[k, :, k] = 1
+    # Rotation in the plane of axes i and j
+    for r, (i, j) in enumerate(rotations):
+        modes[i, :, nd + r] = -x[j]
+        modes[j, :, nd + r] = x[i]
+
+    return modes.transpose((1, 0, 2)).reshape((nd * g.num_cells, -1))
+
+
+class LUCache:
+    """ Reuse of an LU factorization for a sequence of similar linear systems.
+
+    In Newton iterations and time stepping, the system matrix often changes only
+    slightly between the solves. The class keeps the LU factorization of a
+    previous matrix, and uses it for new matrices in one of two ways:
+
+        mode="preconditioner": The system is solved by GMRES, preconditioned
+            with the stored factorization. If GMRES does not converge within
+            max_iterations iterations, the matrix is refactorized, and the
+            system is solved directly.
+        mode="modified_newton": The stored factorization is applied directly,
+            as in modified Newton methods, followed by iterative refinement
+            with the same factorization. If the relative residual does not
+            reach max_residual within max_iterations refinement steps, the
+            matrix is refactorized, and the system is solved directly.
+
+    In addition, the matrix is refactorized if its size changes, if more than
+    refactorize_every solves have been made with the same factorization, or if
+    self.reset() has been called. The Newton loops of the contact mechanics
+    models call reset() if the Newton error is not sufficiently reduced.
+
+    An LUCache object can be passed directly as the solver argument of the
+    contact mechanics models, since it can be called as solver(assembler, A, b):
+
+        cache = LUCache()
+        run_biot(setup, solver=cache)
+        print(cache)
+
+    Attributes:
+        num_factorizations (int): Number of LU factorizations computed.
+        num_solves (int): Number of linear systems solved.
+        num_iterations (int): Total number of GMRES iterations, or refinement
+            steps in the modified Newton mode.
+
+    """
+
+    def __init__(
+        self,
+        mode="preconditioner",
+        tol=1e-10,
+        max_iterations=20,
+        max_residual=None,
+        refactorize_every=None,
+    ):
+        """
+        Parameters:
+            mode (str, optional): Either "preconditioner" (default) or
+                "modified_newton", see class documentation.
+            tol (double, optional): Relative tolerance for GMRES. Defaults to
+                1e-10.
+            max_iterations (int, optional): Maximum number of GMRES iterations,
+                or refinement steps in the modified Newton mode, before the
+                matrix is refactorized. Defaults to 20.
+            max_residual (double, optional): Maximum relative residual accepted
+                in the modified Newton mode. A larger value gives an inexact
+                solution, which may slow down the Newton iterations. Defaults to
+                None, in which case tol is used.
+            refactorize_every (int, optional): Maximum number of solves with
+                the same factorization. Defaults to None (no limit).
+
+        """
+        if mode not in ("preconditioner", "modified_newton"):
+            raise ValueError("Unknown mode for LU cache " + str(mode))
+        self.mode = mode
+        self.tol = tol
+        self.max_iterations = max_iterations
+        self.max_residual = tol if max_residual is None else max_residual
+        self.refactorize_every = refactorize_every
+
+        self._lu = None
+        self._num_reuse = 0
+
+        self.num_factorizations = 0
+        self.num_solves = 0
+        self.num_iterations = 0
+
+    def __repr__(self):
+        s = "LU cache in mode " + self.mode + "\n"
+        s += str(self.num_factorizations) + " factorizations, "
+        s += str(self.num_solves) + " solves, "
+        s += str(self.num_iterations) + " iterations\n"
+        return s
+
+    def __call__(self, assembler, A, b):
+        """ Solve a linear system, with the signature of the solver argument of
+        the contact mechanics models, see self.solve().
+
+        Parameters:
+            assembler (pp.Assembler): Not used.
+            A (sps.spmatrix): System matrix.
+            b (np.ndarray): Right hand side.
+
+        Returns:
+            np.ndarray: Solution of the system.
+
+        """
+        return self.solve(A, b)
+
+    def reset(self):
+        """ Force refactorization at the next solve.
+        """
+        self._lu = None
+
+    def solve(self, A, b):
+        """ Solve a linear system, reusing the stored factorization if possible.
+
+        Parameters:
+            A (sps.spmatrix): System matrix.
+            b (np.ndarray): Right hand side.
+
+        Returns:
+            np.ndarray: Solution of the system.
+
+        """
+        self.num_solves += 1
+
+        refactorize = (
+            self._lu is None
+            or self._lu.shape != A.shape
+            or (
+                self.refactorize_every is not None
+                and self._num_reuse >= self.refactorize_every
+            )
+        )
+        if refactorize:
+            return self._factorize_and_solve(A, b)
+
+        self._num_reuse += 1
+        if self.mode == "preconditioner":
+            M = spl.LinearOperator(A.shape, self._lu.solve)
+            counter = IterCounter(disp=False)
+            x, info = spl.gmres(
+                A,
+                b,
+                M=M,
+                tol=self.tol,
+                restart=self.max_iterations,
+                maxiter=1,
+                callback=counter,
+                callback_type="pr_norm",
+            )
+            self.num_iterations += counter.niter
+            converged = info == 0
+        else:
+            x = self._lu.solve(b)
+            max_residual = self.max_residual * np.linalg.norm(b)
+            residual = b - A * x
+            num_refinements = 0
+            while (
+                np.linalg.norm(residual) > max_residual
+                and num_refinements < self.max_iterations
+            ):
+                x += self._lu.solve(residual)
+                residual = b - A * x
+                num_refinements += 1
+            self.num_iterations += num_refinements
+            converged = np.linalg.norm(residual) <= max_residual
+
+        if not converged:
+            logger.info("Reuse of LU factorization failed, refactorize")
+            return self._factorize_and_solve(A, b)
+        return x
+
+    def _factorize_and_solve(self, A, b):
+        self._lu = spl.splu(sps.csc_matrix(A))
+        self._num_reuse = 0
+        self.num_factorizations += 1
+        return self._lu.solve(b)
+
+
 class Factory:
     """ Factory class for linear solver functionality. The intention is to
     provide a single entry point for all relevant linear solvers. Hopefully,
@@ -218,8 +431,117 @@ class Factory:
         else:
             return solve
 
+    def block_preconditioner(
+        self,
+        A,
+        blocks,
+        solvers=None,
+        form="lower",
+        stabilization=None,
+        null_spaces=None,
+    ):
+        """ Block triangular, or block diagonal, preconditioner.
+
+        The unknowns are split into blocks, typically one per physical variable
+        (say, displacement, pressure, mortar variables). The preconditioner
+        approximates the inverse of A by a block Gauss-Seidel sweep (lower or upper
+        triangular form) or a block Jacobi sweep (diagonal form), where the
+        diagonal blocks are inverted by the specified solvers.
+
+        A fixed-stress type preconditioner for poro-elasticity is obtained by
+        ordering the mechanics block before the flow block in a lower triangular
+        form, and adding the fixed-stress stabilization term to the flow block by
+        the stabilization argument.
+
+        Parameters:
+            A (sps.spmatrix): Matrix to be preconditioned.
+            blocks (list of np.ndarray): Indices of the unknowns in each block.
+                The blocks should be disjoint and cover all unknowns, and are
+                treated in the given order.
+            solvers (list, optional): Solver for each diagonal block. Either one of
+                the strings "lu", "ilu", "amg" or "direct" (see the corresponding
+                methods of this class), or a function that takes a matrix and
+                returns a function that approximates the action of its inverse.
+                Defaults to "lu" for all blocks.
+            form (str, optional): Form of the preconditioner, either "lower",
+                "upper" or "diagonal". Defaults to "lower".
+            stabilization (dict, optional): Matrices that are added to the
+                diagonal blocks before the solvers are constructed. The keys are
+                block numbers, the values sparse matrices of the size of the block.
+            null_spaces (dict, optional): Near null spaces for blocks solved with
+                "amg", see self.amg(). The keys are block numbers. For the
+                displacement block of elasticity, rigid_body_modes() should be
+                used.
+
+        Returns:
+            scipy.sparse.LinearOperator: Ready to be used as a preconditioner.
+
+        """
+        if form not in ("lower", "upper", "diagonal"):
+            raise ValueError("Unknown form of block preconditioner " + str(form))
+        if solvers is None:
+            solvers = ["lu"] * len(blocks)
+        if stabilization is None:
+            stabilization = {}
+        if null_spaces is None:
+            null_spaces = {}
+
+        A = sps.csr_matrix(A)
+        blocks = [np.asarray(ind, dtype=np.int) for ind in blocks]
+
+        # Rows of A for each block, used to compute the block residuals, and the
+        # solvers for the diagonal blocks.
+        rows = []
+        block_solvers = []
+        for bi, (ind, solver) in enumerate(zip(blocks, solvers)):
+            A_rows = A[ind]
+            A_block = A_rows[:, ind]
+            if bi in stabilization:
+                A_block = A_block + stabilization[bi]
+            rows.append(A_rows)
+            block_solvers.append(
+                self.__block_solver(
+                    sps.csc_matrix(A_block), solver, null_spaces.get(bi, None)
+                )
+            )
+
+        order = np.arange(len(blocks))
+        if form == "upper":
+            order = order[::-1]
+
+        def precond(r):
+            r = np.asarray(r).ravel()
+            x = np.zeros(A.shape[0], dtype=np.result_type(r, A.dtype))
+            for bi in order:
+                ind = blocks[bi]
+                if form == "diagonal":
+                    res = r[ind]
+                else:
+                    # The blocks not treated yet have zero values in x, thus this
+                    # is the residual of the triangular system.
+                    res = r[ind] - rows[bi] * x
+                x[ind] = block_solvers[bi](res)
+            return x
+
+        return spl.LinearOperator(A.shape, precond)
+
     #### Helper functions below
 
+    def __block_solver(self, A, solver, null_space=None):
+        # Represent the inverse of a diagonal block as a function
+        if callable(solver):
+            return solver(A)
+        elif solver == "lu":
+            return self.lu(A)
+        elif solver == "ilu":
+            return self.ilu(A).matvec
+        elif solver == "amg":
+            return self.amg(A, null_space=null_space, as_precond=True).matvec
+        elif solver == "direct":
+            return self.direct(A)
+        else:
+            raise ValueError("Unknown block solver " + str(solver))
+
     def __extract_krylov_args(self, **kwargs):
         d = {}
         d["x0"] = kwargs.get("x0", None)
@@ -241,7 +563,6 @@ class Factory:
         d = {}
         d["permc_spec"] = kwargs.get("permc_spec", None)
         d["diag_pivot_thresh"] = kwargs.get("diag_pivot_thresh", None)
-        d["drop_tol"] = kwargs.get("drop_tol", None)
         d["relax"] = kwargs.get("relax", None)
         d["panel_size"] = kwargs.get("panel_size", None)
         return d
@@ -4,6 +4,9 @@
 The module contains the Assembler class, which is responsible for assembly of
 system matrix and right hand side for a general multi-domain, multi-physics problem.
 """
+import concurrent.futures
+import functools
+
 import numpy as np
 import scipy.sparse as sps
 import porepy as pp
@@ -51,6 +54,15 @@ class Assembler:
 
         self._identify_dofs()
 
+        # Book keeping for incremental assembly: Local matrices and right hand
+        # sides from the previous assembly, identified by the node / edge,
+        # variables and term, and the set of these that must be reassembled.
+        self._assembled_units = None
+        self._assembled_terms = None
+        self._dirty_units = set()
+        # Sparsity pattern of the global matrix, used in incremental assembly
+        self._pattern = None
+
     def discretization_key(self, row, col=None):
         if col is None or row == col:
             return row
@@ -100,7 +112,13 @@ class Assembler:
             # Coupling between edge and node
             return "_".join([term, key_1, key_2, key_3])
 
-    def assemble_matrix_rhs(self, matrix_format="csr", add_matrices=True):
+    def assemble_matrix_rhs(
+        self,
+        matrix_format="csr",
+        add_matrices=True,
+        incremental=False,
+        reuse_matrix=False,
+    ):
         """ Assemble the system matrix and right hand side for a general linear
         multi-physics problem, and return a block matrix and right hand side.
 
@@ -129,6 +147,27 @@ class Assembler:
             add_matrices (boolean, optional): If True, a single system matrix is added,
                 else, separate matrices for each variable and term are returned in a
                 dictionary.
+            incremental (boolean, optional): If True, only the blocks that are marked
+                as dirty since the previous incremental assembly are reassembled,
+                together with coupling terms that depend on them. Blocks are marked
+                as dirty when they are discretized by self.discretize(), or by
+                self.mark_dirty(). The other blocks, including their right hand
+                sides, are reused from the previous assembly; thus blocks with a
+                right hand side that depends on changing data (boundary values,
+                previous time steps) must be marked explicitly. Defaults to False,
+                in which case all blocks are assembled.
+                If add_matrices is also True and matrix_format is csr or csc, the
+                global matrix is assembled by scattering the values into a
+                preallocated matrix with a precomputed sparsity pattern.
+            reuse_matrix (boolean, optional): Only used for incremental assembly
+                into a preallocated matrix, see incremental. If True, the
+                preallocated matrix itself is returned, and the next incremental
+                assembly overwrites its values; the matrix should then not be
+                kept across assemblies. If False, a copy is returned, at the cost
+                of copying the matrix in each assembly; callers that assemble
+                repeatedly, say in a Newton loop, and do not keep the matrix
+                should therefore pass True. Defaults to False, so that returned
+                matrices are never modified behind the caller's back.
 
         Returns:
             scipy sparse matrix, or dictionary of matrices: Discretization matrix,
@@ -154,19 +193,51 @@ class Assembler:
             else:
                 return self._initialize_matrix_rhs(sps_matrix)
 
+        # Scatter into a preallocated global matrix if requested.
+        use_pattern = incremental and add_matrices and matrix_format in ("csr", "csc")
+
+        # Incremental assembly is only possible if there is a previous assembly
+        # with the same matrix format.
+        incremental = (
+            incremental
+            and self._assembled_units is not None
+            and self._assembled_units.get("matrix_format") == matrix_format
+        )
+        if not incremental:
+            self._assembled_units = {"matrix_format": matrix_format}
+            self._assembled_terms = {}
+
         # Assemble
-        matrix, rhs = self._operate_on_gb("assemble", matrix_format=matrix_format)
+        matrix, rhs, changed_terms = self._operate_on_gb(
+            "assemble", matrix_format=matrix_format, incremental=incremental
+        )
+        self._dirty_units = set()
+
+        if use_pattern:
+            full_rhs = np.zeros(np.sum(self.full_dof))
+            for vec in rhs.values():
+                full_rhs += np.concatenate(tuple(vec))
+            full_matrix = self._scatter_to_pattern(matrix, matrix_format)
+            if not reuse_matrix:
+                full_matrix = full_matrix.copy()
+            return full_matrix, full_rhs
 
         # At this stage, all assembly is done. The remaining step is optionally to
         # add the matrices associated with different terms, and anyhow convert
-        # the matrix to a sps. block matrix.
+        # the matrix to a sps. block matrix. Terms without changed blocks are
+        # reused from the previous assembly.
+        for k, v in matrix.items():
+            if k in changed_terms or k not in self._assembled_terms:
+                self._assembled_terms[k] = sps.bmat(v, matrix_format)
+            matrix[k] = self._assembled_terms[k]
+
         if add_matrices:
             size = np.sum(self.full_dof)
             full_matrix = sps_matrix((size, size))
             full_rhs = np.zeros(size)
 
             for mat in matrix.values():
-                full_matrix += sps.bmat(mat, matrix_format)
+                full_matrix += mat
 
             for vec in rhs.values():
                 full_rhs += np.concatenate(tuple(vec))
@@ -174,14 +245,178 @@ class Assembler:
             return full_matrix, full_rhs
 
         else:
-            for k, v in matrix.items():
-                matrix[k] = sps.bmat(v, matrix_format)
             for k, v in rhs.items():
                 rhs[k] = np.concatenate(tuple(v))
 
             return matrix, rhs
 
-    def discretize(self, variable_filter=None, term_filter=None, grid=None):
+    def _scatter_to_pattern(self, matrix, matrix_format):
+        """ Add the block matrices of all terms into a global matrix, using a
+        precomputed sparsity pattern.
+
+        The pattern, and the map from the entries of each block to the data array
+        of the global matrix, is computed in a symbolic phase which is only
+        repeated if the sparsity structure of the blocks changes. The values are
+        then added in place to the data of a preallocated global matrix.
+
+        Parameters:
+            matrix (dict): For each term, an np.ndarray of block matrices, as
+                produced by self._operate_on_gb("assemble").
+            matrix_format (str): Either "csr" or "csc".
+
+        Returns:
+            sps.spmatrix: Global matrix, in the specified format. The matrix is
+                reused, and overwritten, by the next call.
+
+        """
+        convert = "tocsr" if matrix_format == "csr" else "tocsc"
+
+        # Collect the non-empty blocks in canonical format (sorted indices, no
+        # duplicates), so that the structure of a block can be compared with that
+        # of the previous assembly.
+        blocks = []
+        for term, mat in matrix.items():
+            for bi, bj in np.ndindex(*mat.shape):
+                if mat[bi, bj] is None:
+                    continue
+                block = getattr(mat[bi, bj], convert)()
+                if block.nnz == 0:
+                    continue
+                if not block.has_canonical_format:
+                    # The conversion returns the block itself if it is already in
+                    # the right format. Copy it, to not modify matrices that may
+                    # be owned by the discretizations.
+                    if block is mat[bi, bj]:
+                        block = block.copy()
+                    block.sum_duplicates()
+                blocks.append(((term, bi, bj), block))
+
+        if not self._pattern_is_valid(blocks, matrix_format):
+            self._symbolic_assembly(blocks, matrix_format)
+
+        global_matrix = self._pattern["matrix"]
+        data = global_matrix.data
+        data[:] = 0
+        for (key, block), ind in zip(blocks, self._pattern["maps"]):
+            # The entries of a canonical block map to distinct positions, thus
+            # in-place fancy indexing is safe.
+            data[ind] += block.data
+        return global_matrix
+
+    def _pattern_is_valid(self, blocks, matrix_format):
+        """ Check if the sparsity structure of the blocks is the same as that used
+        to compute the stored pattern.
+
+        The block keys, shapes and number of entries are always compared. The
+        index arrays are only compared if they are not the arrays seen when the
+        pattern was computed; blocks that are reused from the previous assembly
+        are thus checked in constant time.
+        """
+        pattern = self._pattern
+        if pattern is None or pattern["matrix_format"] != matrix_format:
+            return False
+        if len(pattern["blocks"]) != len(blocks):
+            return False
+        for i, ((key, block), known) in enumerate(zip(blocks, pattern["blocks"])):
+            known_key, shape, nnz, indptr, indices = known
+            if key != known_key or block.shape != shape or block.nnz != nnz:
+                return False
+            if block.indptr is indptr and block.indices is indices:
+                continue
+            if not (
+                np.array_equal(block.indptr, indptr)
+                and np.array_equal(block.indices, indices)
+            ):
+                return False
+            # Same structure, refer to the new index arrays in the next check
+            pattern["blocks"][i] = (key, shape, nnz, block.indptr, block.indices)
+        return True
+
+    def _symbolic_assembly(self, blocks, matrix_format):
+        """ Compute the union sparsity pattern of the blocks in the global matrix,
+        and the map from the entries of each block to the global data array.
+        """
+        size = np.sum(self.full_dof)
+        offset = np.hstack((0, np.cumsum(self.full_dof)))
+
+        # Global major (row for csr, column for csc) and minor indices of all
+        # block entries.
+        major, minor = [], []
+        for (_, bi, bj), block in blocks:
+            if matrix_format == "csr":
+                major_offset, minor_offset = offset[bi], offset[bj]
+            else:
+                major_offset, minor_offset = offset[bj], offset[bi]
+            num_major = block.indptr.size - 1
+            major.append(
+                major_offset + np.repeat(np.arange(num_major), np.diff(block.indptr))
+            )
+            minor.append(minor_offset + block.indices)
+
+        if len(blocks) > 0:
+            linear = np.hstack(major).astype(np.int64) * size + np.hstack(minor)
+        else:
+            linear = np.zeros(0, dtype=np.int64)
+        unique_linear, global_ind = np.unique(linear, return_inverse=True)
+
+        indptr = np.hstack(
+            (0, np.cumsum(np.bincount(unique_linear // size, minlength=size)))
+        )
+        indices = unique_linear % size
+        data = np.zeros(unique_linear.size)
+        if matrix_format == "csr":
+            global_matrix = sps.csr_matrix((data, indices, indptr), shape=(size, size))
+        else:
+            global_matrix = sps.csc_matrix((data, indices, indptr), shape=(size, size))
+
+        # Split the global indices into one map per block
+        num_entries = np.cumsum([block.nnz for _, block in blocks])
+        maps = np.split(global_ind, num_entries[:-1]) if len(blocks) > 0 else []
+
+        self._pattern = {
+            "matrix_format": matrix_format,
+            "matrix": global_matrix,
+            "maps": maps,
+            # The index arrays are referred to, not copied; a block that gets
+            # new index arrays is compared by value in the next check.
+            "blocks": [
+                (key, block.shape, block.nnz, block.indptr, block.indices)
+                for key, block in blocks
+            ],
+        }
+
+    def mark_dirty(self, variable_filter=None, term_filter=None, grid=None):
+        """ Mark blocks to be reassembled in the next incremental assembly.
+
+        The blocks are identified as in self.discretize(), which also marks the
+        discretized blocks as dirty. The method should be used for blocks where the
+        data, but not the discretization, has changed, for instance boundary values
+        that enter the right hand side.
+
+        Parameters:
+            variable_filter (optional): List of variables to be marked. If None
+                (default), all active variables are marked.
+            term_filter (optional): List of terms to be marked. If None (default),
+                all terms for all active variables are marked.
+            grid (pp.Grid, optional): Grid in GridBucket. If specified, only this
+                grid will be considered.
+
+        """
+        self._operate_on_gb(
+            "mark_dirty",
+            variable_filter=variable_filter,
+            term_filter=term_filter,
+            grid=grid,
+        )
+
+    def discretize(
+        self,
+        variable_filter=None,
+        term_filter=None,
+        grid=None,
+        cache=None,
+        num_workers=None,
+    ):
         """ Run the discretization operation on discretizations specified in
         the mixed-dimensional grid.
 
@@ -229,24 +464,96 @@ class Assembler:
                 (default), all terms for all active variables are discretized.
             g (pp.Grid, optional): Grid in GridBucket. If specified, only this
                 grid will be considered.
+            cache (pp.DiscretizationCache, optional): If provided, discretizations
+                on the nodes of the GridBucket are loaded from the cache if the grid,
+                parameters and discretization are unchanged from a previous
+                discretization, and stored in the cache otherwise. Discretizations
+                on edges are always computed.
+            num_workers (int, optional): Number of threads used to discretize. If
+                larger than 1, discretizations on different nodes are run in
+                parallel, starting with the largest grids. Coupling
+                discretizations are run when all node discretizations are done,
+                with edges that share a node in separate rounds. Defaults to
+                None, which gives sequential discretization.
 
         """
-        self._operate_on_gb(
+        node_tasks, edge_tasks = self._operate_on_gb(
             "discretize",
             variable_filter=variable_filter,
             term_filter=term_filter,
             grid=grid,
+            cache=cache,
+        )
+        self._run_discretization_tasks(node_tasks, edge_tasks, num_workers)
+
+    def _run_discretization_tasks(self, node_tasks, edge_tasks, num_workers):
+        """ Run the discretizations identified by self._operate_on_gb("discretize").
+
+        All discretizations on a node, or on an edge, are run in sequence, in a
+        single task, since they modify the same data dictionary. The coupling
+        discretizations may also modify the data of the neighboring nodes, thus
+        edges are grouped into rounds where no two edges share a node.
+
+        Parameters:
+            node_tasks (dict): For each grid, a list of functions (without
+                arguments) that run the discretizations on the grid.
+            edge_tasks (dict): For each edge, a list of functions that run the
+                discretizations on the edge and its couplings.
+            num_workers (int): Number of threads. If None or less than 2, the
+                tasks are run sequentially.
+
+        """
+
+        def run(tasks):
+            for task in tasks:
+                task()
+
+        if num_workers is None or num_workers < 2:
+            for tasks in node_tasks.values():
+                run(tasks)
+            for tasks in edge_tasks.values():
+                run(tasks)
+            return
+
+        # Schedule the most expensive grids first, estimated by the size of the
+        # grids, for a better load balance.
+        grids = sorted(
+            node_tasks.keys(), key=lambda g: g.num_cells + g.num_faces, reverse=True
         )
 
+        # Greedy coloring of the edges: An edge is placed in the first round
+        # where none of its nodes are used.
+        rounds = []
+        for e in edge_tasks.keys():
+            for grids_in_round, edges in rounds:
+                if not grids_in_round.intersection(e):
+                    break
+            else:
+                grids_in_round, edges = set(), []
+                rounds.append((grids_in_round, edges))
+            grids_in_round.update(e)
+            edges.append(e)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers) as pool:
+            # The coupling discretizations depend on the node discretizations,
+            # so all node tasks must finish before the edges are started. Calling
+            # result() also raises exceptions from the tasks.
+            for future in [pool.submit(run, node_tasks[g]) for g in grids]:
+                future.result()
+            for _, edges in rounds:
+                for future in [pool.submit(run, edge_tasks[e]) for e in edges]:
+                    future.result()
+
     def _operate_on_gb(self, operation, **kwargs):
         """ Helper method, loop over the GridBucket, identify nodes / edges
         variables and discretizations, and perform an operation on these.
 
-        Implemented actions are discretizaiton and assembly.
+        Implemented actions are discretizaiton, assembly, and marking of blocks to
+        be reassembled.
 
         """
 
-        if operation == "discretize":
+        if operation in ("discretize", "mark_dirty"):
             variable_keys = kwargs.get("variable_filter", None)
             if variable_keys is None:
                 variable_filter = lambda x: True
@@ -257,6 +564,10 @@ class Assembler:
                 term_filter = lambda x: True
             else:
                 term_filter = lambda x: x in term_keys
+            cache = kwargs.get("cache", None)
+            # Discretization operations on each node and edge, to be run after
+            # the loop.
+            node_tasks, edge_tasks = {}, {}
         elif operation == "assemble":
             # Initialize the global matrix.
             # This gives us a set of matrices (essentially one per term per variable)
@@ -273,6 +584,16 @@ class Assembler:
 
             matrix, rhs = self._initialize_matrix_rhs(sps_matrix)
 
+            # Reuse local matrices from previous assembly, unless they are dirty.
+            # Names of terms where the global matrix changes are collected, so
+            # that the unchanged terms need not be converted to a global matrix.
+            incremental = kwargs.get("incremental", False)
+            reuse = lambda unit: incremental and unit not in self._dirty_units
+            changed_terms = set()
+            # Blocks (term, block index) of node matrices that have changed. These
+            # are input to the coupling terms, which must then be recomputed.
+            changed_blocks = set()
+
         else:
             # We will only reach this if someone has invoked this private method
             # from the outside.
@@ -304,22 +625,39 @@ class Assembler:
                         # Loop over all discretizations
                         for term, d in discr.items():
 
-                            if operation == "discretize":
+                            if operation in ("discretize", "mark_dirty"):
                                 if (
                                     variable_filter(row)
                                     and variable_filter(col)
                                     and term_filter(term)
                                 ):
-                                    d.discretize(g, data)
+                                    if operation == "discretize" and cache is None:
+                                        node_tasks.setdefault(g, []).append(
+                                            functools.partial(d.discretize, g, data)
+                                        )
+                                    elif operation == "discretize":
+                                        node_tasks.setdefault(g, []).append(
+                                            functools.partial(
+                                                cache.discretize, d, g, data
+                                            )
+                                        )
+                                    self._dirty_units.add((g, row, col, term))
                             elif operation == "assemble":
-                                # Assemble the matrix and right hand side. This will also
-                                # discretize if not done before.
-                                loc_A, loc_b = d.assemble_matrix_rhs(g, data)
-
                                 # Assign values in global matrix: Create the same key used
                                 # defined when initializing matrices (see that function)
                                 var_key_name = self._variable_term_key(term, row, col)
 
+                                unit = (g, row, col, term)
+                                if reuse(unit):
+                                    loc_A, loc_b = self._assembled_units[unit]
+                                else:
+                                    # Assemble the matrix and right hand side. This will
+                                    # also discretize if not done before.
+                                    loc_A, loc_b = d.assemble_matrix_rhs(g, data)
+                                    self._assembled_units[unit] = (loc_A, loc_b)
+                                    changed_terms.add(var_key_name)
+                                    changed_blocks.add((var_key_name, ri, ci))
+
                                 # Check if the current block is None or not, it could
                                 # happend based on the problem setting. Better to stay
                                 # on the safe side.
@@ -359,21 +697,33 @@ class Assembler:
                     else:
                         # Loop over all discretizations
                         for term, d in discr.items():
-                            if operation == "discretize":
+                            if operation in ("discretize", "mark_dirty"):
                                 if (
                                     variable_filter(row)
                                     and variable_filter(col)
                                     and term_filter(term)
                                 ):
-                                    d.discretize(g, data)
+                                    if operation == "discretize":
+                                        edge_tasks.setdefault(e, []).append(
+                                            functools.partial(
+                                                d.discretize, g, data_edge
+                                            )
+                                        )
+                                    self._dirty_units.add((e, row, col, term))
                             elif operation == "assemble":
-                                # Assemble the matrix and right hand side. This will also
-                                # discretize if not done before.
-
-                                loc_A, loc_b = d.assemble_matrix_rhs(g, data_edge)
-
                                 # Assign values in global matrix
                                 var_key_name = self._variable_term_key(term, row, col)
+
+                                unit = (e, row, col, term)
+                                if reuse(unit):
+                                    loc_A, loc_b = self._assembled_units[unit]
+                                else:
+                                    # Assemble the matrix and right hand side. This will
+                                    # also discretize if not done before.
+                                    loc_A, loc_b = d.assemble_matrix_rhs(g, data_edge)
+                                    self._assembled_units[unit] = (loc_A, loc_b)
+                                    changed_terms.add(var_key_name)
+                                    changed_blocks.add((var_key_name, ri, ci))
                                 # Check if the current block is None or not, it could
                                 # happend based on the problem setting. Better to stay
                                 # on the safe side.
@@ -462,46 +812,71 @@ class Assembler:
                 # used. The fourth alternative, none of them are active, is not
                 # considered valid, and raises an error message.
                 if mi is not None and si is not None:
-                    if operation == "discretize":
+                    if operation in ("discretize", "mark_dirty"):
                         if (
                             variable_filter(master_key)
                             and variable_filter(slave_key)
                             and variable_filter(edge_key)
                         ):
-                            e_discr.discretize(
-                                g_master, g_slave, data_master, data_slave, data_edge
-                            )
+                            if operation == "discretize":
+                                edge_tasks.setdefault(e, []).append(
+                                    functools.partial(
+                                        e_discr.discretize,
+                                        g_master,
+                                        g_slave,
+                                        data_master,
+                                        data_slave,
+                                        data_edge,
+                                    )
+                                )
+                            self._dirty_units.add((e, coupling_key))
 
                     elif operation == "assemble":
+                        unit = (e, coupling_key)
+                        # The coupling must be recomputed if the discretization of
+                        # the master or slave variable has changed.
+                        input_blocks = [
+                            (mat_key_master, mi, mi),
+                            (mat_key_slave, si, si),
+                        ]
+                        if reuse(unit) and not changed_blocks.intersection(
+                            input_blocks
+                        ):
+                            tmp_mat, loc_rhs = self._assembled_units[unit]
+                        else:
+                            # Assign a local matrix, which will be populated with the
+                            # current state of the local system.
+                            # Local here refers to the variable and term on the two
+                            # nodes, together with the relavant mortar variable and
+                            # term. Associate the first variable with master, the
+                            # second with slave, and the final with edge.
+                            loc_mat, _ = self._assign_matrix_vector(
+                                self.full_dof[[mi, si, ei]], sps_matrix
+                            )
 
-                        # Assign a local matrix, which will be populated with the
-                        # current state of the local system.
-                        # Local here refers to the variable and term on the two
-                        # nodes, together with the relavant mortar variable and term
-                        # Associate the first variable with master, the second with
-                        # slave, and the final with edge.
-                        loc_mat, _ = self._assign_matrix_vector(
-                            self.full_dof[[mi, si, ei]], sps_matrix
-                        )
-
-                        # Pick out the discretizations on the master and slave node
-                        # for the relevant variables.
-                        # There should be no contribution or modification of the
-                        # [0, 1] and [1, 0] terms, since the variables are only
-                        # allowed to communicate via the edges.
-                        loc_mat[0, 0] = matrix[mat_key_master][mi, mi]
-                        loc_mat[1, 1] = matrix[mat_key_slave][si, si]
-
-                        # Run the discretization, and assign the resulting matrix
-                        # to a temporary construct
-                        tmp_mat, loc_rhs = e_discr.assemble_matrix_rhs(
-                            g_master,
-                            g_slave,
-                            data_master,
-                            data_slave,
-                            data_edge,
-                            loc_mat,
-                        )
+                            # Pick out the discretizations on the master and slave
+                            # node for the relevant variables.
+                            # There should be no contribution or modification of the
+                            # [0, 1] and [1, 0] terms, since the variables are only
+                            # allowed to communicate via the edges.
+                            loc_mat[0, 0] = matrix[mat_key_master][mi, mi]
+                            loc_mat[1, 1] = matrix[mat_key_slave][si, si]
+
+                            # Run the discretization, and assign the resulting matrix
+                            # to a temporary construct
+                            tmp_mat, loc_rhs = e_discr.assemble_matrix_rhs(
+                                g_master,
+                                g_slave,
+                                data_master,
+                                data_slave,
+                                data_edge,
+                                loc_mat,
+                            )
+                            self._assembled_units[unit] = (tmp_mat, loc_rhs)
+                            changed_terms.update(
+                                [mat_key, mat_key_master, mat_key_slave]
+                            )
+                            changed_blocks.update(input_blocks)
                         # The edge column and row should be assigned to mat_key
                         matrix[mat_key][(ei), (mi, si, ei)] = tmp_mat[(2), (0, 1, 2)]
                         matrix[mat_key][(mi, si), (ei)] = tmp_mat[(0, 1), (2)]
@@ -516,22 +891,40 @@ class Assembler:
                 elif mi is not None:
                     # si is None
                     # The operation is a simplified version of the full option above.
-                    if operation == "discretize":
+                    if operation in ("discretize", "mark_dirty"):
                         if (
                             variable_filter(master_key)
                             and variable_filter(edge_key)
                             and term_filter(term)
                         ):
-                            e_discr.discretize(g_master, data_master, data_edge)
+                            if operation == "discretize":
+                                edge_tasks.setdefault(e, []).append(
+                                    functools.partial(
+                                        e_discr.discretize,
+                                        g_master,
+                                        data_master,
+                                        data_edge,
+                                    )
+                                )
+                            self._dirty_units.add((e, coupling_key))
                     elif operation == "assemble":
-
-                        loc_mat, _ = self._assign_matrix_vector(
-                            self.full_dof[[mi, ei]], sps_matrix
-                        )
-                        loc_mat[0, 0] = matrix[mat_key_master][mi, mi]
-                        tmp_mat, loc_rhs = e_discr.assemble_matrix_rhs(
-                            g_master, data_master, data_edge, loc_mat
-                        )
+                        unit = (e, coupling_key)
+                        input_blocks = [(mat_key_master, mi, mi)]
+                        if reuse(unit) and not changed_blocks.intersection(
+                            input_blocks
+                        ):
+                            tmp_mat, loc_rhs = self._assembled_units[unit]
+                        else:
+                            loc_mat, _ = self._assign_matrix_vector(
+                                self.full_dof[[mi, ei]], sps_matrix
+                            )
+                            loc_mat[0, 0] = matrix[mat_key_master][mi, mi]
+                            tmp_mat, loc_rhs = e_discr.assemble_matrix_rhs(
+                                g_master, data_master, data_edge, loc_mat
+                            )
+                            self._assembled_units[unit] = (tmp_mat, loc_rhs)
+                            changed_terms.update([mat_key, mat_key_master])
+                            changed_blocks.update(input_blocks)
                         matrix[mat_key][(ei), (mi, ei)] = tmp_mat[(1), (0, 1)]
                         matrix[mat_key][mi, ei] = tmp_mat[0, 1]
 
@@ -544,22 +937,40 @@ class Assembler:
                 elif si is not None:
                     # mi is None
                     # The operation is a simplified version of the full option above.
-                    if operation == "discretize":
+                    if operation in ("discretize", "mark_dirty"):
                         if (
                             variable_filter(slave_key)
                             and variable_filter(edge_key)
                             and term_filter(term)
                         ):
-                            e_discr.discretize(g_slave, data_slave, data_edge)
+                            if operation == "discretize":
+                                edge_tasks.setdefault(e, []).append(
+                                    functools.partial(
+                                        e_discr.discretize,
+                                        g_slave,
+                                        data_slave,
+                                        data_edge,
+                                    )
+                                )
+                            self._dirty_units.add((e, coupling_key))
                     elif operation == "assemble":
-
-                        loc_mat, _ = self._assign_matrix_vector(
-                            self.full_dof[[si, ei]], sps_matrix
-                        )
-                        loc_mat[0, 0] = matrix[mat_key_slave][si, si]
-                        tmp_mat, loc_rhs = e_discr.assemble_matrix_rhs(
-                            g_slave, data_slave, data_edge, loc_mat
-                        )
+                        unit = (e, coupling_key)
+                        input_blocks = [(mat_key_slave, si, si)]
+                        if reuse(unit) and not changed_blocks.intersection(
+                            input_blocks
+                        ):
+                            tmp_mat, loc_rhs = self._assembled_units[unit]
+                        else:
+                            loc_mat, _ = self._assign_matrix_vector(
+                                self.full_dof[[si, ei]], sps_matrix
+                            )
+                            loc_mat[0, 0] = matrix[mat_key_slave][si, si]
+                            tmp_mat, loc_rhs = e_discr.assemble_matrix_rhs(
+                                g_slave, data_slave, data_edge, loc_mat
+                            )
+                            self._assembled_units[unit] = (tmp_mat, loc_rhs)
+                            changed_terms.update([mat_key, mat_key_slave])
+                            changed_blocks.update(input_blocks)
                         matrix[mat_key][ei, (si, ei)] = tmp_mat[1, (0, 1)]
                         matrix[mat_key][si, ei] = tmp_mat[0, 1]
 
@@ -575,7 +986,9 @@ class Assembler:
                     )
 
         if operation == "assemble":
-            return matrix, rhs
+            return matrix, rhs, changed_terms
+        elif operation == "discretize":
+            return node_tasks, edge_tasks
         else:
             return None
 
@@ -1070,6 +1483,30 @@ class Assembler:
         dof_start = np.hstack((0, np.cumsum(self.full_dof)))
         return np.arange(dof_start[block_ind], dof_start[block_ind + 1])
 
+    def variable_dof_ind(self, names):
+        """ Get the indices in the global system of all degrees of freedom of one or
+        more variables, on all nodes and edges in the GridBucket.
+
+        This can be used to identify the block structure of the system, e.g. for
+        block preconditioners.
+
+        Parameters:
+            names (str or list of str): Names of active variables.
+
+        Returns:
+            np.array (int): Index of degrees of freedom of the variables, sorted
+                in increasing order.
+
+        """
+        if isinstance(names, str):
+            names = [names]
+        dof_start = np.hstack((0, np.cumsum(self.full_dof)))
+        blocks = np.sort(
+            [bi for (_, name), bi in self.block_dof.items() if name in names]
+        )
+        ind = [np.arange(dof_start[bi], dof_start[bi + 1]) for bi in blocks]
+        return np.hstack(ind).astype(np.int) if len(ind) > 0 else np.zeros(0, np.int)
+
     def num_dof(self):
         """ Get total number of unknowns of the identified variables.
 
@@ -0,0 +1,209 @@
+"""
+The module contains the DiscretizationCache class, which stores discretization
+matrices on disk, so that they can be reused between runs with the same grid and
+parameters.
+
+The cache is keyed by a hash of the grid (topology, geometry and tags), the
+parameters and state in the data dictionary of the grid, and the discretization
+object (class and attributes such as the keyword). A typical usage is
+
+    cache = pp.DiscretizationCache("discretization_cache")
+    assembler = pp.Assembler(gb)
+    assembler.discretize(cache=cache)
+
+A second run with the same setup will then load the discretization matrices from
+the folder, instead of recomputing them.
+"""
+import hashlib
+import numbers
+import os
+import tempfile
+
+import numpy as np
+import scipy.sparse as sps
+
+import porepy as pp
+from porepy.utils.hashing import hash_grid, hash_object, UnhashableError
+
+
+class DiscretizationCache:
+    """ Persistent on-disk cache of discretization matrices.
+
+    Each discretization of a grid is stored as a compressed numpy archive, named
+    by the hash of the discretization input. Only sparse matrices, numpy arrays
+    and numbers can be stored; if a discretization produces other objects, or if
+    its input contains objects that cannot be hashed (say, functions), the
+    discretization is computed without the cache.
+
+    Attributes:
+        folder (str): Location of the stored discretizations.
+        num_hits (int): Number of discretizations loaded from the cache.
+        num_misses (int): Number of discretizations that were computed.
+
+    """
+
+    def __init__(self, folder):
+        """
+        Parameters:
+            folder (str): Folder used for storage. Created if it does not exist.
+
+        """
+        self.folder = folder
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self.num_hits = 0
+        self.num_misses = 0
+
+    def __repr__(self):
+        s = "Discretization cache in folder " + self.folder + "\n"
+        s += str(self.num_hits) + " hits, " + str(self.num_misses) + " misses\n"
+        return s
+
+    def discretize(self, discr, g, data):
+        """ Discretize on a grid, or load the discretization from the cache.
+
+        On a cache miss, discr.discretize(g, data) is called, and all entries in
+        data[pp.DISCRETIZATION_MATRICES] under the keywords of the discretization
+        (attributes keyword, mechanics_keyword etc.), or under keywords where
+        entries were added or replaced, are stored. On a hit, these entries are
+        loaded into data[pp.DISCRETIZATION_MATRICES].
+
+        Parameters:
+            discr: Discretization object, with a method discretize(g, data).
+            g (pp.Grid): Grid to be discretized.
+            data (dict): Data dictionary of the grid.
+
+        """
+        try:
+            key = self.key(discr, g, data)
+        except UnhashableError:
+            discr.discretize(g, data)
+            return
+
+        file_name = self._file_name(key)
+        if os.path.exists(file_name):
+            self._load(file_name, data)
+            self.num_hits += 1
+            return
+
+        # Keep references to the matrices present before discretization, so that
+        # replaced matrices can be identified.
+        matrices = data.get(pp.DISCRETIZATION_MATRICES, {})
+        before = {kw: dict(mat) for kw, mat in matrices.items()}
+
+        discr.discretize(g, data)
+        self.num_misses += 1
+
+        # The discretization may update matrices in place, thus all matrices
+        # under its keywords are stored, together with those under keywords
+        # where matrices were added or replaced.
+        keywords = set(
+            val
+            for attr, val in vars(discr).items()
+            if attr.endswith("keyword") and isinstance(val, str)
+        )
+        new_matrices = {}
+        for kw, mat in data.get(pp.DISCRETIZATION_MATRICES, {}).items():
+            old = before.get(kw, {})
+            changed = any(
+                name not in old or old[name] is not val for name, val in mat.items()
+            )
+            if kw in keywords or changed:
+                for name, val in mat.items():
+                    new_matrices[(kw, name)] = val
+
+        self._store(file_name, new_matrices)
+
+    def key(self, discr, g, data):
+        """ Compute the hash identifying a discretization.
+
+        Parameters:
+            discr: Discretization object.
+            g (pp.Grid): Grid to be discretized.
+            data (dict): Data dictionary of the grid.
+
+        Returns:
+            str: Hexadecimal hash of the discretization input.
+
+        Raises:
+            UnhashableError if the input contains objects that cannot be hashed.
+
+        """
+        h = hashlib.sha1()
+        hash_object(h, type(discr).__module__ + "." + type(discr).__name__)
+        hash_object(h, vars(discr))
+        hash_grid(h, g)
+
+        # Parameters and state, together with options stored directly in the
+        # data dictionary (e.g. deviation_from_plane_tol).
+        hash_object(h, data.get(pp.PARAMETERS, {}))
+        hash_object(h, data.get(pp.STATE, {}))
+        options = {
+            k: v
+            for k, v in data.items()
+            if isinstance(k, str) and isinstance(v, (numbers.Number, str))
+        }
+        hash_object(h, options)
+        return h.hexdigest()
+
+    def clear(self):
+        """ Delete all stored discretizations in the cache folder.
+        """
+        for f in os.listdir(self.folder):
+            if f.endswith(".npz"):
+                os.remove(os.path.join(self.folder, f))
+
+    def _file_name(self, key):
+        return os.path.join(self.folder, key + ".npz")
+
+    def _store(self, file_name, matrices):
+        arrays = {}
+        entries = []
+        for i, ((kw, name), val) in enumerate(matrices.items()):
+            prefix = str(i) + "_"
+            if sps.issparse(val):
+                fmt = val.getformat()
+                if fmt not in ("csr", "csc"):
+                    val = val.tocsr()
+                    fmt = "csr"
+                arrays[prefix + "data"] = val.data
+                arrays[prefix + "indices"] = val.indices
+                arrays[prefix + "indptr"] = val.indptr
+                arrays[prefix + "shape"] = np.array(val.shape)
+                entries.append([kw, name, fmt])
+            elif isinstance(val, (np.ndarray, numbers.Number)):
+                arrays[prefix + "value"] = np.asarray(val)
+                entries.append([kw, name, "array"])
+            else:
+                # We do not know how to store this; do not cache the
+                # discretization.
+                return
+
+        arrays["entries"] = np.array(entries, dtype=str).reshape((-1, 3))
+
+        # Write to a temporary file, and move it into place, so that concurrent
+        # runs never see a partially written file.
+        fd, tmp_name = tempfile.mkstemp(suffix=".npz", dir=self.folder)
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_name, file_name)
+
+    def _load(self, file_name, data):
+        matrices = data.setdefault(pp.DISCRETIZATION_MATRICES, {})
+        with np.load(file_name, allow_pickle=False) as stored:
+            for i, (kw, name, fmt) in enumerate(stored["entries"]):
+                prefix = str(i) + "_"
+                if fmt == "array":
+                    val = stored[prefix + "value"]
+                else:
+                    constructor = sps.csr_matrix if fmt == "csr" else sps.csc_matrix
+                    val = constructor(
+                        (
+                            stored[prefix + "data"],
+                            stored[prefix + "indices"],
+                            stored[prefix + "indptr"],
+                        ),
+                        shape=tuple(stored[prefix + "shape"]),
+                    )
+                matrices.setdefault(str(kw), {})[str(name)] = val
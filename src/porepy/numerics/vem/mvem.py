@@ -96,41 +96,37 @@ class MVEM(pp.numerics.vem.dual_elliptic.DualElliptic):
         # Weight for the stabilization term
         weight = np.power(diams, 2 - g.dim)
 
-        # Allocate the data to store matrix entries, that's the most efficient
-        # way to create a sparse matrix.
-        size = np.sum(np.square(g.cell_faces.indptr[1:] - g.cell_faces.indptr[:-1]))
-        I = np.empty(size, dtype=np.int)
-        J = np.empty(size, dtype=np.int)
-        dataIJ = np.empty(size)
-        idx = 0
-
-        for c in np.arange(g.num_cells):
-            # For the current cell retrieve its faces
-            loc = slice(g.cell_faces.indptr[c], g.cell_faces.indptr[c + 1])
-            faces_loc = faces[loc]
+        # Store the matrix entries in arrays, that's the most efficient way to
+        # create a sparse matrix.
+        I, J, dataIJ = [], [], []
 
-            # Compute the H_div-mass local matrix
-            A = MVEM.massHdiv(
-                k.values[0 : g.dim, 0 : g.dim, c],
-                c_centers[:, c],
-                g.cell_volumes[c],
-                f_centers[:, faces_loc],
-                f_normals[:, faces_loc],
+        # Cells with the same number of faces have local matrices of the same
+        # size, compute these together.
+        for cells_loc, loc in MVEM._cells_by_num_faces(g):
+            faces_loc = faces[loc]
+            num_faces_loc = loc.shape[1]
+
+            # Compute the H_div-mass local matrices
+            A = MVEM.massHdiv_batch(
+                np.moveaxis(k.values[0 : g.dim, 0 : g.dim, cells_loc], -1, 0),
+                c_centers[:, cells_loc].T,
+                g.cell_volumes[cells_loc],
+                np.moveaxis(f_centers[:, faces_loc], 0, 1),
+                np.moveaxis(f_normals[:, faces_loc], 0, 1),
                 sign[loc],
-                diams[c],
-                weight[c],
+                diams[cells_loc],
+                weight[cells_loc],
             )[0]
 
             # Save values for Hdiv-mass local matrix in the global structure
-            cols = np.tile(faces_loc, (faces_loc.size, 1))
-            loc_idx = slice(idx, idx + cols.size)
-            I[loc_idx] = cols.T.ravel()
-            J[loc_idx] = cols.ravel()
-            dataIJ[loc_idx] = A.ravel()
-            idx += cols.size
+            I.append(np.repeat(faces_loc, num_faces_loc, axis=1).ravel())
+            J.append(np.tile(faces_loc, (1, num_faces_loc)).ravel())
+            dataIJ.append(A.ravel())
 
         # Construct the global matrices
-        mass = sps.coo_matrix((dataIJ, (I, J)))
+        mass = sps.coo_matrix(
+            (np.concatenate(dataIJ), (np.concatenate(I), np.concatenate(J)))
+        )
         div = -g.cell_faces.T
 
         matrix_dictionary["mass"] = mass
@@ -186,25 +182,25 @@ class MVEM(pp.numerics.vem.dual_elliptic.DualElliptic):
 
         P0u = np.zeros((3, g.num_cells))
 
-        for c in np.arange(g.num_cells):
-            loc = slice(g.cell_faces.indptr[c], g.cell_faces.indptr[c + 1])
+        for cells_loc, loc in MVEM._cells_by_num_faces(g):
             faces_loc = faces[loc]
 
-            Pi_s = MVEM.massHdiv(
-                k.values[0 : g.dim, 0 : g.dim, c],
-                c_centers[:, c],
-                g.cell_volumes[c],
-                f_centers[:, faces_loc],
-                f_normals[:, faces_loc],
+            Pi_s = MVEM.massHdiv_batch(
+                np.moveaxis(k.values[0 : g.dim, 0 : g.dim, cells_loc], -1, 0),
+                c_centers[:, cells_loc].T,
+                g.cell_volumes[cells_loc],
+                np.moveaxis(f_centers[:, faces_loc], 0, 1),
+                np.moveaxis(f_normals[:, faces_loc], 0, 1),
                 sign[loc],
-                diams[c],
+                diams[cells_loc],
             )[1]
 
-            # extract the velocity for the current cell
-            P0u[dim, c] = np.dot(Pi_s, u[faces_loc]) / diams[c]
-            P0u[:, c] = np.dot(R.T, P0u[:, c])
+            # extract the velocity for the current cells
+            P0u[np.ix_(dim, cells_loc)] = (
+                np.einsum("cif,cf->ic", Pi_s, u[faces_loc]) / diams[cells_loc]
+            )
 
-        return P0u
+        return np.dot(R.T, P0u)
 
     @staticmethod
     def massHdiv(K, c_center, c_volume, f_centers, normals, sign, diam, weight=0):
@@ -266,6 +262,95 @@ class MVEM(pp.numerics.vem.dual_elliptic.DualElliptic):
 
         return A, Pi_s
 
+    @staticmethod
+    def massHdiv_batch(
+        K, c_centers, c_volumes, f_centers, normals, sign, diams, weights=None
+    ):
+        """ Compute the local mass Hdiv matrices for a set of cells with the same
+        number of faces, using the mixed vem approach.
+
+        The computation is equivalent to calling massHdiv for each cell, but all
+        cells are treated with stacked array operations.
+
+        Parameters
+        ----------
+        K : ndarray (num_cells, g.dim, g.dim)
+            Permeability of the cells.
+        c_centers : ndarray (num_cells, g.dim)
+            Cell centers.
+        c_volumes : array (num_cells)
+            Cell volumes.
+        f_centers : ndarray (num_cells, g.dim, num_faces_of_cell)
+            Center of the cell faces.
+        normals : ndarray (num_cells, g.dim, num_faces_of_cell)
+            Normal of the cell faces weighted by the face areas.
+        sign : ndarray (num_cells, num_faces_of_cell)
+            +1 or -1 if the normal is inward or outward to the cell.
+        diams : array (num_cells)
+            Diameter of the cells.
+        weights : array (num_cells)
+            weight for the stabilization term. Optional, default = 0.
+
+        Return
+        ------
+        out: ndarray (num_cells, num_faces_of_cell, num_faces_of_cell)
+            Local mass Hdiv matrices.
+        Pi_s: ndarray (num_cells, g.dim, num_faces_of_cell)
+            Local projection operators.
+        """
+        # Allow short variable names in this function
+        # pylint: disable=invalid-name
+
+        num_faces = sign.shape[1]
+        inv_diams = 1.0 / diams[:, np.newaxis, np.newaxis]
+
+        # local matrices D, the gradients of the scaled monomials are identity
+        # matrices divided by the diameter
+        D = np.einsum("cjf,cji->cfi", normals, K) * inv_diams
+
+        # local matrices G
+        G = K * (c_volumes[:, np.newaxis, np.newaxis] * np.square(inv_diams))
+
+        # local matrices F
+        F = (f_centers - c_centers[:, :, np.newaxis]) * sign[:, np.newaxis, :]
+        F *= inv_diams
+
+        assert np.allclose(G, np.matmul(F, D)), "G not equal to F*D"
+
+        # local matrices Pi_s
+        Pi_s = np.linalg.solve(G, F)
+        I_Pi = np.eye(num_faces) - np.matmul(D, Pi_s)
+
+        # local Hdiv-mass matrices
+        A = np.matmul(np.swapaxes(Pi_s, 1, 2), np.matmul(G, Pi_s))
+        if weights is not None:
+            w = weights * np.abs(np.linalg.inv(K)).sum(axis=2).max(axis=1)
+            I_Pi_T = np.swapaxes(I_Pi, 1, 2)
+            A += w[:, np.newaxis, np.newaxis] * np.matmul(I_Pi_T, I_Pi)
+
+        return A, Pi_s
+
+    @staticmethod
+    def _cells_by_num_faces(g):
+        """ Group the cells of a grid by their number of faces.
+
+        Parameters
+        ----------
+        g : grid.
+
+        Return
+        ------
+        Generator of tuples, one for each number of faces, of
+        cells : array (num_cells_in_group) Cells in the group.
+        loc : ndarray (num_cells_in_group, num_faces_of_cell) Indices of the faces
+            of each cell, in the data of g.cell_faces sorted by cells.
+        """
+        indptr = g.cell_faces.indptr
+        num_faces = np.diff(indptr)
+        for n in np.unique(num_faces):
+            cells = np.where(num_faces == n)[0]
+            yield cells, indptr[cells].reshape((-1, 1)) + np.arange(n)
+
     @staticmethod
     def check_conservation(g, u):
         """
@@ -275,14 +360,4 @@ class MVEM(pp.numerics.vem.dual_elliptic.DualElliptic):
         g: grid, or a subclass.
         u : array (g.num_faces) velocity at each face.
         """
-        faces, cells, sign = sps.find(g.cell_faces)
-        index = np.argsort(cells)
-        faces, sign = faces[index], sign[index]
-
-        conservation = np.empty(g.num_cells)
-        for c in np.arange(g.num_cells):
-            # For the current cell retrieve its faces
-            loc = slice(g.cell_faces.indptr[c], g.cell_faces.indptr[c + 1])
-            conservation[c] = np.sum(u[faces[loc]] * sign[loc])
-
-        return conservation
+        return g.cell_faces.T * u
@@ -17,6 +17,13 @@ class SecondOrderTensor(object):
     The permeability is always 3-dimensional (since the geometry is always 3D),
     however, 1D and 2D problems are accomodated by assigning unit values to kzz
     and kyy, and no cross terms.
+
+    Internally, only the specified components are stored, thus isotropic and
+    diagonal tensors need one and three values per cell, respectively. The full
+    (3, 3, Nc) representation is formed when the attribute values is first
+    accessed, and is used from then on. Use restrict_to_cells() to obtain the
+    tensor in a subset of the cells without forming the full representation in
+    all cells.
     """
 
     def __init__(self, kxx, kyy=None, kzz=None, kxy=None, kxz=None, kyz=None):
@@ -25,6 +32,8 @@ class SecondOrderTensor(object):
         Parameters:
             kxx (double): Nc array, with cell-wise values of kxx permeability.
             kyy (optional, double): Nc array of kyy. Default equal to kxx.
+                The components kyy, kzz, kxy, kxz and kyz can also be given as
+                scalars, these are used in all cells.
             kzz (optional, double): Nc array of kzz. Default equal to kxx.
                 Not used if dim < 3.
             kxy (optional, double): Nc array of kxy. Defaults to zero.
@@ -36,8 +45,18 @@ class SecondOrderTensor(object):
         Raises:
             ValueError if the permeability is not positive definite.
        """
-        Nc = kxx.size
-        perm = np.zeros((3, 3, Nc))
+        num_cells = kxx.size
+
+        def _as_cell_array(val):
+            # Scalar components are broadcast to all cells. The arrays are
+            # copied, so that later changes to the input do not affect the tensor
+            return np.array(np.broadcast_to(val, (num_cells,)), dtype=float)
+
+        kxx = _as_cell_array(kxx)
+        kyy, kzz, kxy, kxz, kyz = (
+            None if val is None else _as_cell_array(val)
+            for val in (kyy, kzz, kxy, kxz, kyz)
+        )
 
         if np.any(kxx < 0):
             raise ValueError(
@@ -45,44 +64,26 @@ class SecondOrderTensor(object):
                 "components in x-direction"
             )
 
-        perm[0, 0, ::] = kxx
-
-        # Assign unit values to the diagonal, these are overwritten later if
-        # the specified data
-        perm[1, 1, ::] = 1
-        perm[2, 2, ::] = 1
+        # Default values, only used for the checks below
+        kyy_d = kxx if kyy is None else kyy
+        kzz_d = kxx if kzz is None else kzz
+        kxy_d = 0 if kxy is None else kxy
+        kxz_d = 0 if kxz is None else kxz
+        kyz_d = 0 if kyz is None else kyz
 
-        if kyy is None:
-            kyy = kxx
-        if kxy is None:
-            kxy = 0 * kxx
         # Onsager's principle - tensor should be positive definite
-        if np.any((kxx * kyy - kxy * kxy) < 0):
+        if np.any((kxx * kyy_d - kxy_d * kxy_d) < 0):
             raise ValueError(
                 "Tensor is not positive definite because of "
                 "components in y-direction"
             )
 
-        perm[1, 0, ::] = kxy
-        perm[0, 1, ::] = kxy
-        perm[1, 1, ::] = kyy
-
-        if kyy is None:
-            kyy = kxx
-        if kzz is None:
-            kzz = kxx
-        if kxy is None:
-            kxy = 0 * kxx
-        if kxz is None:
-            kxz = 0 * kxx
-        if kyz is None:
-            kyz = 0 * kxx
         # Onsager's principle - tensor should be positive definite
         if np.any(
             (
-                kxx * (kyy * kzz - kyz * kyz)
-                - kxy * (kxy * kzz - kxz * kyz)
-                + kxz * (kxy * kyz - kxz * kyy)
+                kxx * (kyy_d * kzz_d - kyz_d * kyz_d)
+                - kxy_d * (kxy_d * kzz_d - kxz_d * kyz_d)
+                + kxz_d * (kxy_d * kyz_d - kxz_d * kyy_d)
             )
             < 0
         ):
@@ -91,13 +92,87 @@ class SecondOrderTensor(object):
                 "components in z-direction"
             )
 
-        perm[2, 0, ::] = kxz
-        perm[0, 2, ::] = kxz
-        perm[2, 1, ::] = kyz
-        perm[1, 2, ::] = kyz
-        perm[2, 2, ::] = kzz
+        # Compact representation: Components that are not given take their
+        # default values when the full tensor is formed.
+        self._components = {
+            "kxx": kxx,
+            "kyy": kyy,
+            "kzz": kzz,
+            "kxy": kxy,
+            "kxz": kxz,
+            "kyz": kyz,
+        }
+        self._num_cells = num_cells
+        self._values = None
+
+    @property
+    def values(self):
+        """ np.ndarray (3, 3, Nc): Cell-wise representation of the tensor.
+        """
+        if self._values is None:
+            self._values = self._expand()
+            # From now on, the full representation is used
+            self._components = None
+        return self._values
+
+    @values.setter
+    def values(self, values):
+        self._values = values
+        self._components = None
+
+    def _expand(self):
+        # Form the full tensor from the compact representation
+        perm = np.zeros((3, 3, self._num_cells))
+        for i in range(3):
+            perm[i] = self._expand_row(i)
+        return perm
+
+    def _expand_row(self, i):
+        # Row i of the full tensor, formed from the compact representation
+        c = self._components
+        row = np.zeros((3, self._num_cells))
+        diagonal = [c["kxx"], c["kyy"], c["kzz"]][i]
+        row[i] = c["kxx"] if diagonal is None else diagonal
+        off_diagonal = {(0, 1): "kxy", (0, 2): "kxz", (1, 2): "kyz"}
+        for j in range(3):
+            key = off_diagonal.get((min(i, j), max(i, j)), None)
+            if key is not None and c[key] is not None:
+                row[j] = c[key]
+        return row
+
+    def _update_hash(self, h):
+        """ Update a hash (from hashlib) with the values of the tensor.
+
+        The full tensor is hashed one row at a time, formed from the compact
+        representation if this is still used. The hash is thus independent of
+        whether the full representation has been formed.
+        """
+        for i in range(3):
+            row = self._values[i] if self._values is not None else self._expand_row(i)
+            h.update(np.ascontiguousarray(row, dtype=float).tobytes())
+
+    def restrict_to_cells(self, cells):
+        """
+        Restrict the tensor to a subset of the cells.
+
+        If the full representation has not been formed, the restricted tensor is
+        also represented by its components.
 
-        self.values = perm
+        Parameters:
+            cells (np.ndarray): Indices of the cells to keep.
+
+        Returns:
+            SecondOrderTensor: New tensor, with values in the given cells.
+        """
+        if self._values is not None:
+            t = SecondOrderTensor(np.ones(cells.size))
+            t.values = self._values[::, ::, cells]
+            return t
+        restricted = {
+            key: (None if val is None else val[cells])
+            for key, val in self._components.items()
+        }
+        return SecondOrderTensor(**restricted)
 
     def copy(self):
         """
@@ -107,16 +182,12 @@ class SecondOrderTensor(object):
             SecondOrderTensor: New tensor with identical fields, but separate
                 arrays (in the memory sense).
         """
-
-        kxx = self.values[0, 0, :].copy()
-        kxy = self.values[1, 0, :].copy()
-        kyy = self.values[1, 1, :].copy()
-
-        kxz = self.values[2, 0, :].copy()
-        kyz = self.values[2, 1, :].copy()
-        kzz = self.values[2, 2, :].copy()
-
-        return SecondOrderTensor(kxx, kxy=kxy, kxz=kxz, kyy=kyy, kyz=kyz, kzz=kzz)
+        if self._values is not None:
+            t = SecondOrderTensor(np.ones(self._num_cells))
+            t.values = self._values.copy()
+            return t
+        # The components are copied by the constructor
+        return SecondOrderTensor(**self._components)
 
     def rotate(self, R):
         """
@@ -146,6 +217,11 @@ class FourthOrderTensor(object):
     Primary usage for the class is for mpsa discretizations. Other applications
     have not been tested.
 
+    The tensor is stored by the Lame parameters; the full cell-wise
+    representation in values is formed when it is first accessed. Use
+    restrict_to_cells() to obtain the tensor in a subset of the cells without
+    forming the full representation in all cells.
+
     Attributes:
         values - numpy.ndarray, dimensions (3^2, 3^2, nc), cell-wise
             representation of the stiffness matrix.
@@ -177,7 +253,7 @@ class FourthOrderTensor(object):
             raise ValueError("Mu and lmbda should have the same length")
 
         if phi is None:
-            phi = 0 * mu  # Default value for phi is zero
+            pass  # Default value for phi is zero
         elif not isinstance(phi, np.ndarray):
             raise ValueError("Phi should be a numpy array")
         elif not phi.ndim == 1:
@@ -185,11 +261,30 @@ class FourthOrderTensor(object):
         elif phi.size != lmbda.size:
             raise ValueError("Phi and Lmbda should have the same length")
 
-        # Save lmbda and mu, can be useful to have in some cases
-        self.lmbda = lmbda
-        self.mu = mu
+        # Save lmbda and mu, can be useful to have in some cases. The arrays are
+        # copied, since the full representation is formed from them later.
+        self.lmbda = lmbda.copy()
+        self.mu = mu.copy()
+        self._phi = None if phi is None else phi.copy()
 
-        # Basis for the contributions of mu, lmbda and phi is hard-coded
+        # The full representation is formed on demand
+        self._values = None
+
+    @property
+    def values(self):
+        """ np.ndarray (9, 9, Nc): Cell-wise representation of the tensor.
+        """
+        if self._values is None:
+            self._values = self._expand()
+        return self._values
+
+    @values.setter
+    def values(self, values):
+        self._values = values
+
+    def _expand(self, rows=slice(None)):
+        # Form the given rows of the full tensor. Basis for the contributions
+        # of mu, lmbda and phi is hard-coded
         mu_mat = np.array(
             [
                 [2, 0, 0, 0, 0, 0, 0, 0, 0],
@@ -231,12 +326,54 @@ class FourthOrderTensor(object):
         )
 
         # Expand dimensions to prepare for cell-wise representation
-        mu_mat = mu_mat[:, :, np.newaxis]
-        lmbda_mat = lmbda_mat[:, :, np.newaxis]
-        phi_mat = phi_mat[:, :, np.newaxis]
+        mu_mat = mu_mat[rows][..., np.newaxis]
+        lmbda_mat = lmbda_mat[rows][..., np.newaxis]
+
+        c = mu_mat * self.mu + lmbda_mat * self.lmbda
+        if self._phi is not None:
+            c = c + phi_mat[rows][..., np.newaxis] * self._phi
+        return c
+
+    def _update_hash(self, h):
+        """ Update a hash (from hashlib) with the values of the tensor.
+
+        The full tensor is hashed one row at a time, formed from the Lame
+        parameters if the full representation has not been formed. The hash is
+        thus independent of whether the full representation has been formed.
+        """
+        for i in range(9):
+            row = self._values[i] if self._values is not None else self._expand(i)
+            h.update(np.ascontiguousarray(row, dtype=float).tobytes())
+
+    def restrict_to_cells(self, cells):
+        """
+        Restrict the tensor to a subset of the cells.
 
-        c = mu_mat * mu + lmbda_mat * lmbda + phi_mat * phi
-        self.values = c
+        If the full representation has not been formed, the restricted tensor is
+        represented by the Lame parameters; the full representation is formed for
+        the given cells only when it is needed.
+
+        Parameters:
+            cells (np.ndarray): Indices of the cells to keep.
+
+        Returns:
+            FourthOrderTensor: New tensor, with values in the given cells.
+        """
+        phi = None if self._phi is None else self._phi[cells]
+        t = FourthOrderTensor(mu=self.mu[cells], lmbda=self.lmbda[cells], phi=phi)
+        if self._values is not None:
+            t.values = self._values[::, ::, cells]
+        return t
 
     def copy(self):
-        return FourthOrderTensor(mu=self.mu, lmbda=self.lmbda)
+        """
+        Define a deep copy of the tensor.
+
+        Returns:
+            FourthOrderTensor: New tensor with identical fields, but separate
+                arrays (in the memory sense).
+        """
+        t = FourthOrderTensor(mu=self.mu, lmbda=self.lmbda, phi=self._phi)
+        if self._values is not None:
+            t.values = self._values.copy()
+        return t
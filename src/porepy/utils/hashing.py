@@ -0,0 +1,93 @@
+"""
+Hashing of the content of numpy arrays, sparse matrices, grids, and containers
+and objects built from these.
+
+The hashes identify input data in on-disk caches, see e.g. DiscretizationCache
+and MeshCache. The functions update a hash object from hashlib, say
+
+    h = hashlib.sha1()
+    hash_object(h, [pts, mesh_args])
+    key = h.hexdigest()
+"""
+import numbers
+
+import numpy as np
+import scipy.sparse as sps
+
+import porepy as pp
+
+
+class UnhashableError(Exception):
+    """ Raised if an object cannot be represented in a hash, e.g. a function.
+    """
+
+    pass
+
+
+def hash_grid(h, g):
+    """ Hash the topology, geometry and tags of a grid.
+    """
+    hash_object(h, [g.dim, g.num_cells, g.num_faces, g.num_nodes])
+    hash_object(h, g.nodes)
+    hash_object(h, g.face_nodes)
+    hash_object(h, g.cell_faces)
+    for field in [
+        "face_areas",
+        "face_normals",
+        "face_centers",
+        "cell_volumes",
+        "cell_centers",
+    ]:
+        hash_object(h, getattr(g, field, None))
+    hash_object(h, g.tags)
+
+
+def hash_object(h, obj, visited=None):
+    """ Update a hash with an object, recursively for containers and objects.
+
+    Objects are represented by their public attributes. An object can instead
+    define a method _update_hash(h), which updates the hash with the data that
+    defines the object.
+    """
+    if visited is None:
+        visited = set()
+
+    h.update(type(obj).__name__.encode())
+    if obj is None or isinstance(obj, (bool, numbers.Number, str, np.generic)):
+        h.update(repr(obj).encode())
+    elif isinstance(obj, np.ndarray):
+        if obj.dtype == object:
+            hash_object(h, obj.tolist(), visited)
+        else:
+            h.update(str(obj.dtype).encode() + str(obj.shape).encode())
+            h.update(np.ascontiguousarray(obj).tobytes())
+    elif sps.issparse(obj):
+        mat = obj.tocsr()
+        h.update(str(mat.shape).encode())
+        for arr in [mat.indptr, mat.indices, mat.data]:
+            hash_object(h, arr, visited)
+    elif isinstance(obj, dict):
+        for k in sorted(obj.keys(), key=repr):
+            hash_object(h, k, visited)
+            hash_object(h, obj[k], visited)
+    elif isinstance(obj, (list, tuple)):
+        for o in obj:
+            hash_object(h, o, visited)
+    elif isinstance(obj, pp.Grid):
+        # Grids referred from parameters are represented by their content.
+        hash_grid(h, obj)
+    elif hasattr(obj, "_update_hash"):
+        # Objects with a representation that can change without changing the
+        # object, e.g. tensors with lazily formed values, hash themselves.
+        obj._update_hash(h)
+    elif hasattr(obj, "__dict__") and not callable(obj):
+        # Objects such as boundary conditions are represented by their public
+        # attributes. Private attributes are left out, since these are
+        # typically caches that are filled lazily.
+        if id(obj) in visited:
+            return
+        visited.add(id(obj))
+        public = {k: v for k, v in vars(obj).items() if not k.startswith("_")}
+        hash_object(h, public, visited)
+    else:
+        raise UnhashableError("Cannot hash object of type " + str(type(obj)))
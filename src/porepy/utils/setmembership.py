@@ -6,6 +6,7 @@ Created on Thu Feb 25 20:16:42 2016
 """
 from __future__ import division
 import numpy as np
+from scipy import spatial
 
 
 def unique_rows(data):
@@ -177,9 +178,8 @@ def unique_columns_tol(mat, tol=1e-8, exponent=2):
 
     # If the matrix is integers, and the tolerance less than 1/2, we can use
     # the new unique function that ships with numpy 1.13. This comes with a
-    # significant speedup, in particular for large arrays (runtime has gone
-    # from hours to split-seconds - that is, the alternative implementation
-    # below is ineffecient).
+    # speedup also compared to the general implementation below, which is
+    # based on a search tree.
     # If the current numpy version is older, an ugly hack is possible: Download
     # the file from the numpy repositories, and place it somewhere in
     # $PYHTONPATH, with the name 'numpy_113_unique'.
@@ -203,42 +203,63 @@ def unique_columns_tol(mat, tol=1e-8, exponent=2):
             except:
                 pass
 
-    def dist(p, pset):
-        " Helper function to compute distance "
-        if p.ndim == 1:
-            pt = p.reshape((-1, 1))
-        else:
-            pt = p
-
-        return np.power(
-            np.sum(np.power(np.abs(pt - pset), exponent), axis=0), 1 / exponent
-        )
-
     (nd, l) = mat.shape
+    mat_f = mat.astype(np.float)
+
+    # Points closer than this distance are considered equal.
+    radius = tol * np.sqrt(nd)
+
+    # Find all pairs of points that are close. The search tree uses a
+    # non-strict inequality, thus recompute the distance for the pairs.
+    tree = spatial.cKDTree(mat_f.T)
+    pairs = tree.query_pairs(radius, p=exponent, output_type="ndarray")
+    if pairs.size > 0:
+        diff = np.abs(mat_f[:, pairs[:, 0]] - mat_f[:, pairs[:, 1]])
+        dist = np.power(np.sum(np.power(diff, exponent), axis=0), 1 / exponent)
+        pairs = pairs[dist < radius]
+
+    # Sort the pairs as (earlier point, later point), grouped by the later point
+    earlier = np.min(pairs, axis=1)
+    later = np.max(pairs, axis=1)
+    order = np.lexsort((earlier, later))
+    earlier = earlier[order]
+    later = later[order]
+
+    # The points are processed in order: A point is kept, unless it is close
+    # to a point that was kept before it. It is then represented by the first
+    # such kept point. Points without proximate points of lower index are
+    # always kept.
+    keep = np.ones(l, dtype=np.bool)
+    represented_by = np.arange(l)
+
+    # Points with a proximate point of lower index
+    has_earlier = np.unique(later)
+    # For the common case that all proximate points of lower index are known
+    # to be kept, the point is represented by the first of these.
+    has_earlier_mask = np.zeros(l, dtype=np.bool)
+    has_earlier_mask[has_earlier] = True
+    group_start = np.searchsorted(later, has_earlier)
+    group_end = np.searchsorted(later, has_earlier, side="right")
+    all_kept = np.zeros(has_earlier.size, dtype=np.bool)
+    if has_earlier.size > 0:
+        all_kept = np.logical_not(
+            np.logical_or.reduceat(has_earlier_mask[earlier], group_start)
+        )
+    keep[has_earlier[all_kept]] = False
+    represented_by[has_earlier[all_kept]] = earlier[group_start[all_kept]]
 
-    # By default, no columns are kept
-    keep = np.zeros(l, dtype=np.bool)
-
-    # We will however keep the first point
-    keep[0] = True
-    keep_counter = 1
-
-    # Map from old points to the unique subspace. Defaults to map to itself.
-    old_2_new = np.arange(l)
-
-    # Loop over all points, check if it is already represented in the kept list
-    for i in range(1, l):
-        proximate = np.argwhere(dist(mat[:, i], mat[:, keep]) < tol * np.sqrt(nd))
+    # The remaining points are resolved in order, one by one
+    for gi in np.where(np.logical_not(all_kept))[0]:
+        kept_neighs = earlier[group_start[gi] : group_end[gi]]
+        kept_neighs = kept_neighs[keep[kept_neighs]]
+        if kept_neighs.size > 0:
+            keep[has_earlier[gi]] = False
+            represented_by[has_earlier[gi]] = kept_neighs[0]
 
-        if proximate.size > 0:
-            # We will not keep this point
-            old_2_new[i] = proximate[0]
-        else:
-            # We have found a new point
-            keep[i] = True
-            old_2_new[i] = keep_counter
-            keep_counter += 1
     # Finally find which elements we kept
     new_2_old = np.argwhere(keep).ravel()
+    # Map from old points to the unique subspace.
+    old_2_new = np.cumsum(keep) - 1
+    old_2_new = old_2_new[represented_by]
 
     return mat[:, keep], new_2_old, old_2_new
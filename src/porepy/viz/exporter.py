@@ -9,6 +9,12 @@ files.
 """
 
 import sys, os
+import atexit
+import copy
+import functools
+import multiprocessing
+import queue
+import weakref
 import numpy as np
 import scipy.sparse as sps
 import logging
@@ -157,6 +163,98 @@ class Fields(object):
 # ------------------------------------------------------------------------------#
 
 
+def _snapshot(obj):
+    """
+    Copy the arrays of the arguments of a file writer, including the values of
+    fields.
+    """
+    if isinstance(obj, np.ndarray):
+        return obj.copy()
+    elif isinstance(obj, Field):
+        field = copy.copy(obj)
+        if field.values is not None:
+            field.values = field.values.copy()
+        return field
+    elif isinstance(obj, Fields):
+        return [_snapshot(f) for f in obj]
+    elif isinstance(obj, (list, tuple)):
+        return type(obj)(_snapshot(o) for o in obj)
+    else:
+        return obj
+
+
+# Interval, in seconds, for checking that the background writer of an
+# asynchronous export is alive while waiting for it
+_POLL_INTERVAL = 0.1
+
+
+def _close_exporter(ref):
+    # Called on exit of the interpreter. The exporter is referenced weakly, so
+    # that the registration does not keep it alive.
+    exporter = ref()
+    if exporter is not None:
+        exporter.close()
+
+
+def _export_worker(state, tasks, results):
+    """
+    Background writer for asynchronous export: Call the writing methods of
+    the exporter until None is received. The exporter is restored from the
+    state given by Exporter._writer_state(). For each task, None, or a
+    description of the error, is put in the result queue.
+    """
+    exporter = Exporter.__new__(Exporter)
+    exporter.__dict__.update(state)
+    exporter.gb_VTK = _vtk_from_string(exporter.gb_VTK)
+    exporter.m_gb_VTK = _vtk_from_string(exporter.m_gb_VTK)
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        method, args = task
+        try:
+            getattr(exporter, method)(*args)
+            results.put(None)
+        except Exception as exc:
+            results.put(method + ": " + repr(exc))
+
+
+def _vtk_to_string(g_VTK):
+    """
+    Serialize vtk grids, or a dictionary of vtk grids, to strings in the vtu
+    format, for transfer to the background writer.
+    """
+    if isinstance(g_VTK, dict):
+        return {key: _vtk_to_string(val) for key, val in g_VTK.items()}
+    elif g_VTK is None:
+        return None
+    writer = vtk.vtkXMLUnstructuredGridWriter()
+    writer.SetInputData(g_VTK)
+    writer.SetDataModeToBinary()
+    writer.WriteToOutputStringOn()
+    writer.Write()
+    return writer.GetOutputString()
+
+
+def _vtk_from_string(g_VTK):
+    """
+    Restore vtk grids serialized by _vtk_to_string.
+    """
+    if isinstance(g_VTK, dict):
+        return {key: _vtk_from_string(val) for key, val in g_VTK.items()}
+    elif g_VTK is None:
+        return None
+    reader = vtk.vtkXMLUnstructuredGridReader()
+    reader.ReadFromInputStringOn()
+    reader.SetInputString(g_VTK)
+    reader.Update()
+    return reader.GetOutput()
+
+
+# ------------------------------------------------------------------------------#
+
+
 class Exporter:
     def __init__(self, grid, name, folder=None, **kwargs):
         """
@@ -173,6 +271,15 @@ class Exporter:
             grid changes in time or not. The default is True.
         binary: export in binary format, default is True.
         simplicial: consider only simplicial elements (triangles and tetra)
+        time_series: (optional) export a time series where the geometry is
+            written only once, see below. Requires a fixed grid. The default
+            is False.
+        asynchronous: (optional) write the files in a background process, so
+            that the simulation can continue while the data is written, see
+            below. The default is False.
+        queue_size: (optional) for asynchronous export, the maximum number of
+            files waiting to be written. If the queue is full, write_vtk waits
+            for the background process. The default is 2.
 
         How to use:
         If you need to export a single grid:
@@ -198,6 +305,29 @@ class Exporter:
         In the case of different keywords, change the file name with
         "change_name".
 
+        For long time series, the repeated export of the geometry can be
+        avoided by:
+        save = Exporter(gb, "solution", folder="results", time_series=True)
+        while time:
+            save.write_vtk(["conc"], time_step=i)
+        save.write_pvd(steps*deltaT)
+        The geometry and the fields grid_dim, cell_id etc. are then written
+        once to binary files. Each call to write_vtk writes only the data
+        fields, to one binary file per grid dimension. The call to write_pvd
+        writes an XDMF file, solution.xdmf, which describes the time series,
+        and should be opened in, e.g., ParaView.
+
+        With asynchronous export, write_vtk copies the data and returns, while
+        the files are written by a background process. The process is started
+        by the forkserver method (spawn if this is not available), and the vtk
+        grids are sent to it once, when it is started. As for all use of
+        multiprocessing with these methods, the main script must then be
+        protected by if __name__ == "__main__". Call flush() to wait for all
+        files to be written, and close() at the end of the simulation.
+        write_pvd calls flush(), and close() is also called on exit of the
+        interpreter. Errors in the background process, and its termination,
+        are raised by the subsequent calls to write_vtk, flush() or close().
+
         NOTE: the following names are reserved for data exporting: grid_dim,
         is_mortar, mortar_side, cell_id
 
@@ -212,6 +342,12 @@ class Exporter:
         self.fixed_grid = kwargs.get("fixed_grid", True)
         self.binary = kwargs.get("binary", True)
         self.simplicial = kwargs.get("simplicial", False)
+        self.time_series = kwargs.get("time_series", False)
+        self.asynchronous = kwargs.get("asynchronous", False)
+        self.queue_size = kwargs.get("queue_size", 2)
+
+        if self.time_series and not self.fixed_grid:
+            raise ValueError("Time series export requires a fixed grid")
 
         self.is_GridBucket = isinstance(self.gb, pp.GridBucket)
         self.is_not_vtk = "vtk" not in sys.modules
@@ -235,6 +371,10 @@ class Exporter:
 
         self.has_numba = "numba" in sys.modules
 
+        # Fields that describe the grids, such as grid_dim and cell_id. Stored
+        # for reuse in all time steps if the grid is fixed.
+        self._extra_fields = {}
+
         if self.fixed_grid:
             self._update_gb_VTK()
 
@@ -244,6 +384,14 @@ class Exporter:
         # Storage for file name extensions for time steps
         self._exported_time_step_file_names = []
 
+        # For time series: Description of the binary files of the geometry,
+        # written on the first export, and of the data of each time step.
+        self._time_series_mesh = None
+        self._time_series_steps = {}
+
+        # Background writer for asynchronous export, started on the first export
+        self._worker = None
+
     # ------------------------------------------------------------------------------#
 
     def change_name(self, name):
@@ -285,7 +433,8 @@ class Exporter:
                         a value to time_step.
         time_step: (optional) in a time dependent problem defines the part of the file
                    name associated with this time step. If not provided, subsequent
-                   time steps will have file names ending with 0, 1, etc.
+                   time steps will have file names ending with 0, 1, etc. This is
+                   also the case for a time series, which is always time dependent.
         grid: (optional) in case of changing grid set a new one.
         point_data: ***
 
@@ -296,12 +445,15 @@ class Exporter:
         if self.fixed_grid and grid is not None:
             raise ValueError("Inconsistency in exporter setting")
         elif not self.fixed_grid and grid is not None:
+            # Files of the old grid are written by the background writer,
+            # which is restarted with the new grid on the next export.
+            self.close()
             self.gb = grid
             self.is_GridBucket = isinstance(self.gb, pp.GridBucket)
-            self._update_gVTK()
+            self._update_gb_VTK()
 
         # If the problem is time dependent, but no time step is set, we set one
-        if time_dependent and time_step is not None:
+        if (time_dependent or self.time_series) and time_step is None:
             time_step = self._time_step_counter
             self._time_step_counter += 1
 
@@ -310,7 +462,9 @@ class Exporter:
         if time_step is not None:
             self._exported_time_step_file_names.append(time_step)
 
-        if self.is_GridBucket:
+        if self.time_series:
+            self._export_time_series(data, time_step, point_data)
+        elif self.is_GridBucket:
             self._export_vtk_gb(data, time_step, point_data)
         else:
             self._export_vtk_single(data, time_step, point_data)
@@ -342,6 +496,13 @@ class Exporter:
         if file_extension is None:
             file_extension = self._exported_time_step_file_names
 
+        # Make sure all files of the time steps are written
+        self.flush()
+
+        if self.time_series:
+            self._write_xdmf(timestep, file_extension)
+            return
+
         o_file = open(self._make_folder(self.folder, self.name) + ".pvd", "w")
         b = "LittleEndian" if sys.byteorder == "little" else "BigEndian"
         c = ' compressor="vtkZLibDataCompressor"'
@@ -375,149 +536,371 @@ class Exporter:
         name = self._make_folder(self.folder, self.name)
         name = self._make_file_name(name, time_step)
 
+        fields = Fields()
+        fields.extend(self._single_data_fields(data, point_data))
+        fields.extend(self._single_extra_fields())
+
+        self._submit("_write_vtk_grid", fields, name, ("single",))
+
+    # ------------------------------------------------------------------------------#
+
+    def _single_data_fields(self, data, point_data):
+        """
+        Fields of the data given for a single grid, as a dictionary of values.
+        """
         # Provide an empty dict if data is None
         if data is None:
             data = dict()
 
-        fields = Fields()
-        if len(data) > 0:
-            if point_data:
-                fields.extend(
-                    [Field(n, point_data=True, values=v) for n, v in data.items()]
-                )
-            else:
-                fields.extend(
-                    [Field(n, cell_data=True, values=v) for n, v in data.items()]
-                )
-
-        fields.extend(
-            [
-                Field(
-                    "grid_dim",
-                    cell_data=True,
-                    values=self.gb.dim * np.ones(self.gb.num_cells),
-                ),
-                Field("cell_id", cell_data=True, values=np.arange(self.gb.num_cells)),
-            ]
-        )
+        if point_data:
+            return [Field(n, point_data=True, values=v) for n, v in data.items()]
+        else:
+            return [Field(n, cell_data=True, values=v) for n, v in data.items()]
 
-        self._write_vtk(fields, name, self.gb_VTK)
+    def _single_extra_fields(self):
+        """
+        Fields that describe a single grid. These do not change in time, and
+        are constructed only once for a fixed grid.
+        """
+        if self.fixed_grid and "single" in self._extra_fields:
+            return self._extra_fields["single"]
+
+        fields = [
+            Field(
+                "grid_dim",
+                cell_data=True,
+                values=self.gb.dim * np.ones(self.gb.num_cells),
+            ),
+            Field("cell_id", cell_data=True, values=np.arange(self.gb.num_cells)),
+        ]
+        self._extra_fields["single"] = fields
+        return fields
 
     # ------------------------------------------------------------------------------#
 
     def _export_vtk_gb(self, data, time_step, point_data):
         # Convert data to list, or provide an empty list
-        if data is not None:
-            data = np.atleast_1d(data).tolist()
-        else:
-            data = list()
-
-        fields = Fields()
-        if len(data) > 0:
-            if point_data:
-                fields.extend([Field(d, point_data=True) for d in data])
-            else:
-                fields.extend([Field(d, cell_data=True) for d in data])
+        data = self._gb_data_names(data)
 
         # consider the grid_bucket node data
-        extra_fields = Fields()
-        extra_fields.extend(
-            [
-                Field("grid_dim", cell_data=True),
-                Field("cell_id", cell_data=True),
-                Field("grid_node_number", cell_data=True),
-                Field("is_mortar", cell_data=True),
-                Field("mortar_side", cell_data=True),
-            ]
-        )
-        fields.extend(extra_fields)
-
-        self.gb.assign_node_ordering(overwrite_existing=False)
-        self.gb.add_node_props(extra_fields.names())
-        # fill the extra data
-        for g, d in self.gb:
-            ones = np.ones(g.num_cells, dtype=np.int)
-            d["grid_dim"] = g.dim * ones
-            d["cell_id"] = np.arange(g.num_cells, dtype=np.int)
-            d["grid_node_number"] = d["node_number"] * ones
-            d["is_mortar"] = np.zeros(g.num_cells, dtype=np.bool)
-            d["mortar_side"] = int(pp.grids.mortar_grid.NONE_SIDE) * ones
-
         # collect the data and extra data in a single stack for each dimension
         for dim in self.dims:
             file_name = self._make_file_name(self.name, time_step, dim)
             file_name = self._make_folder(self.folder, file_name)
-            for field in fields:
-                grids = self.gb.get_grids(lambda g: g.dim == dim)
-                values = np.empty(grids.size, dtype=np.object)
-                for i, g in enumerate(grids):
-                    if field.name in data:
-                        values[i] = self.gb.graph.node[g][pp.STATE][field.name]
-                    else:
-                        values[i] = self.gb.graph.node[g][field.name]
-                    field.check(values[i], g)
-                field.set_values(np.hstack(values))
 
-            if self.gb_VTK[dim] is not None:
-                self._write_vtk(fields, file_name, self.gb_VTK[dim])
+            fields = Fields()
+            fields.extend(self._gb_data_fields(data, dim, point_data))
+            fields.extend(self._gb_extra_fields(dim))
 
-        self.gb.remove_node_props(extra_fields.names())
+            if self.gb_VTK[dim] is not None:
+                self._submit("_write_vtk_grid", fields, file_name, ("grid", dim))
 
         # consider the grid_bucket edge data
-        extra_fields = Fields()
-        extra_fields.extend(
-            [
-                Field("grid_dim", cell_data=True),
-                Field("cell_id", cell_data=True),
-                Field("grid_edge_number", cell_data=True),
-                Field("is_mortar", cell_data=True),
-                Field("mortar_side", cell_data=True),
-            ]
-        )
-        self.gb.add_edge_props(extra_fields.names())
+        # collect the extra data in a single stack for each dimension
+        for dim in self.m_dims:
+            file_name = self._make_file_name_mortar(self.name, time_step, dim)
+            file_name = self._make_folder(self.folder, file_name)
+
+            if self.m_gb_VTK[dim] is not None:
+                fields = Fields()
+                fields.extend(self._mortar_extra_fields(dim))
+                self._submit("_write_vtk_grid", fields, file_name, ("mortar", dim))
+
+        file_name = self._make_file_name(self.name, time_step, extension=".pvd")
+        file_name = self._make_folder(self.folder, file_name)
+        self._export_pvd_gb(file_name, time_step)
+
+    # ------------------------------------------------------------------------------#
+
+    def _gb_data_names(self, data):
+        # Convert data to list, or provide an empty list
+        if data is not None:
+            return np.atleast_1d(data).tolist()
+        else:
+            return list()
+
+    def _gb_data_fields(self, data, dim, point_data):
+        """
+        Fields of the data, stored in the state of the grid bucket, for the
+        grids of dimension dim.
+        """
+        if point_data:
+            fields = [Field(d, point_data=True) for d in data]
+        else:
+            fields = [Field(d, cell_data=True) for d in data]
+
+        grids = self.gb.get_grids(lambda g: g.dim == dim)
+        for field in fields:
+            values = np.empty(grids.size, dtype=np.object)
+            for i, g in enumerate(grids):
+                values[i] = self.gb.graph.node[g][pp.STATE][field.name]
+                field.check(values[i], g)
+            field.set_values(np.hstack(values))
+        return fields
+
+    def _gb_extra_fields(self, dim):
+        """
+        Fields that describe the grids of dimension dim in the grid bucket.
+        These do not change in time, and are constructed only once for a fixed
+        grid.
+        """
+        key = ("grid", dim)
+        if self.fixed_grid and key in self._extra_fields:
+            return self._extra_fields[key]
+
+        self.gb.assign_node_ordering(overwrite_existing=False)
+
+        values = {
+            "grid_dim": [],
+            "cell_id": [],
+            "grid_node_number": [],
+            "is_mortar": [],
+            "mortar_side": [],
+        }
+        for g in self.gb.get_grids(lambda g: g.dim == dim):
+            ones = np.ones(g.num_cells, dtype=np.int)
+            values["grid_dim"].append(g.dim * ones)
+            values["cell_id"].append(np.arange(g.num_cells, dtype=np.int))
+            values["grid_node_number"].append(
+                self.gb.graph.node[g]["node_number"] * ones
+            )
+            values["is_mortar"].append(np.zeros(g.num_cells, dtype=np.bool))
+            values["mortar_side"].append(int(pp.grids.mortar_grid.NONE_SIDE) * ones)
+
+        fields = [
+            Field(name, cell_data=True, values=np.hstack(val))
+            for name, val in values.items()
+        ]
+        self._extra_fields[key] = fields
+        return fields
+
+    def _mortar_extra_fields(self, dim):
+        """
+        Fields that describe the mortar grids of dimension dim in the grid
+        bucket. These do not change in time, and are constructed only once for
+        a fixed grid.
+        """
+        key = ("mortar", dim)
+        if self.fixed_grid and key in self._extra_fields:
+            return self._extra_fields[key]
+
+        self.gb.assign_node_ordering(overwrite_existing=False)
+
+        values = {
+            "grid_dim": [],
+            "cell_id": [],
+            "grid_edge_number": [],
+            "is_mortar": [],
+            "mortar_side": [],
+        }
         for _, d in self.gb.edges():
-            d["grid_dim"] = {}
-            d["cell_id"] = {}
-            d["grid_edge_number"] = {}
-            d["is_mortar"] = {}
-            d["mortar_side"] = {}
             mg = d["mortar_grid"]
+            if mg.dim != dim:
+                continue
             for side, g in mg.side_grids.items():
                 ones = np.ones(g.num_cells, dtype=np.int)
-                d["grid_dim"][side] = g.dim * ones
-                d["is_mortar"][side] = ones.astype(np.bool)
-                d["mortar_side"][side] = int(side) * ones
-                d["cell_id"][side] = np.arange(g.num_cells, dtype=np.int)
-                d["grid_edge_number"][side] = d["edge_number"] * ones
+                values["grid_dim"].append(g.dim * ones)
+                values["cell_id"].append(np.arange(g.num_cells, dtype=np.int))
+                values["grid_edge_number"].append(d["edge_number"] * ones)
+                values["is_mortar"].append(ones.astype(np.bool))
+                values["mortar_side"].append(int(side) * ones)
+
+        fields = [
+            Field(name, cell_data=True, values=np.hstack(val))
+            for name, val in values.items()
+        ]
+        self._extra_fields[key] = fields
+        return fields
 
-        # collect the data and extra data in a single stack for each dimension
-        for dim in self.m_dims:
-            file_name = self._make_file_name_mortar(self.name, time_step, dim)
-            file_name = self._make_folder(self.folder, file_name)
+    # ------------------------------------------------------------------------------#
 
-            mgs = self.gb.get_mortar_grids(lambda g: g.dim == dim)
-            cond = lambda d: d["mortar_grid"].dim == dim
-            edges = np.array([e for e, d in self.gb.edges() if cond(d)])
-            num_grids = np.sum([m.num_sides() for m in mgs])
+    def _export_time_series(self, data, time_step, point_data):
+        """
+        Export the data of a time step to binary files. The geometry is
+        written on the first call.
+        """
+        if self._time_series_mesh is None:
+            self._time_series_mesh = self._write_time_series_mesh()
 
-            for field in extra_fields:
-                values = np.empty(num_grids, dtype=np.object)
-                i = 0
-                for mg, edge in zip(mgs, edges):
-                    for side, _ in mg.side_grids.items():
-                        values[i] = self.gb.edge_props(edge, field.name)[side]
-                        i += 1
+        if self.is_GridBucket:
+            names = self._gb_data_names(data)
+
+        step = {}
+        for key, dim, is_mortar, _ in self._time_series_grids():
+            if is_mortar:
+                # Mortar grids have no data fields
+                continue
+            if self.is_GridBucket:
+                fields = self._gb_data_fields(names, dim, point_data)
+            else:
+                fields = self._single_data_fields(data, point_data)
+            if len(fields) == 0:
+                continue
+            file_name = self._make_file_name(
+                self.name + "_" + key, time_step, extension=".bin"
+            )
+            step[key] = self._write_binary(fields, file_name)
 
-                field.set_values(np.hstack(values))
+        self._time_series_steps[time_step] = step
 
-            if self.m_gb_VTK[dim] is not None:
-                self._write_vtk(extra_fields, file_name, self.m_gb_VTK[dim])
+    # ------------------------------------------------------------------------------#
 
-        file_name = self._make_file_name(self.name, time_step, extension=".pvd")
-        file_name = self._make_folder(self.folder, file_name)
-        self._export_pvd_gb(file_name, time_step)
+    def _time_series_grids(self):
+        """
+        Identifier, dimension, mortar flag and vtk grid of all grids (or, for
+        grid buckets, all dimensions of grids and mortar grids) in a time
+        series export.
+        """
+        if not self.is_GridBucket:
+            return [("grid", self.gb.dim, False, self.gb_VTK)]
+
+        grids = [
+            (str(dim), dim, False, self.gb_VTK[dim])
+            for dim in self.dims
+            if self.gb_VTK[dim] is not None
+        ]
+        grids += [
+            ("mortar_" + str(dim), dim, True, self.m_gb_VTK[dim])
+            for dim in self.m_dims
+            if self.m_gb_VTK[dim] is not None
+        ]
+        return grids
+
+    def _write_time_series_mesh(self):
+        """
+        Write the geometry and the fields describing the grids (grid_dim,
+        cell_id etc.) of a time series to binary files, one per grid.
+        """
+        mesh = {}
+        for key, dim, is_mortar, g_VTK in self._time_series_grids():
+            if not self.is_GridBucket:
+                extra_fields = self._single_extra_fields()
+            elif is_mortar:
+                extra_fields = self._mortar_extra_fields(dim)
+            else:
+                extra_fields = self._gb_extra_fields(dim)
+
+            pts = ns.vtk_to_numpy(g_VTK.GetPoints().GetData()).astype(np.float)
+            topology, num_cells = _xdmf_topology(g_VTK)
 
-        self.gb.remove_edge_props(extra_fields.names())
+            items = self._write_binary(
+                [pts, topology] + list(extra_fields), self.name + "_" + key + ".bin"
+            )
+            mesh[key] = {
+                "num_cells": num_cells,
+                "geometry": items[0],
+                "topology": items[1],
+                "fields": items[2:],
+            }
+        return mesh
+
+    def _write_binary(self, arrays, name):
+        """
+        Write fields (or arrays) to a single binary file, and return the
+        description of the data items.
+        """
+        items = []
+        all_values = []
+        offset = 0
+        for a in arrays:
+            if isinstance(a, Field):
+                values = a.values
+                shape = (values.size // a.num_components, a.num_components)
+                if a.num_components == 1:
+                    shape = shape[:1]
+                item = {
+                    "name": a.name,
+                    "center": "Cell" if a.cell_data else "Node",
+                    "type": "Scalar" if a.num_components == 1 else "Vector",
+                }
+            else:
+                values = a
+                shape = a.shape
+                item = {}
+            # XDMF has no boolean type
+            if values.dtype == np.bool:
+                values = values.astype(np.int8)
+            values = np.ascontiguousarray(values)
+            item.update(
+                {
+                    "file": name,
+                    "seek": offset,
+                    "dimensions": " ".join([str(i) for i in shape]),
+                    "number_type": _xdmf_number_type(values.dtype),
+                    "precision": values.dtype.itemsize,
+                }
+            )
+            offset += values.nbytes
+            items.append(item)
+            all_values.append(values)
+
+        self._submit("_write_binary_file", all_values, name)
+        return items
+
+    def _write_binary_file(self, arrays, name):
+        file_name = self._make_folder(self.folder, name)
+        with open(file_name, "wb") as f:
+            for values in arrays:
+                values.tofile(f)
+
+    def _write_xdmf(self, timestep, file_extension):
+        """
+        Write the XDMF file that describes a time series.
+        """
+        endian = "Little" if sys.byteorder == "little" else "Big"
+        fm = (
+            '<DataItem Dimensions="%(dimensions)s" NumberType="%(number_type)s" '
+            + 'Precision="%(precision)d" Format="Binary" '
+            + 'Endian="'
+            + endian
+            + '" Seek="%(seek)d">%(file)s</DataItem>\n'
+        )
+
+        def attribute(item):
+            return (
+                (
+                    '<Attribute Name="%(name)s" AttributeType="%(type)s" '
+                    + 'Center="%(center)s">\n'
+                )
+                % item
+                + fm % item
+                + "</Attribute>\n"
+            )
+
+        o_file = open(self._make_folder(self.folder, self.name) + ".xdmf", "w")
+        o_file.write(
+            '<?xml version="1.0" ?>\n<Xdmf Version="3.0">\n<Domain>\n'
+            + '<Grid Name="%s" GridType="Collection" ' % self.name
+            + 'CollectionType="Temporal">\n'
+        )
+        for time, fn in zip(timestep, file_extension):
+            if fn not in self._time_series_steps:
+                raise ValueError("No time step exported with file extension " + str(fn))
+            step = self._time_series_steps[fn]
+            o_file.write(
+                '<Grid Name="%s" GridType="Collection" ' % str(fn)
+                + 'CollectionType="Spatial">\n<Time Value="%f"/>\n' % time
+            )
+            for key, mesh in self._time_series_mesh.items():
+                o_file.write('<Grid Name="%s" GridType="Uniform">\n' % key)
+                o_file.write(
+                    '<Topology TopologyType="Mixed" NumberOfElements="%d">\n'
+                    % mesh["num_cells"]
+                    + fm % mesh["topology"]
+                    + "</Topology>\n"
+                )
+                o_file.write(
+                    '<Geometry GeometryType="XYZ">\n'
+                    + fm % mesh["geometry"]
+                    + "</Geometry>\n"
+                )
+                for item in step.get(key, []) + mesh["fields"]:
+                    o_file.write(attribute(item))
+                o_file.write("</Grid>\n")
+            o_file.write("</Grid>\n")
+
+        o_file.write("</Grid>\n</Domain>\n</Xdmf>\n")
+        o_file.close()
 
     # ------------------------------------------------------------------------------#
 
@@ -645,6 +1028,143 @@ class Exporter:
 
     # ------------------------------------------------------------------------------#
 
+    def flush(self):
+        """
+        Wait until all files of an asynchronous export are written.
+
+        Raises:
+        RuntimeError if the writing of a file failed, or if the background
+            writer has terminated.
+
+        """
+        if self._worker is None:
+            return
+        # Wait for the result of each task, while checking that the writer is
+        # alive: if it has terminated, the results never arrive.
+        while self._num_done < self._num_submitted:
+            self._check_worker()
+            self._get_result(timeout=_POLL_INTERVAL)
+        self._check_worker()
+
+    def close(self):
+        """
+        Write all remaining files of an asynchronous export, and stop the
+        background writer. A later export will start a new writer.
+
+        Raises:
+        RuntimeError if the writing of a file failed, or if the background
+            writer has terminated.
+
+        """
+        if self._worker is None:
+            return
+        self.flush()
+        self._tasks.put(None)
+        while self._worker.is_alive():
+            self._worker.join(_POLL_INTERVAL)
+        self._stop_worker()
+
+    # ------------------------------------------------------------------------------#
+
+    def _submit(self, task, *args):
+        """
+        Call a method that writes a file, or, for asynchronous export, pass it
+        to the background writer. The data is then copied, so that it can be
+        modified by the simulation before the file is written.
+        """
+        if not self.asynchronous:
+            getattr(self, task)(*args)
+            return
+
+        if self._worker is None:
+            self._start_worker()
+        # Limit the number of unfinished tasks, and thereby the memory used by
+        # the copied data.
+        while self._num_submitted - self._num_done >= self.queue_size:
+            self._check_worker()
+            self._get_result(timeout=_POLL_INTERVAL)
+        self._check_worker()
+        self._tasks.put((task, _snapshot(args)))
+        self._num_submitted += 1
+
+    def _writer_state(self):
+        """
+        Attributes of the exporter needed by the writing methods, sent to the
+        background writer.
+        """
+        return {
+            "folder": self.folder,
+            "binary": self.binary,
+            "gb_VTK": _vtk_to_string(self.gb_VTK),
+            "m_gb_VTK": _vtk_to_string(getattr(self, "m_gb_VTK", None)),
+        }
+
+    def _start_worker(self):
+        # Forking a process with threads, as in simulations that use threaded
+        # linear algebra, is unsafe, thus the writer is started by the
+        # forkserver, or spawned.
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+        else:
+            context = multiprocessing.get_context("spawn")
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self._num_submitted = 0
+        self._num_done = 0
+        self._worker = context.Process(
+            target=_export_worker,
+            args=(self._writer_state(), self._tasks, self._results),
+            daemon=True,
+        )
+        self._worker.start()
+        self._exit_handler = functools.partial(_close_exporter, weakref.ref(self))
+        atexit.register(self._exit_handler)
+
+    def _stop_worker(self):
+        if self._worker.is_alive():
+            self._worker.terminate()
+        # Do not wait for queued tasks to be sent to a terminated writer
+        self._tasks.cancel_join_thread()
+        self._worker = None
+        atexit.unregister(self._exit_handler)
+
+    def _get_result(self, timeout):
+        # Receive the result of a task, if it arrives within the timeout
+        try:
+            error = self._results.get(timeout=timeout)
+        except queue.Empty:
+            return
+        self._num_done += 1
+        if error is not None:
+            raise RuntimeError("Asynchronous export failed: " + error)
+
+    def _check_worker(self):
+        if not self._worker.is_alive():
+            # The writer was terminated without a request, e.g. killed by the
+            # operating system. The queued files are lost.
+            exitcode = self._worker.exitcode
+            self._stop_worker()
+            raise RuntimeError(
+                "Asynchronous export failed: The background writer terminated "
+                "unexpectedly (exit code " + str(exitcode) + ")"
+            )
+
+    # ------------------------------------------------------------------------------#
+
+    def _write_vtk_grid(self, fields, name, key):
+        """
+        Write fields to a vtu file, on the vtk grid identified by the key:
+        ("single",) for a single grid, ("grid", dim) and ("mortar", dim) for
+        the grids and mortar grids of a grid bucket.
+        """
+        if key[0] == "single":
+            g_VTK = self.gb_VTK
+        elif key[0] == "grid":
+            g_VTK = self.gb_VTK[key[1]]
+        else:
+            g_VTK = self.m_gb_VTK[key[1]]
+        self._write_vtk(fields, name, g_VTK)
+
     def _write_vtk(self, fields, name, g_VTK):
         writer = vtk.vtkXMLUnstructuredGridWriter()
         writer.SetInputData(g_VTK)
@@ -832,6 +1352,57 @@ class Exporter:
         return gVTK
 
 
+def _xdmf_number_type(dtype):
+    """ XDMF number type of a numpy dtype.
+    """
+    if dtype.kind == "f":
+        return "Float"
+    elif dtype.itemsize == 1:
+        return "Char" if dtype.kind == "i" else "UChar"
+    else:
+        return "Int" if dtype.kind == "i" else "UInt"
+
+
+def _xdmf_topology(g_VTK):
+    """ Topology of a vtk grid in the format of a mixed XDMF topology.
+
+    For each cell, the XDMF cell type is followed by the number of nodes (lines
+    and polygons), or the face stream (polyhedra), and the node indices.
+
+    Parameters:
+        g_VTK (vtk.vtkUnstructuredGrid): The grid.
+
+    Returns:
+        np.ndarray: The topology.
+        int: Number of cells.
+
+    """
+    # XDMF cell types, with a flag for whether the number of nodes is given
+    cell_types = {
+        vtk.VTK_LINE: (2, True),
+        vtk.VTK_POLYGON: (3, True),
+        vtk.VTK_TETRA: (6, False),
+        vtk.VTK_POLYHEDRON: (16, False),
+    }
+    num_cells = g_VTK.GetNumberOfCells()
+    topology = []
+    ids = vtk.vtkIdList()
+    for c in range(num_cells):
+        cell_type = g_VTK.GetCellType(c)
+        xdmf_type, add_num_nodes = cell_types[cell_type]
+        if cell_type == vtk.VTK_POLYHEDRON:
+            # The face stream contains the number of faces, and for each face
+            # the number of nodes followed by the nodes.
+            g_VTK.GetFaceStream(c, ids)
+        else:
+            g_VTK.GetCellPoints(c, ids)
+        topology.append(xdmf_type)
+        if add_num_nodes:
+            topology.append(ids.GetNumberOfIds())
+        topology += [ids.GetId(i) for i in range(ids.GetNumberOfIds())]
+    return np.array(topology, dtype=np.int64), num_cells
+
+
 def _point_ind(
     cell_ptr, face_ptr, face_cells, nodes_faces, nodes, fc, normals, num_cell_nodes
 ):
@@ -4,6 +4,7 @@ import unittest
 import porepy as pp
 
 from test.integration import setup_grids_mpfa_mpsa_tests as setup_grids
+from test import test_utils
 from test.test_utils import permute_matrix_vector
 from porepy.utils.derived_discretizations import implicit_euler as IE_discretizations
 
@@ -78,6 +79,44 @@ class BiotTest(unittest.TestCase):
         a = pp.Biot()._face_vector_to_scalar(nf, nd).toarray()
         self.assertTrue(np.allclose(known_matrix, a))
 
+    def _discretize_mechanics(self, g, max_memory=None, num_workers=None):
+        bound_mech, _ = self.make_boundary_conditions(g)
+        # Use a Neumann condition on part of the boundary, for good measure
+        bound_mech.is_neu[:, bound_mech.bf[:3]] = True
+        bound_mech.is_dir[:, bound_mech.bf[:3]] = False
+        constit = pp.FourthOrderTensor(
+            np.ones(g.num_cells), np.arange(g.num_cells) + 1.0
+        )
+        kw_m, kw_f = "mechanics", "flow"
+        param = {
+            kw_m: {
+                "bc": bound_mech,
+                "fourth_order_tensor": constit,
+                "biot_alpha": 0.5,
+                "inverter": "python",
+                "max_memory": max_memory,
+                "num_workers": num_workers,
+            }
+        }
+        data = {
+            pp.PARAMETERS: param,
+            pp.DISCRETIZATION_MATRICES: {kw_f: {}, kw_m: {}},
+        }
+        pp.Biot(kw_m, kw_f)._discretize_mech(g, data)
+        return data[pp.DISCRETIZATION_MATRICES]
+
+    def test_memory_bounded_discretization(self):
+        # Split the mechanics discretization into partitions, both sequentially
+        # and in parallel, and compare with a single computation.
+        for g in [pp.CartGrid([4, 3]), pp.StructuredTetrahedralGrid([2, 2, 1])]:
+            g.compute_geometry()
+
+            def discretize(max_memory, num_workers):
+                return self._discretize_mechanics(g, max_memory, num_workers)
+
+            max_memory = pp.numerics.fv.mpsa._estimate_peak_memory_mpsa(g) / 3
+            self.assertTrue(test_utils.compare_memory_bounded(discretize, max_memory))
+
     def test_assemble_biot(self):
         """ Test the assembly of the Biot problem using the assembler.
 
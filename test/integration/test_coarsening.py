@@ -545,6 +545,20 @@ class BasicsTest(unittest.TestCase):
 
     # ------------------------------------------------------------------------------#
 
+    def test_create_partition_isolated_cells(self):
+        # Cells without connections to other cells are not reached from the
+        # coarse cells, and should be assigned to the first aggregate.
+        g = pp.CartGrid([5, 5])
+        g.compute_geometry()
+        A = sps.block_diag((co.tpfa_matrix(g), sps.identity(3))).tocsr()
+        part = co.create_partition(A)
+        known = np.array(
+            [0, 0, 0, 1, 1, 0, 0, 2, 1, 1, 3, 2, 2, 2, 1, 3, 3, 2, 4, 4, 3, 3, 4, 4, 4]
+        )
+        self.assertTrue(np.array_equal(part, np.hstack((known, [0, 0, 0]))))
+
+    # ------------------------------------------------------------------------------#
+
     def test_create_partition_2d_tri(self):
         g = pp.StructuredTriangleGrid([3, 2])
         g.compute_geometry()
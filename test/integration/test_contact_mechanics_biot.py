@@ -15,8 +15,8 @@ import porepy.models.contact_mechanics_biot_model as model
 
 
 class TestContactMechanicsBiot(unittest.TestCase):
-    def _solve(self, setup):
-        model.run_biot(setup)
+    def _solve(self, setup, solver=None):
+        model.run_biot(setup, solver=solver)
         gb = setup.gb
 
         nd = gb.dim_max()
@@ -149,6 +149,35 @@ class TestContactMechanicsBiot(unittest.TestCase):
         # Fracture pressure is positive
         self.assertTrue(np.all(fracture_pressure > 1e-7))
 
+    def test_block_preconditioned_solver(self):
+        # The fixed-stress preconditioned GMRES solver should reproduce the
+        # solution of the direct solver.
+        results = []
+        for use_block_solver in [False, True]:
+            setup = SetupContactMechanicsBiot(
+                ux_south=0, uy_south=0, ux_north=0, uy_north=0.001
+            )
+            setup.cartesian_grid = True
+            solver = None
+            if use_block_solver:
+                solver = pp.models.contact_mechanics_model.block_solver(
+                    [
+                        [setup.displacement_variable],
+                        [setup.scalar_variable],
+                        [
+                            setup.mortar_displacement_variable,
+                            setup.contact_traction_variable,
+                            setup.mortar_scalar_variable,
+                        ],
+                    ],
+                    stabilization={1: setup.fixed_stress_stabilization},
+                    tol=1e-12,
+                )
+            results.append(self._solve(setup, solver))
+
+        for known, computed in zip(*results):
+            self.assertTrue(np.allclose(known, computed, atol=1e-10))
+
 
 class SetupContactMechanicsBiot(model.ContactMechanicsBiot):
     def __init__(self, ux_south, uy_south, ux_north, uy_north, source_value=0):
@@ -179,9 +208,12 @@ class SetupContactMechanicsBiot(model.ContactMechanicsBiot):
 
         self.box = {"xmin": 0, "ymin": 0, "xmax": 1, "ymax": 1}
 
-        network = pp.FractureNetwork2d(self.frac_pts, frac_edges, domain=self.box)
-        # Generate the mixed-dimensional mesh
-        gb = network.mesh(self.mesh_args)
+        if getattr(self, "cartesian_grid", False):
+            gb = pp.meshing.cart_grid([self.frac_pts], [10, 10], physdims=[1, 1])
+        else:
+            network = pp.FractureNetwork2d(self.frac_pts, frac_edges, domain=self.box)
+            # Generate the mixed-dimensional mesh
+            gb = network.mesh(self.mesh_args)
 
         # Set projections to local coordinates for all fractures
         pp.contact_conditions.set_projections(gb)
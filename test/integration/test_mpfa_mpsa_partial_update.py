@@ -4,6 +4,7 @@ import scipy.sparse as sps
 
 import porepy as pp
 from porepy.numerics.fv import mpsa
+from test import test_utils
 
 
 class TestPartialMPFA(unittest.TestCase):
@@ -118,6 +119,43 @@ class TestPartialMPFA(unittest.TestCase):
         self.assertTrue((bound_flux - bound_flux_full).max() < 1e-8)
         self.assertTrue((bound_flux - bound_flux_full).min() > -1e-8)
 
+    def _compare_memory_bounded(self, perm):
+        # Split the discretization into partitions by a memory constraint, and
+        # verify that the result is the same as with a single computation.
+        g = pp.CartGrid([4, 5])
+        g.compute_geometry()
+        bnd_faces = g.get_all_boundary_faces()
+        bnd = pp.BoundaryCondition(g, bnd_faces, bnd_faces.size * ["dir"])
+
+        discr = pp.Mpfa("flow")
+
+        def discretize(max_memory, num_workers):
+            return discr.mpfa(
+                g,
+                perm,
+                bnd,
+                inverter="python",
+                max_memory=max_memory,
+                num_workers=num_workers,
+            )
+
+        max_memory = discr._estimate_peak_memory(g) / 4
+        self.assertTrue(test_utils.compare_memory_bounded(discretize, max_memory))
+
+    def test_memory_bounded(self):
+        np.random.seed(42)
+        kxx = np.random.random(20)
+        kyy = np.random.random(20)
+        kxy = np.random.random(20) * kxx * kyy
+        perm = pp.SecondOrderTensor(kxx=kxx, kyy=kyy, kxy=kxy)
+        self._compare_memory_bounded(perm)
+
+    def test_memory_bounded_scalar_components(self):
+        # Tensor with components given as scalars, these should be used in all
+        # cells of all partitions.
+        perm = pp.SecondOrderTensor(np.arange(1, 21.0), kyy=2, kzz=1)
+        self._compare_memory_bounded(perm)
+
 
 class TestPartialMPSA(unittest.TestCase):
     def setup(self):
@@ -237,6 +275,34 @@ class TestPartialMPSA(unittest.TestCase):
         self.assertTrue((bound_stress - bound_stress_full).max() < 1e-8)
         self.assertTrue((bound_stress - bound_stress_full).min() > -1e-8)
 
+    def test_memory_bounded(self):
+        # Split the discretization into partitions by a memory constraint, and
+        # verify that the result is the same as with a single computation.
+        g = pp.CartGrid([4, 5])
+        g.compute_geometry()
+
+        np.random.seed(42)
+        mu = np.random.random(g.num_cells)
+        lmbda = np.random.random(g.num_cells)
+        stiffness = pp.FourthOrderTensor(mu, lmbda)
+
+        bnd_faces = g.get_all_boundary_faces()
+        bnd = pp.BoundaryConditionVectorial(g, bnd_faces, bnd_faces.size * ["dir"])
+
+        def discretize(max_memory, num_workers):
+            stress, bound_stress = mpsa.mpsa(
+                g,
+                stiffness,
+                bnd,
+                inverter="python",
+                max_memory=max_memory,
+                num_workers=num_workers,
+            )[:2]
+            return [stress, bound_stress]
+
+        max_memory = mpsa._estimate_peak_memory_mpsa(g) / 4
+        self.assertTrue(test_utils.compare_memory_bounded(discretize, max_memory))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -88,6 +88,21 @@ class BasicsTest(unittest.TestCase):
         test_utils.solve_and_distribute_pressure(gb, assembler)
         self.assertTrue(check_pressures(gb))
 
+    def test_parallel_discretization(self):
+        # Discretization with a thread pool should give the same system as the
+        # sequential one
+        systems = []
+        for num_workers in [None, 3]:
+            gb = setup_2d_1d(np.array([10, 10]))
+            tpfa = pp.Tpfa("flow")
+            assembler = test_utils.setup_flow_assembler(gb, tpfa, "flow")
+            assembler.discretize(num_workers=num_workers)
+            systems.append(assembler.assemble_matrix_rhs())
+
+        (A, b), (A_parallel, b_parallel) = systems
+        self.assertTrue(np.allclose((A - A_parallel).A, 0))
+        self.assertTrue(np.allclose(b, b_parallel))
+
 
 if __name__ == "__main__":
     unittest.main()
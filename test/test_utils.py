@@ -145,6 +145,51 @@ def compare_arrays(a, b, tol=1e-4, sort=True):
     return True
 
 
+def compare_memory_bounded(discretize, max_memory, num_workers=(None, 2)):
+    """ Compare a discretization computed in one piece with discretizations
+    split into partitions by a memory constraint.
+
+    Parameters:
+        discretize (callable): Computes the discretization. Called with the
+            keyword arguments max_memory and num_workers, and returns a list,
+            or a (nested) dictionary, of sparse matrices.
+        max_memory (double): Memory constraint for the partitioned
+            discretizations.
+        num_workers (iterable, optional): Number of workers used for the
+            partitioned discretizations, each value is compared with the full
+            discretization. Defaults to sequential and two workers.
+
+    Returns:
+        True if all matrices have the same shape and values, up to round off.
+    """
+    full = _flatten_matrices(discretize(max_memory=None, num_workers=None))
+    for workers in num_workers:
+        split = discretize(max_memory=max_memory, num_workers=workers)
+        split = _flatten_matrices(split)
+        if len(full) != len(split):
+            return False
+        for (key, mat), (key_split, mat_split) in zip(full, split):
+            if key != key_split or mat.shape != mat_split.shape:
+                return False
+            if not np.allclose((mat - mat_split).A, 0):
+                return False
+    return True
+
+
+def _flatten_matrices(matrices, prefix=()):
+    # List of (key, matrix) pairs for a list or nested dictionary of matrices
+    if isinstance(matrices, dict):
+        items = sorted(matrices.items())
+    elif isinstance(matrices, (list, tuple)):
+        items = enumerate(matrices)
+    else:
+        return [(prefix, matrices)]
+    flat = []
+    for key, val in items:
+        flat += _flatten_matrices(val, prefix + (key,))
+    return flat
+
+
 def delete_file(file_name):
     """ Delete a file if it exist. Cleanup after tests.
     """
@@ -1478,6 +1478,123 @@ class TestAssembler(unittest.TestCase):
             param_known = np.array([5, 6, 7, 1, 3, 4])
         self.assertTrue(np.allclose(param_known, P))
 
+    def test_variable_dof_ind(self):
+        gb = self.define_gb()
+        for g, d in gb:
+            d[pp.PRIMARY_VARIABLES] = {"var_1": {"cells": 1}, "var_2": {"cells": 2}}
+        for e, d in gb.edges():
+            d[pp.PRIMARY_VARIABLES] = {"var_1": {"cells": 1}}
+
+        assembler = pp.Assembler(gb)
+        ind_1 = assembler.variable_dof_ind("var_1")
+        ind_2 = assembler.variable_dof_ind(["var_2"])
+        self.assertTrue(ind_1.size == 3)
+        self.assertTrue(ind_2.size == 4)
+        self.assertTrue(
+            np.all(np.sort(np.hstack((ind_1, ind_2))) == np.arange(assembler.num_dof()))
+        )
+        for g, _ in gb:
+            self.assertTrue(np.all(np.in1d(assembler.dof_ind(g, "var_2"), ind_2)))
+
+    ### Incremental assembly
+
+    def define_gb_incremental(self):
+        """ Single variable, with an edge discretization that modifies the nodes.
+        """
+        gb = self.define_gb()
+        key = "var_1"
+        term = "op"
+        for g, d in gb:
+            d[pp.PRIMARY_VARIABLES] = {key: {"cells": 1}}
+            d[pp.DISCRETIZATION] = {key: {term: MockNodeDiscretization(g.grid_num)}}
+            if g.grid_num == 1:
+                g1 = g
+            else:
+                g2 = g
+        for e, d in gb.edges():
+            d[pp.PRIMARY_VARIABLES] = {key: {"cells": 1}}
+            d[pp.COUPLING_DISCRETIZATION] = {
+                "coupling_discretization": {
+                    g1: (key, term),
+                    g2: (key, term),
+                    e: (key, MockEdgeDiscretizationModifiesNode(1, 2)),
+                }
+            }
+        return gb, g1
+
+    def test_incremental_assembly_no_change(self):
+        gb, _ = self.define_gb_incremental()
+        assembler = pp.Assembler(gb)
+        A, _ = assembler.assemble_matrix_rhs(incremental=True)
+        A_2, _ = assembler.assemble_matrix_rhs(incremental=True)
+        self.assertTrue(np.allclose(A.todense(), A_2.todense()))
+
+    def test_incremental_assembly_mark_dirty(self):
+        gb, g1 = self.define_gb_incremental()
+        assembler = pp.Assembler(gb)
+        A_old, _ = assembler.assemble_matrix_rhs(incremental=True)
+
+        # Change the discretization on one node. Without marking the block, the
+        # incremental assembly should reuse the previous matrix.
+        gb.node_props(g1, pp.DISCRETIZATION)["var_1"]["op"].value = 5
+        A, _ = assembler.assemble_matrix_rhs(incremental=True)
+        self.assertTrue(np.allclose(A_old.todense(), A.todense()))
+
+        # Mark the node as dirty. The updated node block and the coupling term,
+        # which modifies the node, should be reassembled.
+        assembler.mark_dirty(grid=g1)
+        A, _ = assembler.assemble_matrix_rhs(incremental=True)
+        A_known, _ = pp.Assembler(gb).assemble_matrix_rhs()
+        self.assertTrue(np.allclose(A_known.todense(), A.todense()))
+        self.assertFalse(np.allclose(A_old.todense(), A.todense()))
+
+        # A non-incremental assembly should give the same result
+        A_full, _ = assembler.assemble_matrix_rhs()
+        self.assertTrue(np.allclose(A_known.todense(), A_full.todense()))
+
+    def test_incremental_assembly_sparsity_pattern(self):
+        for matrix_format in ["csr", "csc"]:
+            gb, g1 = self.define_gb_incremental()
+            assembler = pp.Assembler(gb)
+            A, _ = assembler.assemble_matrix_rhs(
+                matrix_format, incremental=True, reuse_matrix=True
+            )
+            self.assertTrue(A.getformat() == matrix_format)
+            data = A.data
+
+            gb.node_props(g1, pp.DISCRETIZATION)["var_1"]["op"].value = 5
+            assembler.mark_dirty(grid=g1)
+            A, _ = assembler.assemble_matrix_rhs(
+                matrix_format, incremental=True, reuse_matrix=True
+            )
+
+            # The values should be scattered into the preallocated matrix
+            self.assertTrue(A.data is data)
+            A_known, _ = pp.Assembler(gb).assemble_matrix_rhs(matrix_format)
+            self.assertTrue(np.allclose(A_known.todense(), A.todense()))
+
+    def test_incremental_assembly_does_not_modify_blocks(self):
+        # A block with duplicate entries, owned by the discretization, should
+        # not be brought to canonical format in place. Off-diagonal blocks are
+        # taken directly from the discretization.
+        gb = self.define_gb()
+        discr = MockNodeDiscretizationDuplicates()
+        for g, d in gb:
+            d[pp.PRIMARY_VARIABLES] = {"var_1": {"cells": 1}, "var_2": {"cells": 1}}
+            d[pp.DISCRETIZATION] = {
+                "var_1": {"op": MockNodeDiscretization(1)},
+                "var_2": {"op": MockNodeDiscretization(2)},
+                "var_1_var_2": {"op": discr},
+            }
+        for _, d in gb.edges():
+            d[pp.PRIMARY_VARIABLES] = {}
+        assembler = pp.Assembler(gb)
+        A, _ = assembler.assemble_matrix_rhs(incremental=True)
+
+        self.assertTrue(discr.matrix.nnz == 2)
+        A_known, _ = pp.Assembler(gb).assemble_matrix_rhs()
+        self.assertTrue(np.allclose(A_known.todense(), A.todense()))
+
 
 class MockNodeDiscretization(object):
     def __init__(self, value):
@@ -1487,6 +1604,16 @@ class MockNodeDiscretization(object):
         return sps.coo_matrix(self.value), np.zeros(1)
 
 
+class MockNodeDiscretizationDuplicates(object):
+    def __init__(self):
+        self.matrix = sps.csr_matrix(
+            (np.array([1.0, 2.0]), np.array([0, 0]), np.array([0, 2])), shape=(1, 1)
+        )
+
+    def assemble_matrix_rhs(self, g, data):
+        return self.matrix, np.zeros(1)
+
+
 class MockEdgeDiscretization(object):
     def __init__(self, diag_val, off_diag_val):
         self.diag_val = diag_val
@@ -0,0 +1,187 @@
+"""
+Tests of the discretization of contact conditions.
+"""
+import unittest
+
+import numpy as np
+
+import porepy as pp
+
+
+class TestColoumbContact(unittest.TestCase):
+    def setup(
+        self,
+        contact_traction,
+        friction_coefficient,
+        discr=None,
+        displacement_iterate=None,
+    ):
+        # A single fracture with three cells
+        gb = pp.meshing.cart_grid([np.array([[1, 4], [2, 2]])], [5, 4])
+        pp.contact_conditions.set_projections(gb)
+
+        g_l = gb.grids_of_dimension(1)[0]
+        g_h = gb.grids_of_dimension(2)[0]
+        e = (g_h, g_l)
+        data_l = gb.node_props(g_l)
+        data_h = gb.node_props(g_h)
+        data_edge = gb.edge_props(e)
+
+        mg = data_edge["mortar_grid"]
+        data_l[pp.PARAMETERS] = {
+            "contact": {"friction_coefficient": friction_coefficient}
+        }
+        data_l[pp.DISCRETIZATION_MATRICES] = {"contact": {}}
+        data_l[pp.STATE] = {"previous_iterate": {"contact_traction": contact_traction}}
+        u = np.zeros(mg.num_cells * 2)
+        if displacement_iterate is None:
+            displacement_iterate = u
+        data_edge[pp.STATE] = {
+            "mortar_u": u,
+            "previous_iterate": {"mortar_u": displacement_iterate},
+        }
+
+        if discr is None:
+            discr = pp.ColoumbContact("contact", 2)
+        discr.discretize(g_h, g_l, data_h, data_l, data_edge)
+        self.discr = discr
+        self.data = (g_h, g_l, data_h, data_l, data_edge)
+        self.data_gb = gb
+        return data_l[pp.DISCRETIZATION_MATRICES]["contact"]
+
+    def rediscretize(self, contact_traction):
+        g_h, g_l, data_h, data_l, data_edge = self.data
+        data_l[pp.STATE]["previous_iterate"]["contact_traction"] = contact_traction
+        self.discr.discretize(g_h, g_l, data_h, data_l, data_edge)
+        return data_l[pp.DISCRETIZATION_MATRICES]["contact"]
+
+    def compare_matrices(self, matrices, known):
+        for key in [
+            "traction_discretization",
+            "displacement_discretization",
+            "contact_rhs",
+        ]:
+            A = matrices[key]
+            B = known[key]
+            if key != "contact_rhs":
+                A = A.toarray()
+                B = B.toarray()
+            self.assertTrue(np.allclose(A, B))
+
+    def test_open_stick_slide(self):
+        # First cell is open, second sticking, third is sliding.
+        # The contact traction is given in the local coordinates, tangential
+        # component first.
+        traction = np.array([0, 1, 0, -1, 2, -1])
+        matrices = self.setup(traction, 0.5)
+
+        traction_weight = np.array(
+            [[1, 0, 0, 0, 0, 0], [0, 1, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0]]
+            + [[0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 1, 0.5], [0, 0, 0, 0, 0, 0]]
+        )
+        displacement_weight = np.array(
+            [[0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0], [0, 0, 1, 0, 0, 0]]
+            + [[0, 0, 0, 1, 0, 0], [0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 1]]
+        )
+
+        self.assertTrue(
+            np.allclose(matrices["traction_discretization"].toarray(), traction_weight)
+        )
+        self.assertTrue(
+            np.allclose(
+                matrices["displacement_discretization"].toarray(), displacement_weight,
+            )
+        )
+        self.assertTrue(np.allclose(matrices["contact_rhs"], 0))
+
+    def test_zero_friction(self):
+        # Sliding cells without friction. The tangential traction should vanish.
+        traction = np.array([1, -1, 2, -1, -3, -1])
+        matrices = self.setup(traction, 0)
+
+        traction_weight = matrices["traction_discretization"].toarray()
+        displacement_weight = matrices["displacement_discretization"].toarray()
+        self.assertTrue(np.allclose(traction_weight, np.diag([1, 0, 1, 0, 1, 0])))
+        self.assertTrue(np.allclose(displacement_weight, np.diag([0, 1, 0, 1, 0, 1])))
+        self.assertTrue(np.allclose(matrices["contact_rhs"], 0))
+
+    def test_sparsity_pattern_independent_of_state(self):
+        # The discretization matrices should have the same sparsity pattern for
+        # all states of the contact.
+        matrices_open = self.setup(np.ones(6), 0.5)
+        matrices_slide = self.setup(np.array([2, -1, -2, -1, 3, -1]), 0.5)
+        for key in ["traction_discretization", "displacement_discretization"]:
+            A = matrices_open[key].tocsr()
+            B = matrices_slide[key].tocsr()
+            self.assertTrue(np.all(A.indices == B.indices))
+            self.assertTrue(np.all(A.indptr == B.indptr))
+
+    def test_active_set(self):
+        traction = np.array([0, 1, 0, -1, 2, -1])
+        matrices = self.setup(traction, 0.5)
+        discr = self.discr
+        known_active_set = [discr.OPEN, discr.STICKING, discr.SLIDING]
+        self.assertTrue(np.all(matrices["active_set"] == known_active_set))
+        self.assertEqual(matrices["active_set_changes"], 3)
+
+    def test_rediscretize_changed_active_set(self):
+        # The first cell goes from open to sliding, the third from sliding to
+        # sticking. The result should equal a discretization from scratch.
+        matrices = self.setup(np.array([0, 1, 0, -1, 2, -1]), 0.5)
+        traction = np.array([-1.5, -2, 0, -1, 0.1, -1])
+        matrices = self.rediscretize(traction)
+
+        discr = self.discr
+        known_active_set = [discr.SLIDING, discr.STICKING, discr.STICKING]
+        self.assertTrue(np.all(matrices["active_set"] == known_active_set))
+        self.assertEqual(matrices["active_set_changes"], 2)
+        self.assertEqual(
+            pp.contact_conditions.active_set_changes(self.data_gb, "contact"), 2
+        )
+
+        known = self.setup(traction, 0.5)
+        self.compare_matrices(matrices, known)
+
+    def test_rediscretize_changed_iterate(self):
+        # The active set is unchanged, but the sliding traction has changed.
+        matrices = self.setup(np.array([0, 1, 0, -1, 2, -1]), 0.5)
+        traction = np.array([3, 1, 0, -1, 3, -2])
+        matrices = self.rediscretize(traction)
+        self.assertEqual(matrices["active_set_changes"], 0)
+
+        known = self.setup(traction, 0.5)
+        self.compare_matrices(matrices, known)
+
+    def test_rediscretize_tolerance(self):
+        # With a tolerance, a small change in the iterate is ignored. The change
+        # is in the normal traction of the sticking cell, which enters the
+        # discretization together with the displacement jump.
+        u = 0.001 * np.arange(12)
+        discr = pp.ColoumbContact("contact", 2, update_tol=0.1)
+        known = dict(self.setup(np.array([0, 1, 0, -1, 2, -1]), 0.5, discr, u))
+
+        traction = np.array([0, 1, 0, -1.05, 2, -1])
+        matrices = self.rediscretize(traction)
+        self.compare_matrices(matrices, known)
+        updated = self.setup(traction, 0.5, displacement_iterate=u)
+        self.assertFalse(
+            np.allclose(
+                known["traction_discretization"].toarray(),
+                updated["traction_discretization"].toarray(),
+            )
+        )
+
+        # Changes are measured relative to the iterate of the last
+        # discretization, thus an accumulated change is picked up
+        self.setup(np.array([0, 1, 0, -1, 2, -1]), 0.5, discr, u)
+        matrices = self.rediscretize(np.array([0, 1, 0, -1.05, 2, -1]))
+        matrices = self.rediscretize(np.array([0, 1, 0, -1.08, 2, -1]))
+        self.compare_matrices(matrices, known)
+        traction = np.array([0, 1, 0, -1.2, 2, -1])
+        matrices = self.rediscretize(traction)
+        known = self.setup(traction, 0.5, displacement_iterate=u)
+        self.compare_matrices(matrices, known)
+
+
+if __name__ == "__main__":
+    unittest.main()
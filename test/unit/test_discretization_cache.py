@@ -0,0 +1,113 @@
+"""
+Tests of the on-disk cache of discretization matrices, pp.DiscretizationCache.
+"""
+import shutil
+import unittest
+
+import numpy as np
+
+import porepy as pp
+
+
+class TestDiscretizationCache(unittest.TestCase):
+    def setUp(self):
+        self.folder = "./test_discretization_cache/"
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def setup_gb(self, perm=1):
+        gb = pp.meshing.cart_grid([np.array([[1, 3], [2, 2]])], [4, 4])
+        for g, d in gb:
+            specified_parameters = {
+                "second_order_tensor": pp.SecondOrderTensor(
+                    perm * np.ones(g.num_cells)
+                ),
+                "mpfa_inverter": "python",
+            }
+            pp.initialize_default_data(g, d, "flow", specified_parameters)
+            d[pp.PRIMARY_VARIABLES] = {"pressure": {"cells": 1}}
+            d[pp.DISCRETIZATION] = {"pressure": {"diffusion": pp.Mpfa("flow")}}
+        for _, d in gb.edges():
+            d[pp.PRIMARY_VARIABLES] = {}
+        return gb
+
+    def test_hit_and_miss(self):
+        cache = pp.DiscretizationCache(self.folder)
+
+        gb = self.setup_gb()
+        pp.Assembler(gb).discretize(cache=cache)
+        self.assertTrue(cache.num_misses == gb.num_graph_nodes())
+        self.assertTrue(cache.num_hits == 0)
+
+        # Same setup, the matrices should be loaded from the cache
+        gb_cached = self.setup_gb()
+        pp.Assembler(gb_cached).discretize(cache=cache)
+        self.assertTrue(cache.num_hits == gb.num_graph_nodes())
+
+        for (g, d), (_, d_cached) in zip(gb, gb_cached):
+            known = d[pp.DISCRETIZATION_MATRICES]["flow"]
+            cached = d_cached[pp.DISCRETIZATION_MATRICES]["flow"]
+            self.assertTrue(set(known.keys()) == set(cached.keys()))
+            for key, mat in known.items():
+                self.assertTrue(np.allclose((mat - cached[key]).A, 0))
+
+        # Changing the permeability should give new discretizations
+        pp.Assembler(self.setup_gb(perm=2)).discretize(cache=cache)
+        self.assertTrue(cache.num_misses == 2 * gb.num_graph_nodes())
+
+    def test_unhashable_parameter(self):
+        # Functions in the parameters cannot be hashed, the discretization
+        # should be computed without the cache.
+        cache = pp.DiscretizationCache(self.folder)
+        gb = self.setup_gb()
+        for _, d in gb:
+            d[pp.PARAMETERS]["flow"]["some_function"] = lambda x: x
+        pp.Assembler(gb).discretize(cache=cache)
+
+        self.assertTrue(cache.num_misses == 0)
+        self.assertTrue(cache.num_hits == 0)
+        for _, d in gb:
+            self.assertTrue("flux" in d[pp.DISCRETIZATION_MATRICES]["flow"])
+
+    def test_key_independent_of_tensor_representation(self):
+        # Forming the full tensor should not change the key
+        cache = pp.DiscretizationCache(self.folder)
+        gb = self.setup_gb()
+        g = gb.grids_of_dimension(2)[0]
+        d = gb.node_props(g)
+        discr = d[pp.DISCRETIZATION]["pressure"]["diffusion"]
+
+        key = cache.key(discr, g, d)
+        d[pp.PARAMETERS]["flow"]["second_order_tensor"].values
+        self.assertTrue(cache.key(discr, g, d) == key)
+
+        # Changing the values should change the key
+        d[pp.PARAMETERS]["flow"]["second_order_tensor"].values[0, 0, 0] = 2
+        self.assertTrue(cache.key(discr, g, d) != key)
+
+    def test_matrix_updated_in_place(self):
+        # A discretization that updates an existing matrix in place should
+        # have the matrix stored.
+        class InPlaceDiscretization:
+            def __init__(self):
+                self.keyword = "flow"
+
+            def discretize(self, g, data):
+                data[pp.DISCRETIZATION_MATRICES]["flow"]["matrix"] *= 2
+
+        cache = pp.DiscretizationCache(self.folder)
+        g = pp.CartGrid([2, 2])
+        g.compute_geometry()
+        d = {pp.DISCRETIZATION_MATRICES: {"flow": {"matrix": np.ones(3)}}}
+        cache.discretize(InPlaceDiscretization(), g, d)
+
+        d_cached = {pp.DISCRETIZATION_MATRICES: {"flow": {"matrix": np.ones(3)}}}
+        cache.discretize(InPlaceDiscretization(), g, d_cached)
+        self.assertTrue(cache.num_hits == 1)
+        matrix = d_cached[pp.DISCRETIZATION_MATRICES]["flow"]["matrix"]
+        self.assertTrue(np.allclose(matrix, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
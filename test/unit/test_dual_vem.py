@@ -715,6 +715,49 @@ class BasicsTest(unittest.TestCase):
             )
         )
 
+    # ------------------------------------------------------------------------------#
+
+    def test_dual_vem_mixed_cells_ani(self):
+        # Cells with different number of faces. Compare with a cell-wise
+        # computation of the local matrices.
+        g = pp.CartGrid([4, 3], [1, 1])
+        g.compute_geometry()
+        subdiv = np.array([0, 0, 1, 2, 3, 4, 5, 5, 6, 7, 7, 7])
+        pp.coarsening.generate_coarse_grid(g, subdiv)
+        g.compute_geometry()
+
+        kxx = np.square(g.cell_centers[1, :]) + 1
+        kyy = np.square(g.cell_centers[0, :]) + 1
+        kxy = -np.multiply(g.cell_centers[0, :], g.cell_centers[1, :])
+        perm = pp.SecondOrderTensor(kxx=kxx, kyy=kyy, kxy=kxy, kzz=1)
+
+        bf = g.tags["domain_boundary_faces"].nonzero()[0]
+        bc = pp.BoundaryCondition(g, bf, bf.size * ["dir"])
+        data = pp.initialize_default_data(
+            g, {}, "flow", {"second_order_tensor": perm, "bc": bc}
+        )
+        pp.MVEM("flow").discretize(g, data)
+        mass = data[pp.DISCRETIZATION_MATRICES]["flow"]["mass"].todense()
+
+        faces, cells, sign = sps.find(g.cell_faces)
+        diams = g.cell_diameters()
+        mass_known = np.zeros((g.num_faces, g.num_faces))
+        for c in np.arange(g.num_cells):
+            loc = cells == c
+            A = pp.MVEM.massHdiv(
+                perm.values[:2, :2, c],
+                g.cell_centers[:2, c],
+                g.cell_volumes[c],
+                g.face_centers[:2, faces[loc]],
+                g.face_normals[:2, faces[loc]],
+                sign[loc],
+                diams[c],
+                1,
+            )[0]
+            mass_known[np.ix_(faces[loc], faces[loc])] += A
+
+        self.assertTrue(np.allclose(mass, mass_known))
+
 
 # ------------------------------------------------------------------------------#
 
@@ -213,6 +213,31 @@ class TestBoundingBoxIntersection(unittest.TestCase):
 
         self.assertTrue(np.allclose(pairs_1, combined_pairs))
 
+    def test_random_boxes_3d(self):
+        # Compare with a brute force search, using small chunks in the sweep
+        np.random.seed(0)
+        num_boxes = 200
+        min_coord = np.random.rand(3, num_boxes)
+        max_coord = min_coord + 0.2 * np.random.rand(3, num_boxes)
+        # Some boxes are points, and some touch
+        max_coord[:, :10] = min_coord[:, :10]
+        min_coord[:, 10:20] = max_coord[:, 20:30]
+
+        pairs = pp.intersections._identify_overlapping_boxes(
+            min_coord, max_coord, max_candidates=50
+        )
+
+        known = []
+        for i in range(num_boxes):
+            for j in range(i + 1, num_boxes):
+                if np.all(min_coord[:, i] <= max_coord[:, j]) and np.all(
+                    min_coord[:, j] <= max_coord[:, i]
+                ):
+                    known.append([i, j])
+        known = np.array(known).T
+
+        self.assertTrue(np.array_equal(pairs, known))
+
 
 class TestFractureIntersectionRemoval(unittest.TestCase):
     def test_lines_crossing_origin(self):
@@ -275,6 +300,41 @@ class TestFractureIntersectionRemoval(unittest.TestCase):
         self.assertTrue(np.allclose(new_pts, p))
         self.assertTrue(test_utils.compare_arrays(new_lines, lines_known))
 
+    def test_grid_of_lines(self):
+        # Horizontal and vertical lines, all crossing each other. Tags should
+        # be preserved on the branches.
+        num_x, num_y = 4, 3
+        x = np.arange(num_x) + 0.5
+        y = np.arange(num_y) + 0.5
+        p_x = np.vstack((np.repeat(x, 2), np.tile([0, num_y], num_x)))
+        p_y = np.vstack((np.tile([0, num_x], num_y), np.repeat(y, 2)))
+        p = np.hstack((p_x, p_y))
+        num_lines = num_x + num_y
+        lines = np.vstack(
+            (
+                2 * np.arange(num_lines),
+                2 * np.arange(num_lines) + 1,
+                np.arange(num_lines),
+            )
+        )
+
+        new_pts, new_lines = pp.intersections.split_intersecting_segments_2d(p, lines)
+
+        self.assertTrue(new_pts.shape[1] == 2 * num_lines + num_x * num_y)
+        self.assertTrue(new_lines.shape[1] == num_x * (num_y + 1) + num_y * (num_x + 1))
+        # All crossings are among the points
+        xx, yy = np.meshgrid(x, y)
+        for pt in np.vstack((xx.ravel(), yy.ravel())).T:
+            self.assertTrue(np.min(np.sum((new_pts.T - pt) ** 2, axis=1)) < 1e-10)
+        # The branches have the tag of the line they are part of
+        for li in range(num_lines):
+            branches = new_lines[:2, new_lines[2] == li]
+            is_vertical = li < num_x
+            num_branches = num_y + 1 if is_vertical else num_x + 1
+            self.assertTrue(branches.shape[1] == num_branches)
+            coord = new_pts[0 if is_vertical else 1, branches]
+            self.assertTrue(np.allclose(coord, x[li] if is_vertical else y[li - num_x]))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,6 @@
 from __future__ import division
 import numpy as np
+import scipy.sparse as sps
 import unittest
 
 from porepy.numerics.fv import fvutils
@@ -69,3 +70,27 @@ class TestFvutils(unittest.TestCase):
         self.assertTrue(fvutils.determine_eta(g) == 1 / 3)
         g = structured.CartGrid([1, 1])
         self.assertTrue(fvutils.determine_eta(g) == 0)
+
+    def test_map_partitions(self):
+        # The results should be in the order of the arguments, and independent
+        # of the number of workers. The sparse results are sent back by their
+        # non-zero rows.
+        arguments = [{"row": row} for row in [3, 0, 5, 1]]
+        shared = {"value": 2.0, "shape": (6, 4)}
+        for num_workers in [None, 2]:
+            results = list(
+                fvutils.map_partitions(_row_matrix, arguments, num_workers, shared)
+            )
+            self.assertTrue(len(results) == len(arguments))
+            for kwargs, (mat, row) in zip(arguments, results):
+                self.assertTrue(row == kwargs["row"])
+                self.assertTrue(mat.shape == (6, 4))
+                known = np.zeros((6, 4))
+                known[row, row % 4] = 2.0
+                self.assertTrue(np.allclose(mat.toarray(), known))
+
+
+def _row_matrix(row, value, shape):
+    # Matrix with a single non-zero entry, evaluated by map_partitions
+    mat = sps.coo_matrix(([value], ([row], [row % shape[1]])), shape=shape)
+    return mat, row
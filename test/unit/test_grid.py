@@ -22,6 +22,15 @@ class TestDiameterComputation(unittest.TestCase):
         known = np.repeat(np.sqrt(3), g.num_cells)
         self.assertTrue(np.allclose(cell_diameters, known))
 
+    def test_cell_diameters_mixed_cells(self):
+        # Coarse grid with cells of different number of nodes
+        g = pp.CartGrid([3, 2], [3, 2])
+        g.compute_geometry()
+        pp.coarsening.generate_coarse_grid(g, np.array([0, 0, 1, 2, 3, 3]))
+        cell_diameters = g.cell_diameters()
+        known = np.array([np.sqrt(5), np.sqrt(2), np.sqrt(2), np.sqrt(5)])
+        self.assertTrue(np.allclose(cell_diameters, known))
+
 
 class TestReprAndStr(unittest.TestCase):
     def test_repr(self):
@@ -55,6 +64,25 @@ class TestClosestCell(unittest.TestCase):
         self.assertTrue(ind[0] == 0)
         self.assertTrue(ind.size == 1)
 
+    def test_distance(self):
+        g = pp.CartGrid([2, 2])
+        g.compute_geometry()
+        p = np.array([[0.5, 1.5], [0.5, 1.5], [1, 0]])
+        ind, dist = g.closest_cell(p, return_distance=True)
+        self.assertTrue(np.allclose(ind, [0, 3]))
+        self.assertTrue(np.allclose(dist, [1, 0]))
+
+    def test_updated_geometry(self):
+        # The search structure should be updated when the geometry changes
+        g = pp.CartGrid([2, 1])
+        g.compute_geometry()
+        p = np.array([[1.4], [0.5], [0]])
+        self.assertTrue(g.closest_cell(p)[0] == 1)
+
+        g.nodes[0] += 1
+        g.compute_geometry()
+        self.assertTrue(g.closest_cell(p)[0] == 0)
+
 
 class TestCellFaceAsDense(unittest.TestCase):
     def test_cart_grid(self):
@@ -64,6 +92,109 @@ class TestCellFaceAsDense(unittest.TestCase):
         self.assertTrue(np.allclose(cf, known))
 
 
+class TestConnectivityCache(unittest.TestCase):
+    def test_cached(self):
+        g = pp.CartGrid([3, 2])
+        self.assertTrue(g.cell_nodes() is g.cell_nodes())
+        self.assertTrue(g.num_cell_nodes() is g.num_cell_nodes())
+        self.assertTrue(g.cell_face_as_dense() is g.cell_face_as_dense())
+        self.assertTrue(g.cell_connection_map() is g.cell_connection_map())
+
+    def test_cache_info(self):
+        g = pp.CartGrid([3, 2])
+        self.assertTrue(len(g.connectivity_cache_info()) == 0)
+        cn = g.cell_nodes()
+        g.num_cell_nodes()
+        info = g.connectivity_cache_info()
+        self.assertTrue(set(info.keys()) == {"cell_nodes", "num_cell_nodes"})
+        nbytes = cn.data.nbytes + cn.indices.nbytes + cn.indptr.nbytes
+        self.assertTrue(info["cell_nodes"] == nbytes)
+        self.assertTrue(info["num_cell_nodes"] == g.num_cells * 8)
+
+    def test_cached_array_read_only(self):
+        g = pp.CartGrid([3, 2])
+        num_nodes = g.num_cell_nodes()
+        self.assertTrue(np.all(num_nodes == 4))
+        with self.assertRaises(ValueError):
+            num_nodes[0] = 3
+
+    def test_replaced_topology(self):
+        # Replacing the cell-face map should clear the cache
+        g = pp.CartGrid([2, 1])
+        c2c = g.cell_connection_map()
+        self.assertTrue(c2c[0, 1])
+        cell_faces = g.cell_faces.tolil()
+        cell_faces[[1, 1], [0, 1]] = 0
+        cell_faces[6, 1] = 1
+        g.cell_faces = cell_faces.tocsc()
+        self.assertFalse(g.cell_connection_map()[0, 1])
+
+    def test_invalidate(self):
+        # Modifications in place require explicit invalidation
+        g = pp.CartGrid([2, 1])
+        cn = g.cell_nodes()
+        self.assertTrue(np.all(cn.indices[:4] == [0, 1, 3, 4]))
+        g.face_nodes.indices[g.face_nodes.indices == 0] = 5
+        self.assertTrue(g.cell_nodes() is cn)
+        g.invalidate_connectivity()
+        self.assertTrue(np.all(g.cell_nodes().indices[:3] == [1, 3, 4]))
+
+    def test_split_fractures(self):
+        # The cell connection map should reflect the split faces
+        gb = pp.meshing.cart_grid([np.array([[0, 2], [1, 1]])], [2, 2])
+        g = gb.grids_of_dimension(2)[0]
+        c2c = g.cell_connection_map().toarray()
+        self.assertFalse(c2c[0, 2])
+        self.assertTrue(c2c[0, 1])
+        known = pp.Grid(
+            g.dim, g.nodes, g.face_nodes.copy(), g.cell_faces.copy(), "copy"
+        )
+        self.assertTrue(
+            np.all(known.cell_nodes().toarray() == g.cell_nodes().toarray())
+        )
+
+
+class TestComputeGeometryChunks(unittest.TestCase):
+    def compare(self, g):
+        g.compute_geometry()
+        known = {
+            key: getattr(g, key).copy()
+            for key in [
+                "face_centers",
+                "face_normals",
+                "face_areas",
+                "cell_centers",
+                "cell_volumes",
+            ]
+        }
+        for chunk_size in [1, 5]:
+            for num_workers in [None, 3]:
+                g.compute_geometry(chunk_size=chunk_size, num_workers=num_workers)
+                for key, val in known.items():
+                    self.assertTrue(np.array_equal(getattr(g, key), val))
+
+    def test_cart_grid(self):
+        g = pp.CartGrid([3, 2, 2], [1, 2, 3])
+        g.nodes += 0.01 * np.random.RandomState(0).rand(*g.nodes.shape)
+        self.compare(g)
+
+    def test_tetrahedral_grid(self):
+        g = pp.StructuredTetrahedralGrid([2, 2, 2], [1, 1, 1])
+        self.compare(g)
+        self.assertTrue(np.isclose(g.cell_volumes.sum(), 1))
+
+    def test_face_without_cells(self):
+        # Remove the last cell of a Cartesian grid. Its faces that are not shared
+        # with other cells should still have their geometry computed.
+        g = pp.CartGrid([2, 1, 1])
+        g.cell_faces = g.cell_faces[:, :1]
+        g.num_cells = 1
+        g.compute_geometry(chunk_size=1)
+        self.assertTrue(np.allclose(g.face_areas, 1))
+        self.assertTrue(np.allclose(g.face_centers[:, 2], [2, 0.5, 0.5]))
+        self.assertTrue(np.allclose(g.cell_centers[:, 0], [0.5, 0.5, 0.5]))
+
+
 class TestBoundaries(unittest.TestCase):
     def test_bounary_node_cart(self):
         g = pp.CartGrid([2, 2])
@@ -0,0 +1,140 @@
+"""
+Tests of binary storage of grids and grid buckets, pp.grid_io.
+"""
+import shutil
+import unittest
+
+import numpy as np
+
+import porepy as pp
+
+
+class TestGridIO(unittest.TestCase):
+    def setUp(self):
+        self.folder = "./test_grid_io/"
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def compare_grids(self, g, g_loaded):
+        self.assertTrue(type(g) == type(g_loaded))
+        self.assertTrue(g.dim == g_loaded.dim)
+        self.assertTrue(np.allclose(g.nodes, g_loaded.nodes))
+        self.assertTrue((g.face_nodes != g_loaded.face_nodes).nnz == 0)
+        self.assertTrue((g.cell_faces != g_loaded.cell_faces).nnz == 0)
+        self.assertTrue(np.allclose(g.cell_volumes, g_loaded.cell_volumes))
+        self.assertTrue(np.allclose(g.face_normals, g_loaded.face_normals))
+        for key, val in g.tags.items():
+            self.assertTrue(np.all(val == g_loaded.tags[key]))
+
+    def test_grid(self):
+        g = pp.StructuredTriangleGrid([3, 2])
+        g.compute_geometry()
+        pp.grid_io.save(g, self.folder)
+        g_loaded = pp.grid_io.load(self.folder)
+        self.compare_grids(g, g_loaded)
+
+        # The loaded grid can be modified and used as usual
+        g_loaded.nodes[0] *= 2
+        g_loaded.compute_geometry()
+        self.assertTrue(np.allclose(g_loaded.cell_volumes, 2 * g.cell_volumes))
+        p = g.cell_centers[:, 2:3] * np.array([[2], [1], [1]])
+        self.assertTrue(g_loaded.closest_cell(p) == 2)
+
+    def test_connectivity_cache_not_stored(self):
+        # The cached connectivity is derived data, and should not be stored
+        g = pp.CartGrid([20, 20])
+        g.compute_geometry()
+        pp.grid_io.save(g, self.folder)
+        with open(self.folder + "manifest.json", "r") as f:
+            manifest = f.read()
+
+        cell_nodes = g.cell_nodes()
+        pp.grid_io.save(g, self.folder)
+        with open(self.folder + "manifest.json", "r") as f:
+            self.assertTrue(f.read() == manifest)
+        self.assertFalse("_connectivity_cache" in manifest)
+
+        g_loaded = pp.grid_io.load(self.folder)
+        self.compare_grids(g, g_loaded)
+        self.assertTrue((g_loaded.cell_nodes() != cell_nodes).nnz == 0)
+
+    def test_grid_bucket(self):
+        for compress in [False, True]:
+            gb = pp.meshing.cart_grid([np.array([[1, 3], [2, 2]])], [4, 4])
+            for g, d in gb:
+                d["pressure"] = np.arange(g.num_cells)
+                d["bc"] = pp.BoundaryCondition(g)
+            pp.grid_io.save(gb, self.folder, compress=compress)
+            gb_loaded = pp.grid_io.load(self.folder)
+
+            self.assertTrue(gb.num_graph_nodes() == gb_loaded.num_graph_nodes())
+            for (g, d), (g_loaded, d_loaded) in zip(gb, gb_loaded):
+                self.compare_grids(g, g_loaded)
+                self.assertTrue(d["node_number"] == d_loaded["node_number"])
+                self.assertTrue(np.all(d["pressure"] == d_loaded["pressure"]))
+                self.assertTrue(np.all(d["bc"].is_dir == d_loaded["bc"].is_dir))
+
+            for (e, d), (e_loaded, d_loaded) in zip(gb.edges(), gb_loaded.edges()):
+                self.assertTrue(e[0].dim == e_loaded[0].dim)
+                self.assertTrue(e[1].dim == e_loaded[1].dim)
+                mg, mg_loaded = d["mortar_grid"], d_loaded["mortar_grid"]
+                self.assertTrue(
+                    (mg.master_to_mortar_int() != mg_loaded.master_to_mortar_int()).nnz
+                    == 0
+                )
+                self.assertTrue(
+                    (mg.slave_to_mortar_int() != mg_loaded.slave_to_mortar_int()).nnz
+                    == 0
+                )
+                self.assertTrue(mg.num_sides() == mg_loaded.num_sides())
+                self.assertTrue((d["face_cells"] != d_loaded["face_cells"]).nnz == 0)
+                # The side grids of the mortar grid are grids in their own right
+                for side, g in mg.side_grids.items():
+                    self.compare_grids(g, mg_loaded.side_grids[side])
+
+    def test_allow_pickle(self):
+        gb = pp.meshing.cart_grid([np.array([[1, 3], [2, 2]])], [4, 4])
+        pp.grid_io.save(gb, self.folder, allow_pickle=False)
+        pp.grid_io.load(self.folder, allow_pickle=False)
+
+        # Boundary conditions have no array representation, and are pickled
+        for g, d in gb:
+            d["bc"] = pp.BoundaryCondition(g)
+        self.assertRaises(
+            ValueError, pp.grid_io.save, gb, self.folder, allow_pickle=False
+        )
+        pp.grid_io.save(gb, self.folder)
+        self.assertRaises(ValueError, pp.grid_io.load, self.folder, allow_pickle=False)
+
+    def test_chunks(self):
+        # Arrays larger than the chunk size are split in the compressed archive
+        gb = pp.meshing.cart_grid([np.array([[1, 3], [2, 2]])], [4, 4])
+        pp.grid_io.save(gb, self.folder, compress=True, chunk_size=7)
+        with np.load(self.folder + "arrays.npz") as f:
+            self.assertTrue(np.all([f[key].size <= 7 for key in f.files]))
+        gb_loaded = pp.grid_io.load(self.folder)
+        for (g, _), (g_loaded, _) in zip(gb, gb_loaded):
+            self.compare_grids(g, g_loaded)
+
+    def test_mortar_grid_sides(self):
+        gb = pp.meshing.cart_grid([np.array([[1, 3], [2, 2]])], [4, 4])
+        pp.grid_io.save(gb, self.folder)
+        gb_loaded = pp.grid_io.load(self.folder)
+        for (_, d), (_, d_loaded) in zip(gb.edges(), gb_loaded.edges()):
+            sides = d["mortar_grid"].sides
+            self.assertTrue(np.all(sides == d_loaded["mortar_grid"].sides))
+            self.assertTrue(sides.size == d["mortar_grid"].num_sides())
+
+    def test_unknown_version(self):
+        g = pp.CartGrid([2, 2])
+        pp.grid_io.save(g, self.folder)
+        with open(self.folder + "manifest.json", "r") as f:
+            manifest = f.read()
+        with open(self.folder + "manifest.json", "w") as f:
+            f.write(manifest.replace('"format_version": 2', '"format_version": 0'))
+        self.assertRaises(ValueError, pp.grid_io.load, self.folder)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+"""
+Tests of the block preconditioners in pp.numerics.linalg.linsolve.
+"""
+import numpy as np
+import pytest
+import scipy.sparse as sps
+import scipy.sparse.linalg as spl
+import unittest
+
+import porepy as pp
+from porepy.numerics.linalg.linsolve import Factory, LUCache, rigid_body_modes
+
+
+class TestBlockPreconditioner(unittest.TestCase):
+    def setUp(self):
+        # Two coupled blocks, the unknowns of the blocks are interleaved
+        n = 6
+        off_diag = -np.ones(n - 1)
+        laplace = sps.diags([off_diag, 3 * np.ones(n), off_diag], [-1, 0, 1])
+        coupling = sps.diags([np.ones(n), 0.5 * np.ones(n - 1)], [0, 1])
+        self.A = sps.bmat([[laplace, coupling.T], [coupling, 2 * laplace]]).tocsr()
+        self.blocks = [np.arange(n), n + np.arange(n)]
+
+        perm = np.arange(2 * n).reshape((2, n)).ravel("F")
+        self.A = self.A[perm][:, perm]
+        inv_perm = np.argsort(perm)
+        self.blocks = [inv_perm[b] for b in self.blocks]
+
+    def test_exact_for_triangular_matrix(self):
+        # For a block triangular matrix, the preconditioner with exact block
+        # solvers is the inverse
+        for form, (rb, cb) in [("lower", (0, 1)), ("upper", (1, 0))]:
+            A_tri = self.A.tolil()
+            A_tri[np.ix_(self.blocks[rb], self.blocks[cb])] = 0
+            A_tri = A_tri.tocsr()
+            M = Factory().block_preconditioner(A_tri, self.blocks, form=form)
+            b = np.arange(A_tri.shape[0])
+            self.assertTrue(np.allclose(A_tri * M.matvec(b), b))
+
+    def test_gmres(self):
+        b = np.arange(self.A.shape[0])
+        for form in ["lower", "upper", "diagonal"]:
+            M = Factory().block_preconditioner(
+                self.A, self.blocks, solvers=["lu", "direct"], form=form
+            )
+            x, info = Factory().gmres(self.A)(b, M=M, tol=1e-12)
+            self.assertTrue(info == 0)
+            self.assertTrue(np.allclose(self.A * x, b))
+
+    def test_stabilization(self):
+        # Adding the Schur complement to the second block gives the exact inverse
+        # of the full matrix for the lower triangular form.
+        A_00 = self.A[self.blocks[0]][:, self.blocks[0]]
+        A_01 = self.A[self.blocks[0]][:, self.blocks[1]]
+        A_10 = self.A[self.blocks[1]][:, self.blocks[0]]
+        schur = -A_10 * spl.inv(A_00.tocsc()) * A_01
+
+        M = Factory().block_preconditioner(
+            self.A, self.blocks, form="lower", stabilization={1: schur}
+        )
+        # Apply a block upper triangular factor to obtain the inverse
+        b = np.arange(self.A.shape[0])
+        x = M.matvec(b)
+        y = np.zeros_like(x)
+        y[self.blocks[1]] = x[self.blocks[1]]
+        y[self.blocks[0]] = x[self.blocks[0]] - spl.spsolve(
+            A_00.tocsc(), A_01 * x[self.blocks[1]]
+        )
+        self.assertTrue(np.allclose(self.A * y, b))
+
+    def test_unknown_form(self):
+        self.assertRaises(
+            ValueError, Factory().block_preconditioner, self.A, self.blocks, None, "foo"
+        )
+
+
+class TestRigidBodyModes(unittest.TestCase):
+    def elasticity_matrix(self, g):
+        # Mpsa discretization, with Neumann conditions on all boundaries
+        bc = pp.BoundaryConditionVectorial(g)
+        data = pp.initialize_default_data(g, {}, "mechanics", {"bc": bc})
+        discr = pp.Mpsa("mechanics")
+        discr.discretize(g, data)
+        return discr.assemble_matrix_rhs(g, data)[0]
+
+    def test_null_space_of_elasticity(self):
+        # Mpsa reproduces the rigid body motions on Cartesian grids in 2d
+        g = pp.CartGrid([4, 3])
+        g.compute_geometry()
+        modes = rigid_body_modes(g)
+        self.assertTrue(modes.shape == (2 * g.num_cells, 3))
+        self.assertTrue(np.allclose(self.elasticity_matrix(g) * modes, 0))
+
+    def test_modes_3d(self):
+        g = pp.CartGrid([2, 3, 2])
+        g.compute_geometry()
+        modes = rigid_body_modes(g)
+        self.assertTrue(modes.shape == (3 * g.num_cells, 6))
+        self.assertTrue(np.linalg.matrix_rank(modes) == 6)
+        # The rotations are orthogonal to the vector from the center of the grid
+        x = g.cell_centers - np.mean(g.cell_centers, axis=1).reshape((-1, 1))
+        for mode in modes[:, 3:].T:
+            u = mode.reshape((3, -1), order="F")
+            self.assertTrue(np.allclose(np.sum(u * x, axis=0), 0))
+
+    def test_amg_block_with_rigid_body_modes(self):
+        pytest.importorskip("pyamg")
+        g = pp.CartGrid([10, 10])
+        g.compute_geometry()
+        A = self.elasticity_matrix(g)
+        # Remove the null space by a zero order term
+        A = A + 1e-3 * sps.identity(A.shape[0])
+        blocks = [np.arange(A.shape[0])]
+        M = Factory().block_preconditioner(
+            A, blocks, solvers=["amg"], null_spaces={0: rigid_body_modes(g)}
+        )
+        b = np.ones(A.shape[0])
+        x, info = spl.gmres(A, b, M=M, tol=1e-10)
+        self.assertTrue(info == 0)
+        self.assertTrue(np.linalg.norm(A * x - b) < 1e-8 * np.linalg.norm(b))
+
+
+class TestLUCache(unittest.TestCase):
+    def matrix(self, perturbation=0):
+        n = 10
+        off_diag = -np.ones(n - 1)
+        diag = 3 * np.ones(n)
+        diag[0] += perturbation
+        return sps.diags([off_diag, diag, off_diag], [-1, 0, 1]).tocsr()
+
+    def test_preconditioner(self):
+        cache = LUCache(tol=1e-12)
+        b = np.arange(10)
+        for perturbation in [0, 0.1, 0.2]:
+            A = self.matrix(perturbation)
+            x = cache.solve(A, b)
+            self.assertTrue(np.allclose(A * x, b))
+
+        # The first matrix is factorized, the next solves use GMRES
+        self.assertTrue(cache.num_factorizations == 1)
+        self.assertTrue(cache.num_solves == 3)
+        self.assertTrue(cache.num_iterations > 0)
+
+    def test_preconditioner_refactorize(self):
+        # GMRES is not allowed to iterate, the matrix must be refactorized
+        cache = LUCache(max_iterations=1, tol=1e-12)
+        b = np.arange(10)
+        cache.solve(self.matrix(), b)
+        A = self.matrix(1)
+        x = cache.solve(A, b)
+        self.assertTrue(np.allclose(A * x, b))
+        self.assertTrue(cache.num_factorizations == 2)
+
+    def test_modified_newton(self):
+        cache = LUCache(mode="modified_newton", max_residual=0.5)
+        b = np.ones(10)
+        x_0 = cache.solve(self.matrix(), b)
+        # Small perturbation: The old factorization is applied
+        x = cache.solve(self.matrix(0.01), b)
+        self.assertTrue(np.allclose(x, x_0))
+        self.assertTrue(cache.num_factorizations == 1)
+        # Large perturbation: The matrix is refactorized
+        A = self.matrix(100)
+        x = cache.solve(A, b)
+        self.assertTrue(np.allclose(A * x, b))
+        self.assertTrue(cache.num_factorizations == 2)
+
+    def test_modified_newton_refinement(self):
+        # By default, the old factorization is refined to the tolerance
+        cache = LUCache(mode="modified_newton", tol=1e-12)
+        b = np.ones(10)
+        cache.solve(self.matrix(), b)
+        A = self.matrix(0.5)
+        x = cache.solve(A, b)
+        self.assertTrue(np.linalg.norm(A * x - b) <= 1e-12 * np.linalg.norm(b))
+        self.assertTrue(cache.num_factorizations == 1)
+        self.assertTrue(cache.num_iterations > 0)
+
+    def test_call_as_model_solver(self):
+        # The cache can be used as solver(assembler, A, b)
+        cache = LUCache()
+        A = self.matrix()
+        b = np.ones(10)
+        self.assertTrue(np.allclose(A * cache(None, A, b), b))
+
+    def test_refactorize_every_and_reset(self):
+        cache = LUCache(mode="modified_newton", refactorize_every=1)
+        b = np.ones(10)
+        for _ in range(4):
+            cache.solve(self.matrix(), b)
+        self.assertTrue(cache.num_factorizations == 2)
+        cache.reset()
+        cache.solve(self.matrix(), b)
+        self.assertTrue(cache.num_factorizations == 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
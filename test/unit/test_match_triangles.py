@@ -54,6 +54,54 @@ class TestTriangulationMatching(unittest.TestCase):
         self.assertTrue(l[1][0] == 0)
         self.assertTrue(l[1][2] == 0.25)
 
+    def test_return_matrix(self):
+        p1 = np.array([[0, 1, 1, 0], [0, 0, 1, 1]])
+        t1 = np.array([[0, 1, 3], [1, 2, 3]]).T
+
+        p2 = np.array([[0, 1, 0], [0, 1, 1]])
+        t2 = np.array([[0, 1, 2]]).T
+
+        mat = pp.intersections.triangulations(p1, p2, t1, t2, return_matrix=True)
+        self.assertTrue(mat.shape == (2, 1))
+        self.assertTrue(np.allclose(mat.toarray(), np.array([[0.25], [0.25]])))
+
+    def test_clockwise_triangles(self):
+        # The orientation of the triangles should not matter
+        p1 = np.array([[0, 1, 1, 0], [0, 0, 1, 1]])
+        t1 = np.array([[0, 3, 1], [1, 3, 2]]).T
+
+        p2 = np.array([[0, 1, 0], [0, 1, 1]])
+        t2 = np.array([[0, 2, 1]]).T
+
+        l = pp.intersections.triangulations(p1, p2, t1, t2)
+        self.assertTrue(len(l) == 2)
+        self.assertTrue(np.allclose([l[0][2], l[1][2]], 0.25))
+
+    def test_neighboring_triangles(self):
+        # Triangles which share an edge or a vertex, but do not overlap
+        p1 = np.array([[0, 1, 0], [0, 0, 1]])
+        t1 = np.array([[0, 1, 2]]).T
+
+        p2 = np.array([[1, 1, 0, 2], [0, 1, 1, 0]])
+        t2 = np.array([[0, 1, 2], [0, 3, 1]]).T
+
+        l = pp.intersections.triangulations(p1, p2, t1, t2)
+        self.assertTrue(len(l) == 0)
+
+    def test_shifted_grids(self):
+        # Two Cartesian grids split into triangles, shifted half a cell relative
+        # to each other. The total overlap should equal the common area.
+        g1 = pp.StructuredTriangleGrid([4, 4], [1, 1])
+        g2 = pp.StructuredTriangleGrid([4, 4], [1, 1])
+        g2.nodes[:2] += 0.125
+        t1 = g1.cell_nodes().indices.reshape((3, -1), order="F")
+        t2 = g2.cell_nodes().indices.reshape((3, -1), order="F")
+
+        mat = pp.intersections.triangulations(
+            g1.nodes[:2], g2.nodes[:2], t1, t2, return_matrix=True
+        )
+        self.assertTrue(np.isclose(mat.sum(), 0.875 ** 2))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,86 @@
+"""
+Tests of the on-disk cache of mixed-dimensional meshes, pp.MeshCache.
+"""
+import shutil
+import unittest
+
+import numpy as np
+
+import porepy as pp
+
+
+class TestMeshCache(unittest.TestCase):
+    def setUp(self):
+        self.folder = "./test_mesh_cache/"
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def create(self):
+        self.num_created += 1
+        return pp.meshing.cart_grid([np.array([[1, 3], [2, 2]])], [4, 4])
+
+    def test_hit_and_miss(self):
+        self.num_created = 0
+        cache = pp.MeshCache(self.folder)
+        pts = np.array([[1, 3], [2, 2]])
+        mesh_args = {"mesh_size_frac": 0.5}
+
+        gb = cache.mesh(self.create, pts, mesh_args)
+        gb_cached = cache.mesh(self.create, pts.copy(), dict(mesh_args))
+        self.assertTrue(self.num_created == 1)
+        self.assertTrue(cache.num_hits == 1 and cache.num_misses == 1)
+
+        # The stored mesh should be identical to the created one
+        self.assertTrue(gb.num_graph_nodes() == gb_cached.num_graph_nodes())
+        for (g, _), (g_cached, _) in zip(gb, gb_cached):
+            self.assertTrue(np.allclose(g.nodes, g_cached.nodes))
+            self.assertTrue((g.cell_faces != g_cached.cell_faces).nnz == 0)
+            self.assertTrue(
+                np.all(g.tags["fracture_faces"] == g_cached.tags["fracture_faces"])
+            )
+        for (_, d), (_, d_cached) in zip(gb.edges(), gb_cached.edges()):
+            mg, mg_cached = d["mortar_grid"], d_cached["mortar_grid"]
+            self.assertTrue(
+                (mg.master_to_mortar_int() != mg_cached.master_to_mortar_int()).nnz == 0
+            )
+
+        # Changing the input gives a new mesh
+        cache.mesh(self.create, pts, {"mesh_size_frac": 0.25})
+        self.assertTrue(self.num_created == 2)
+
+    def test_no_pickle(self):
+        # Meshes with data that can only be pickled are not stored
+        def create():
+            gb = self.create()
+            for g, d in gb:
+                d["bc"] = pp.BoundaryCondition(g)
+            return gb
+
+        self.num_created = 0
+        cache = pp.MeshCache(self.folder)
+        for _ in range(2):
+            gb = cache.mesh(create, np.ones(2))
+            self.assertTrue(isinstance(gb, pp.GridBucket))
+        self.assertTrue(self.num_created == 2)
+        self.assertTrue(cache.num_hits == 0 and cache.num_misses == 2)
+
+    def test_clear(self):
+        self.num_created = 0
+        cache = pp.MeshCache(self.folder)
+        cache.mesh(self.create, np.ones(2))
+        cache.clear()
+        cache.mesh(self.create, np.ones(2))
+        self.assertTrue(self.num_created == 2)
+
+    def test_unhashable_input(self):
+        self.num_created = 0
+        cache = pp.MeshCache(self.folder)
+        for _ in range(2):
+            cache.mesh(self.create, lambda x: x)
+        self.assertTrue(self.num_created == 2)
+        self.assertTrue(cache.num_hits == 0 and cache.num_misses == 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Tests of the subprocess handling in gmsh_interface.run_gmsh. A small python
+script stands in for the gmsh executable.
+"""
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import unittest
+
+from porepy.grids.gmsh import gmsh_interface
+
+
+class TestRunGmsh(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.in_file = os.path.join(self.folder, "in.geo")
+        with open(self.in_file, "w") as f:
+            f.write("// empty\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def _fake_gmsh(self, body):
+        # Executable which writes its arguments to the output file (the
+        # argument following -o), and then runs body.
+        name = os.path.join(self.folder, "fake_gmsh")
+        with open(name, "w") as f:
+            f.write("#!" + sys.executable + "\n")
+            f.write("import sys, time\n")
+            f.write("out = sys.argv[sys.argv.index('-o') + 1]\n")
+            f.write("open(out, 'w').write(' '.join(sys.argv[1:]))\n")
+            f.write(body + "\n")
+        os.chmod(name, os.stat(name).st_mode | stat.S_IEXEC)
+        return name
+
+    def test_success(self):
+        gmsh = self._fake_gmsh("print('meshing')")
+        out_file = os.path.join(self.folder, "out.msh")
+        status = gmsh_interface.run_gmsh(
+            self.in_file, out_file, dims=2, path_to_gmsh=gmsh, v=0
+        )
+        self.assertTrue(status == 0)
+        with open(out_file) as f:
+            args = f.read().split()
+        self.assertTrue(args == ["-2", self.in_file, "-o", out_file, "-v", "0"])
+
+    def test_failure(self):
+        gmsh = self._fake_gmsh("print('error'); sys.exit(3)")
+        out_file = os.path.join(self.folder, "out.msh")
+        status = gmsh_interface.run_gmsh(
+            self.in_file, out_file, dims=3, path_to_gmsh=gmsh
+        )
+        self.assertTrue(status == 3)
+
+        with self.assertRaises(gmsh_interface.GmshError) as cm:
+            gmsh_interface.run_gmsh(
+                self.in_file, out_file, dims=3, path_to_gmsh=gmsh, raise_on_error=True
+            )
+        self.assertTrue(cm.exception.status == 3)
+        self.assertTrue("error" in cm.exception.output)
+
+    def test_timeout(self):
+        # The output written before the timeout should be kept
+        gmsh = self._fake_gmsh("print('meshing', flush=True); time.sleep(10)")
+        out_file = os.path.join(self.folder, "out.msh")
+        with self.assertRaises(gmsh_interface.GmshError) as cm:
+            gmsh_interface.run_gmsh(
+                self.in_file, out_file, dims=3, path_to_gmsh=gmsh, timeout=0.5
+            )
+        self.assertTrue(cm.exception.status is None)
+        self.assertTrue("meshing" in cm.exception.output)
+
+    def test_missing_executable(self):
+        out_file = os.path.join(self.folder, "out.msh")
+        self.assertRaises(
+            gmsh_interface.GmshError,
+            gmsh_interface.run_gmsh,
+            self.in_file,
+            out_file,
+            dims=3,
+            path_to_gmsh=os.path.join(self.folder, "no_gmsh"),
+        )
+
+    def test_parallel(self):
+        gmsh = self._fake_gmsh("")
+        jobs = []
+        for i in range(4):
+            jobs.append(
+                {
+                    "in_file": self.in_file,
+                    "out_file": os.path.join(self.folder, "out_" + str(i) + ".msh"),
+                    "dims": 3,
+                }
+            )
+        status = gmsh_interface.run_gmsh_parallel(
+            jobs, num_workers=2, path_to_gmsh=gmsh
+        )
+        self.assertTrue(status == [0] * 4)
+        for job in jobs:
+            self.assertTrue(os.path.isfile(job["out_file"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
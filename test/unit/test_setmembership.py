@@ -179,6 +179,18 @@ class TestUniqueColumns(unittest.TestCase):
                 np.min(np.sum(np.abs(p_known[:, i] - p_unique), axis=0)) == 0
             )
 
+    def test_chain_of_close_points(self):
+        # The points are processed in order: The second point is close to the
+        # first, and is removed. The third is close to the second, but not to
+        # the first, and is kept. The fourth is close to the first and third,
+        # and is represented by the first.
+        p = np.array([[0, 0.6, 1.2, 0.6], [0, 0, 0, 0.1]])
+        p_unique, new_2_old, old_2_new = setmembership.unique_columns_tol(p, tol=0.5)
+
+        self.assertTrue(np.allclose(p_unique, p[:, [0, 2]]))
+        self.assertTrue(np.all(new_2_old == np.array([0, 2])))
+        self.assertTrue(np.all(old_2_new == np.array([0, 0, 1, 0])))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,122 @@
+"""
+Tests of the compact storage of second and fourth order tensors.
+"""
+import unittest
+
+import numpy as np
+
+import porepy as pp
+
+
+class TestSecondOrderTensor(unittest.TestCase):
+    def test_isotropic(self):
+        kxx = np.array([1.0, 2.0])
+        k = pp.SecondOrderTensor(kxx)
+        known = np.zeros((3, 3, 2))
+        for i in range(3):
+            known[i, i] = kxx
+        self.assertTrue(np.allclose(k.values, known))
+
+    def test_full(self):
+        k = pp.SecondOrderTensor(
+            np.array([4.0]),
+            kyy=np.array([5.0]),
+            kzz=np.array([6.0]),
+            kxy=np.array([1.0]),
+            kxz=np.array([2.0]),
+            kyz=np.array([3.0]),
+        )
+        known = np.array([[4, 1, 2], [1, 5, 3], [2, 3, 6]]).reshape((3, 3, 1))
+        self.assertTrue(np.allclose(k.values, known))
+
+    def test_not_positive_definite(self):
+        self.assertRaises(
+            ValueError,
+            pp.SecondOrderTensor,
+            np.array([1.0]),
+            kyy=np.array([1.0]),
+            kxy=np.array([2.0]),
+        )
+
+    def test_scalar_components(self):
+        k = pp.SecondOrderTensor(np.array([1.0, 2.0]), kyy=3, kzz=4)
+        known = np.zeros((3, 3, 2))
+        known[0, 0] = [1, 2]
+        known[1, 1] = 3
+        known[2, 2] = 4
+        self.assertTrue(np.allclose(k.values, known))
+
+    def test_diagonal_not_positive_definite(self):
+        # Negative diagonal components, without off-diagonal components
+        kxx = np.ones(2)
+        self.assertRaises(ValueError, pp.SecondOrderTensor, kxx, kyy=-kxx)
+        self.assertRaises(ValueError, pp.SecondOrderTensor, kxx, kzz=-kxx)
+
+    def test_input_is_copied(self):
+        kxx = np.ones(2)
+        kyy = np.ones(2)
+        k = pp.SecondOrderTensor(kxx, kyy=kyy)
+        kxx[0] = 2
+        kyy[0] = 3
+        self.assertTrue(np.allclose(k.values[0, 0], 1))
+        self.assertTrue(np.allclose(k.values[1, 1], 1))
+
+    def test_restrict_to_cells(self):
+        kxx = np.arange(1, 5, dtype=np.float)
+        k = pp.SecondOrderTensor(kxx, kxy=0.1 * kxx)
+        cells = np.array([3, 1])
+        loc_k = k.restrict_to_cells(cells)
+        # The restricted tensor is formed without the full tensor
+        self.assertTrue(k._values is None)
+        self.assertTrue(np.allclose(loc_k.values, k.values[:, :, cells]))
+
+        # Modifications of the full tensor carry over to the restriction
+        k.values[2, 2] = 7
+        self.assertTrue(np.allclose(k.restrict_to_cells(cells).values[2, 2], 7))
+
+    def test_copy(self):
+        k = pp.SecondOrderTensor(np.ones(3))
+        k_copy = k.copy()
+        k.values[0, 0] = 2
+        self.assertTrue(np.allclose(k_copy.values[0, 0], 1))
+        self.assertTrue(np.allclose(k.copy().values[0, 0], 2))
+
+
+class TestFourthOrderTensor(unittest.TestCase):
+    def test_values(self):
+        c = pp.FourthOrderTensor(mu=np.array([1.0]), lmbda=np.array([2.0]))
+        self.assertTrue(c.values.shape == (9, 9, 1))
+        self.assertTrue(np.allclose(c.values[0, 0], 4))
+        self.assertTrue(np.allclose(c.values[0, 4], 2))
+        self.assertTrue(np.allclose(c.values[1, 3], 1))
+
+    def test_restrict_to_cells(self):
+        mu = np.arange(1, 5, dtype=np.float)
+        c = pp.FourthOrderTensor(mu=mu, lmbda=2 * mu)
+        cells = np.array([0, 2])
+        loc_c = c.restrict_to_cells(cells)
+        self.assertTrue(c._values is None)
+        self.assertTrue(np.allclose(loc_c.mu, mu[cells]))
+        self.assertTrue(np.allclose(loc_c.lmbda, 2 * mu[cells]))
+        self.assertTrue(np.allclose(loc_c.values, c.values[:, :, cells]))
+
+        # Modifications of the full tensor carry over to the restriction
+        c.values[0, 0] = 7
+        self.assertTrue(np.allclose(c.restrict_to_cells(cells).values[0, 0], 7))
+
+    def test_input_is_copied(self):
+        mu = np.ones(2)
+        c = pp.FourthOrderTensor(mu=mu, lmbda=np.ones(2))
+        mu[0] = 2
+        self.assertTrue(np.allclose(c.values[0, 0], 3))
+
+    def test_copy(self):
+        c = pp.FourthOrderTensor(mu=np.ones(3), lmbda=np.ones(3))
+        c_copy = c.copy()
+        c.values[0, 0] = 2
+        self.assertTrue(np.allclose(c_copy.values[0, 0], 3))
+        self.assertTrue(np.allclose(c.copy().values[0, 0], 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,6 +5,7 @@ as before. Failure of any test thus indicates that something in the export
 filter, or in the vtk python bindings has changed. If the change is external to
 PorePy, this does not necessarily mean that something is wrong.
 """
+import os
 import shutil
 import numpy as np
 import unittest
@@ -17,6 +18,7 @@ import porepy as pp
 try:
     if_vtk = True
     import vtk
+    import vtk.util.numpy_support as ns
 except ImportWarning:
     import warnings
 
@@ -208,6 +210,135 @@ class BasicsTest(unittest.TestCase):
             content = content_file.read()
         self.assertTrue(content == self._gb_1_mortar_grid_vtu())
 
+    def test_gb_time_series(self):
+        # The geometry is written once, and the data of each time step to
+        # separate files. Read the time series back with the vtk XDMF reader.
+        if not if_vtk:
+            return
+
+        f1 = np.array([[0, 1], [0.5, 0.5]])
+        gb = pp.meshing.cart_grid([f1], [4] * 2, **{"physdims": [1, 1]})
+        gb.compute_geometry()
+
+        folder = "./test_vtk/"
+        file_name = "time_series"
+        save = pp.Exporter(gb, file_name, folder, time_series=True)
+        for step in range(2):
+            for g, d in gb:
+                pp.set_state(d, {"dummy_scalar": np.ones(g.num_cells) * step})
+            save.write_vtk(["dummy_scalar"], time_step=step)
+        save.write_pvd(np.array([0.0, 0.5]))
+
+        for name in ["_1", "_2", "_mortar_1", "_1_000000", "_2_000001"]:
+            self.assertTrue(os.path.exists(folder + file_name + name + ".bin"))
+        self.assertFalse(os.path.exists(folder + file_name + "_mortar_1_000000.bin"))
+
+        if not hasattr(vtk, "vtkXdmfReader"):
+            return
+        reader = vtk.vtkXdmfReader()
+        reader.SetFileName(folder + file_name + ".xdmf")
+        reader.UpdateTimeStep(0.5)
+        blocks = reader.GetOutputDataObject(0)
+        self.assertTrue(blocks.GetNumberOfBlocks() == 3)
+        # The grids are ordered by dimension, followed by the mortar grids
+        num_cells = [4, gb.grids_of_dimension(2)[0].num_cells, 8]
+        for bi in range(3):
+            block = blocks.GetBlock(bi)
+            self.assertTrue(block.GetNumberOfCells() == num_cells[bi])
+            is_mortar = ns.vtk_to_numpy(block.GetCellData().GetArray("is_mortar"))
+            self.assertTrue(np.all(is_mortar == (bi == 2)))
+            if bi < 2:
+                cell_id = ns.vtk_to_numpy(block.GetCellData().GetArray("cell_id"))
+                self.assertTrue(np.all(cell_id == np.arange(num_cells[bi])))
+                values = block.GetCellData().GetArray("dummy_scalar")
+                self.assertTrue(np.allclose(ns.vtk_to_numpy(values), 1))
+
+        # The time series requires a fixed grid
+        self.assertRaises(
+            ValueError,
+            pp.Exporter,
+            gb,
+            file_name,
+            folder,
+            fixed_grid=False,
+            time_series=True,
+        )
+
+    def test_time_series_automatic_time_step(self):
+        # Without time_step, the steps of a time series are numbered in order
+        if not if_vtk:
+            return
+
+        g = pp.CartGrid([4] * 2, [1] * 2)
+        g.compute_geometry()
+        folder = "./test_vtk/"
+        file_name = "time_series_automatic"
+        save = pp.Exporter(g, file_name, folder, time_series=True)
+        for step in range(2):
+            save.write_vtk({"dummy_scalar": step * np.ones(g.num_cells)})
+        save.write_pvd(np.array([0.0, 0.5]))
+
+        for step in range(2):
+            name = folder + file_name + "_grid_" + str(step).zfill(6) + ".bin"
+            self.assertTrue(os.path.exists(name))
+        with open(folder + file_name + ".xdmf", "r") as f:
+            content = f.read()
+        self.assertTrue('<Xdmf Version="3.0">' in content)
+        self.assertTrue(content.count("<Time Value=") == 2)
+
+    def test_asynchronous(self):
+        # The files written in the background should be identical to those of
+        # the standard export, also if the data is modified after write_vtk.
+        if not if_vtk:
+            return
+
+        g = pp.CartGrid([4] * 2, [1] * 2)
+        g.compute_geometry()
+
+        folder = "./test_vtk/"
+        contents = []
+        for asynchronous in [False, True]:
+            file_name = "grid_async_" + str(asynchronous)
+            save = pp.Exporter(
+                g, file_name, folder, binary=False, asynchronous=asynchronous
+            )
+            values = np.zeros(g.num_cells)
+            for step in range(3):
+                values[:] = step
+                save.write_vtk({"dummy_scalar": values}, time_step=step)
+            save.write_pvd(np.arange(3))
+            save.close()
+
+            content = []
+            for step in range(3):
+                name = folder + file_name + "_" + str(step).zfill(6) + ".vtu"
+                with open(name, "r") as content_file:
+                    content.append(content_file.read())
+            contents.append(content)
+
+        self.assertTrue(contents[0] == contents[1])
+        self.assertTrue(contents[0][0] != contents[0][1])
+
+    def test_asynchronous_terminated_writer(self):
+        # If the background writer is terminated, waiting for it should raise
+        # an error rather than block.
+        if not if_vtk:
+            return
+
+        g = pp.CartGrid([4] * 2, [1] * 2)
+        g.compute_geometry()
+        save = pp.Exporter(g, "grid_async_terminated", "./test_vtk/", asynchronous=True)
+        save.write_vtk({"dummy_scalar": np.zeros(g.num_cells)}, time_step=0)
+        save.flush()
+        save._worker.terminate()
+        save._worker.join()
+
+        self.assertRaises(RuntimeError, save.flush)
+        # The writer is stopped, a new export starts a new writer
+        save.close()
+        save.write_vtk({"dummy_scalar": np.zeros(g.num_cells)}, time_step=2)
+        save.close()
+
     def test_gb_2(self):
         if not if_vtk:
             return